@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# pylint: disable=line-too-long
+"""End To End tester throughput benchmark. Runs tester.main against the simulated
+SENSE-O/SiteRM (EndToEndTester.simulator) for a grid of settings and writes
+results to a JSON file, which can be compared across commits.
+
+Each grid point runs in a separate subprocess (so peak RSS and CPU time are per point).
+
+Usage:
+  python3 helpers/benchmark.py --pairs 4,16 --threads 2,8 --vlans 0,4 --profiles fast,typical --output bench.json
+  python3 helpers/benchmark.py --compare old.json new.json
+  python3 helpers/benchmark.py --smoke
+
+Title                   : end-to-end-tester
+Author                  : Justas Balcas
+Email                   : jbalcas (at) es.net
+@Copyright              : Copyright (C) 2025 ESnet
+Date                    : 2025/03/14
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import resource
+import itertools
+import shutil
+import subprocess
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "python"))
+
+# Latency profiles (seconds). timescale of simulator is applied on top.
+PROFILES = {
+    "fast": {
+        "latency": {"sense": 0.0, "siterm": 0.0},
+        "transition": {"distribution": "fixed", "mean": 0.05},
+        "pingduration": 0.01,
+    },
+    "typical": {
+        "latency": {"sense": {"distribution": "lognormal", "mean": 0.2, "sigma": 0.5},
+                    "siterm": {"distribution": "uniform", "min": 0.05, "max": 0.3}},
+        "transition": {"distribution": "exponential", "mean": 1.0},
+        "pingduration": 0.05,
+    },
+    "slow": {
+        "latency": {"sense": {"distribution": "lognormal", "mean": 1.0, "sigma": 0.8},
+                    "siterm": {"distribution": "lognormal", "mean": 0.5, "sigma": 0.5}},
+        "transition": {"distribution": "exponential", "mean": 3.0},
+        "pingduration": 0.1,
+        "failures": {"create": 0.02, "cancel": 0.02, "pathfind": 0.05, "pingloss": 0.05},
+    },
+}
+
+
+def percentile(values, pct):
+    """Percentile (nearest rank) of values"""
+    if not values:
+        return None
+    values = sorted(values)
+    idx = max(0, min(len(values) - 1, int(round(pct / 100.0 * len(values) + 0.5)) - 1))
+    return values[idx]
+
+
+def distribution(values):
+    """Summary of values"""
+    if not values:
+        return {"count": 0}
+    return {"count": len(values), "mean": sum(values) / len(values), "p50": percentile(values, 50),
+            "p95": percentile(values, 95), "p99": percentile(values, 99), "max": max(values)}
+
+
+def buildConfig(point, workdir):
+    """Build tester config for grid point"""
+    entries, mappings = {}, {}
+    # Enough entries to produce requested number of pairs
+    # (with vlans pairs are vlansto x other entries)
+    count = 2
+    while (count - 1 if point["vlans"] else count * (count - 1) // 2) < point["pairs"]:
+        count += 1
+    for idx in range(count):
+        domain = f"urn:ogf:network:sim{idx}.net:2025"
+        entries[f"{domain}:host{idx}.sim{idx}.net"] = {"site": f"T2_SIM_{idx}"}
+        mappings[domain] = f"T2_SIM_{idx}"
+    config = {
+        "totalThreads": point["threads"],
+        "runInterval": 86400,
+        "sleepbetweenruns": 1,
+        "statusinterval": 1,
+        "configreloadinterval": 86400,
+        # Benchmark measures throughput, do not skip pairs based on lifecycle history
+        "rundeadline": False,
+        "workdir": workdir,
+        "configlocation": "",
+        "maxpairs": point["pairs"],
+        "timeouts": {key: 600 for key in ["create", "cancel", "cancelrep", "reprovision", "modify", "modifycreate"]},
+        "httpretries": {"retries": 1, "timeout": 1},
+        "reprovision": True,
+        "modify": True,
+        "modifycreate": True,
+        "entries": entries,
+        "mappings": mappings,
+        "simulator": dict(PROFILES[point["profile"]], enabled=True, seed=point.get("seed", 1),
+                          timescale=point.get("timescale", 1.0)),
+        # Simulated pings are shorter than requested ping time
+        "pingpollscale": PROFILES[point["profile"]]["pingduration"] * point.get("timescale", 1.0),
+    }
+    if point["vlans"]:
+        # With vlans, pairs are made between vlansto and all other entries
+        config["vlans"] = [f"3000-{3000 + point['vlans'] - 1}"]
+        config["vlansto"] = [list(entries)[0]]
+    return config
+
+
+def runPoint(point):
+    """Run one grid point in this process and return measurements"""
+    # Pre-create loggers so tester does not need /var/log/EndToEndTester
+    workdir = tempfile.mkdtemp(prefix="endtoend-bench-")
+    for name in ["Tester", "DBRecorder"]:
+        logger = logging.getLogger(name)
+        logger.addHandler(logging.FileHandler(os.path.join(workdir, f"{name}.log")))
+        logger.setLevel(logging.WARNING)
+        logger.propagate = False
+    # pylint: disable=import-outside-toplevel
+    from EndToEndTester import tester
+    from EndToEndTester.simulator import getOrchestrator
+    config = buildConfig(point, os.path.join(workdir, "output"))
+    startwall, startcpu = time.time(), time.process_time()
+    # Workers exit when queue is drained, so main returns before deadline (runInterval)
+    tester.main(config, int(startwall), int(startwall) + config["runInterval"])
+    timing = {"mainwalltime": time.time() - startwall, "cputime": time.process_time() - startcpu}
+    stats = getOrchestrator(config).stats()
+    outfiles = [fname for fname in os.listdir(config["workdir"]) if fname.endswith(".json")]
+    # Throughput is measured until last lifecycle finished (output file written),
+    # not until main returns (status loop sleeps statusinterval)
+    wall = max((os.path.getmtime(os.path.join(config["workdir"], fname)) for fname in outfiles), default=time.time()) - startwall
+    # Output file is <pair0>-<pair1>-<vlan>.json
+    pairsdone = {fname[:-len(".json")].rsplit("-", 1)[0] for fname in outfiles}
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "point": point,
+        "walltime": wall,
+        "mainwalltime": timing["mainwalltime"],
+        "cputime": timing["cputime"],
+        "peakrss_kb": usage.ru_maxrss,
+        "pairs_done": len(pairsdone),
+        "lifecycles_done": len(outfiles),
+        "pairs_per_hour": len(pairsdone) * 3600.0 / wall if wall else None,
+        "lifecycles_per_hour": len(outfiles) * 3600.0 / wall if wall else None,
+        "instances": stats["instances"],
+        "statuscalls_per_instance": distribution(stats["statuscalls"]),
+        "lifecycle_latency": distribution(stats["lifecycles"]),
+        "apicalls": stats["calls"],
+        "debugactions": stats["debugactions"],
+    }
+
+
+def runGrid(args):
+    """Run all grid points, each in a subprocess"""
+    grid = []
+    for pairs, threads, vlans, profile in itertools.product(args.pairs, args.threads, args.vlans, args.profiles):
+        grid.append({"pairs": pairs, "threads": threads, "vlans": vlans, "profile": profile,
+                     "timescale": args.timescale, "seed": args.seed})
+    results = []
+    for point in grid:
+        print(f"Running {point}", file=sys.stderr)
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--point", json.dumps(point)],
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=False,
+                              timeout=args.timeout)
+        try:
+            # Tester timer_func prints to stdout; result is last line
+            result = json.loads(proc.stdout.decode("utf-8", "replace").strip().splitlines()[-1])
+        except (IndexError, json.JSONDecodeError):
+            result = {"point": point, "error": f"Benchmark subprocess failed with exit code {proc.returncode}"}
+        results.append(result)
+        print(f"  pairs/hour: {result.get('pairs_per_hour')} wall: {result.get('walltime')} rss(kb): {result.get('peakrss_kb')}", file=sys.stderr)
+    return results
+
+
+def gitCommit():
+    """Current git commit of the repository (if available)"""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(oldfile, newfile):
+    """Compare two benchmark result files"""
+    with open(oldfile, "r", encoding="utf-8") as fd:
+        old = json.load(fd)
+    with open(newfile, "r", encoding="utf-8") as fd:
+        new = json.load(fd)
+    oldres = {json.dumps(item["point"], sort_keys=True): item for item in old["results"]}
+    print(f"{old.get('commit', '')[:10]} -> {new.get('commit', '')[:10]}")
+    for item in new["results"]:
+        key = json.dumps(item["point"], sort_keys=True)
+        if key not in oldres or "error" in item or "error" in oldres[key]:
+            continue
+        print(key)
+        for metric in ["pairs_per_hour", "lifecycles_per_hour", "cputime", "peakrss_kb"]:
+            print(f"  {metric}: {oldres[key][metric]} -> {item[metric]}")
+        for metric in ["statuscalls_per_instance", "lifecycle_latency"]:
+            print(f"  {metric} p95: {oldres[key][metric].get('p95')} -> {item[metric].get('p95')}")
+
+
+def intList(value):
+    """Comma separated int list"""
+    return [int(item) for item in value.split(",") if item]
+
+
+def main():
+    """Main"""
+    parser = argparse.ArgumentParser(description="End To End tester throughput benchmark (simulated SENSE-O/SiteRM)")
+    parser.add_argument("--pairs", type=intList, default=[4, 16], help="Number of pairs (comma separated)")
+    parser.add_argument("--threads", type=intList, default=[2, 8], help="totalThreads (comma separated)")
+    parser.add_argument("--vlans", type=intList, default=[0], help="VLAN count, 0 - any vlan (comma separated)")
+    parser.add_argument("--profiles", type=lambda val: val.split(","), default=["fast"], help=f"Latency profiles {list(PROFILES)}")
+    parser.add_argument("--timescale", type=float, default=1.0, help="Simulator timescale (multiplier for all delays)")
+    parser.add_argument("--seed", type=int, default=1, help="Simulator random seed")
+    parser.add_argument("--timeout", type=int, default=3600, help="Timeout for one grid point (seconds)")
+    parser.add_argument("--output", default="endtoend-benchmark.json", help="Output JSON file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files")
+    parser.add_argument("--smoke", action="store_true", help="Run one small point (2 pairs, 2 threads, fast profile) and fail if not all pairs finished")
+    parser.add_argument("--point", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.smoke:
+        args.pairs, args.threads, args.vlans, args.profiles = [2], [2], [0], ["fast"]
+        args.timeout = min(args.timeout, 120)
+    if args.point:
+        print(json.dumps(runPoint(json.loads(args.point))))
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+    output = {"commit": gitCommit(), "date": int(time.time()), "python": platform.python_version(),
+              "host": platform.node(), "results": runGrid(args)}
+    with open(args.output, "w", encoding="utf-8") as fd:
+        json.dump(output, fd, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+    if args.smoke and any(item.get("pairs_done") != item["point"]["pairs"] for item in output["results"]):
+        sys.exit("Smoke run did not finish all pairs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""End To End Tester bulk cleanup of leftover SENSE-O instances.
+Title                   : end-to-end-tester
+Author                  : Justas Balcas
+Email                   : jbalcas (at) es.net
+@Copyright              : Copyright (C) 2025 ESnet
+Date                    : 2025/03/14
+"""
+import os
+import sys
+import argparse
+from EndToEndTester.utilities import getToolConfig
+from EndToEndTester.reaper import Reaper, ACTIONS
+from EndToEndTester.tester import TESTERLOCK
+
+
+def getArgs():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Cancel and archive/delete leftover End To End Tester instances")
+    parser.add_argument("--action", choices=ACTIONS, default="cancel",
+                        help="Only cancel, or also archive/delete after cancel (default: cancel)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Concurrent instances (default: config reaperworkers or 10)")
+    parser.add_argument("--search", default=None,
+                        help="Only instances with alias containing this string")
+    parser.add_argument("--dryrun", action="store_true",
+                        help="Only list instances which would be cleaned up")
+    parser.add_argument("--removelocks", action="store_true",
+                        help="Remove lock files of cleaned up instances")
+    parser.add_argument("--force", action="store_true",
+                        help="Run even if tester is running")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = getArgs()
+    logger, yamlconfig = getToolConfig('Tester', '/var/log/EndToEndTester/Reaper.log')
+    if os.path.exists(TESTERLOCK) and not args.force and not args.dryrun:
+        logger.error(f"Tester is running ({TESTERLOCK} exists). Stop it first or use --force")
+        sys.exit(1)
+    try:
+        reaper = Reaper(yamlconfig, logger, action=args.action, workers=args.workers,
+                        search=args.search, dryrun=args.dryrun, removelocks=args.removelocks)
+    except ValueError as ex:
+        logger.error(f"Refusing to run reaper: {ex}")
+        sys.exit(1)
+    results = reaper.run()
+    print(results)
+    sys.exit(1 if results.get("error") or results.get("canceltimeout") else 0)
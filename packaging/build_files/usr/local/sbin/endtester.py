@@ -11,9 +11,8 @@ Date                    : 2025/03/14
 #        and use those results for our reporting. If that fails - keep path created.
 import os
 import sys
-import time
-from EndToEndTester.utilities import getUTCnow, getConfig, getLogger
-from EndToEndTester.tester import main
+from EndToEndTester.utilities import getUTCnow, getToolConfig
+from EndToEndTester.tester import runTester, TESTERLOCK
 
 def createLockFile(lockfile):
     """Create a lock file to prevent multiple instances."""
@@ -37,27 +36,14 @@ def getLockContent(lockfile):
     return ""
 
 if __name__ == '__main__':
-    lockfilepath = "/tmp/endtester.lock"
-    logger = getLogger(name='Tester', logFile='/var/log/EndToEndTester/Tester.log')
-    yamlconfig = getConfig()
-    startimer = getUTCnow()
-    nextRun = 0
-
-    if isLocked(lockfilepath):
-        logger.error(f"Lock file {lockfilepath} exists. Exiting to prevent multiple instances.")
-        logger.error(f"Locked file content: {getLockContent(lockfilepath)}")
+    logger, yamlconfig = getToolConfig('Tester', '/var/log/EndToEndTester/Tester.log')
+    if isLocked(TESTERLOCK):
+        logger.error(f"Lock file {TESTERLOCK} exists. Exiting to prevent multiple instances.")
+        logger.error(f"Locked file content: {getLockContent(TESTERLOCK)}")
         sys.exit(1)
     try:
-        while True:
-            if nextRun <= getUTCnow():
-                logger.info("Timer passed. Running main")
-                nextRun = getUTCnow() + yamlconfig['runInterval']
-                main(yamlconfig, startimer, nextRun)
-            else:
-                logger.info(f"Sleeping for {yamlconfig['sleepbetweenruns']} seconds. Timer not passed")
-                logger.info(f"Next run: {nextRun}. Current time: {getUTCnow()}. Difference: {nextRun - getUTCnow()}")
-                time.sleep(yamlconfig['sleepbetweenruns'])
+        runTester(yamlconfig, logger)
     except Exception as ex:
         logger.error(f'Got fatal exception: {ex}')
     finally:
-        removeLockFile(lockfilepath)
+        removeLockFile(TESTERLOCK)
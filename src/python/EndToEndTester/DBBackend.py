@@ -7,6 +7,8 @@ Email                   : jbalcas (at) es.net
 Date                    : 2025/03/14
 """
 import os
+import queue
+import threading
 from contextlib import contextmanager
 from datetime import datetime, timezone
 import mariadb  # type: ignore
@@ -31,6 +33,87 @@ def loadEnv(envFile='/etc/endtoend-mariadb'):
                 os.environ[key] = val
 
 
+class ConnectionPool():
+    """Pool of persistent database connections. Connection is health checked
+    (ping) on checkout and reconnected if it is broken."""
+    def __init__(self, size, timeout, **connargs):
+        self.size = size
+        self.timeout = timeout
+        self.connargs = connargs
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+
+    def _connect(self):
+        """Open new connection"""
+        return mariadb.connect(**self.connargs)
+
+    @staticmethod
+    def _close(conn):
+        """Close connection (ignore errors of broken connection)"""
+        try:
+            conn.close()
+        except mariadb.Error:
+            pass
+
+    def acquire(self):
+        """Checkout healthy connection (wait up to timeout if all connections are in use)"""
+        if not self.slots.acquire(timeout=self.timeout):  # pylint: disable=consider-using-with
+            raise TimeoutError(f"No free database connection in pool (size {self.size}) "
+                               f"after {self.timeout} seconds")
+        try:
+            while True:
+                try:
+                    conn = self.idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                try:
+                    conn.ping()
+                    return conn
+                except mariadb.Error as ex:
+                    print(f"Pooled database connection is broken, reconnecting: {ex}")
+                    self._close(conn)
+        except Exception:
+            self.slots.release()
+            raise
+
+    def release(self, conn, broken=False):
+        """Return connection to pool (broken connection is closed)"""
+        try:
+            if not broken:
+                try:
+                    if not conn.autocommit:
+                        # Drop anything left uncommitted, like closed connection would
+                        conn.rollback()
+                    self.idle.put(conn)
+                    return
+                except mariadb.Error:
+                    pass
+            self._close(conn)
+        finally:
+            self.slots.release()
+
+    def closeAll(self):
+        """Close all idle connections"""
+        while True:
+            try:
+                self._close(self.idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+_POOLS = {}
+_POOLLOCK = threading.Lock()
+
+
+def getConnectionPool(size, timeout, **connargs):
+    """Get process wide connection pool for database (new one in forked child)"""
+    key = (os.getpid(),) + tuple(sorted(connargs.items()))
+    with _POOLLOCK:
+        if key not in _POOLS:
+            _POOLS[key] = ConnectionPool(size, timeout, **connargs)
+        return _POOLS[key]
+
+
 class DBBackend():
     """Database Backend class."""
     def __init__(self):
@@ -41,37 +124,83 @@ class DBBackend():
         self.mport = int(os.getenv('MARIA_DB_PORT', '3306'))
         self.mdb = os.getenv('MARIA_DB_DATABASE', 'endtoend')
         self.autocommit = os.getenv('MARIA_DB_AUTOCOMMIT', 'True') in ['True', 'true', '1']
+        self.pool = getConnectionPool(int(os.getenv('MARIA_DB_POOLSIZE', '4')),
+                                      int(os.getenv('MARIA_DB_POOLTIMEOUT', '60')),
+                                      user=self.muser, password=self.mpass, host=self.mhost,
+                                      port=self.mport, database=self.mdb,
+                                      autocommit=self.autocommit)
+        # Connection of open transaction (per thread)
+        self.local = threading.local()
 
     def __enter__(self):
         """Enter the runtime context related to this object."""
         self.checkdbconnection()
         return self
 
+    def _txconn(self):
+        """Connection of transaction open in this thread (None if not in transaction)"""
+        return getattr(self.local, 'conn', None)
+
+    @contextmanager
+    def transaction(self):
+        """All calls of this thread inside block run in one transaction.
+        Commit at the end of block, rollback (and re-raise) on failure."""
+        if self._txconn():
+            # Nested - part of outer transaction
+            yield self
+            return
+        conn = self.pool.acquire()
+        broken = False
+        self.local.conn = conn
+        try:
+            conn.autocommit = False
+            yield self
+            conn.commit()
+        except Exception as ex:
+            broken = isinstance(ex, (mariadb.InterfaceError, mariadb.OperationalError))
+            if not broken:
+                conn.rollback()
+            raise
+        finally:
+            self.local.conn = None
+            if not broken:
+                try:
+                    conn.autocommit = self.autocommit
+                except mariadb.Error:
+                    broken = True
+            self.pool.release(conn, broken)
+
     @contextmanager
     def get_connection(self):
-        """Open connection and cursor."""
-        conn = None
+        """Checkout pooled connection and open cursor (or use connection of open transaction)."""
+        txconn = self._txconn()
+        if txconn:
+            cursor = txconn.cursor()
+            try:
+                yield txconn, cursor
+            finally:
+                cursor.close()
+            return
+        conn = self.pool.acquire()
         cursor = None
+        broken = False
         try:
-            conn = mariadb.connect(user=self.muser,
-                                   password=self.mpass,
-                                   host=self.mhost,
-                                   port=self.mport,
-                                   database=self.mdb,
-                                   autocommit=self.autocommit)
             cursor = conn.cursor()
             yield conn, cursor
         except Exception as e:
-            print(f"Error establishing database connection: {e}")
+            print(f"Error in database connection: {e}")
+            # Connection lost - do not return it to pool
+            broken = isinstance(e, (mariadb.InterfaceError, mariadb.OperationalError))
             raise e
         finally:
-            if conn:
-                conn.close()
-
+            if cursor and not broken:
+                cursor.close()
+            self.pool.release(conn, broken)
 
     def checkdbconnection(self, retry=True):
         """
-        Check if the database connection is alive.
+        Check if the database connection is alive (connections are also
+        health checked by pool on checkout).
         """
         try:
             with self.get_connection() as (_conn, cursor):
@@ -115,7 +244,6 @@ class DBBackend():
 
     def execute_get(self, query):
         """GET Execution."""
-        self.checkdbconnection()
         alldata = []
         colname = []
         with self.get_connection() as (_conn, cursor):
@@ -128,16 +256,21 @@ class DBBackend():
         return 'OK', colname, alldata
 
     def execute_ins(self, query, values):
-        """INSERT Execute."""
-        self.checkdbconnection()
+        """INSERT Execute. Multiple rows are sent in one batch (executemany)."""
         lastID = -1
         with self.get_connection() as (conn, cursor):
             try:
-                for item in values:
-                    cursor.execute(query, item)
-                    lastID = cursor.lastrowid
+                if len(values) > 1:
+                    cursor.executemany(query, values)
+                else:
+                    for item in values:
+                        cursor.execute(query, item)
+                lastID = cursor.lastrowid
             except mariadb.Error as ex:
                 print(f'MariaDBError. Ex: {ex}')
+                if self._txconn():
+                    # Whole transaction is rolled back
+                    raise ex
                 conn.rollback()
             except Exception as ex:
                 print(f'Got Exception {ex} ')
@@ -147,7 +280,6 @@ class DBBackend():
 
     def execute_del(self, query, values):
         """DELETE Execute."""
-        self.checkdbconnection()
         del values
         with self.get_connection() as (conn, cursor):
             try:
@@ -160,7 +292,6 @@ class DBBackend():
 
     def execute(self, query):
         """Execute query."""
-        self.checkdbconnection()
         with self.get_connection() as (conn, cursor):
             try:
                 cursor.execute(query)
@@ -183,6 +314,10 @@ class dbinterface():
         """Create Database."""
         self.db.createdb()
 
+    def transaction(self):
+        """One transaction for all calls inside with block (see DBBackend.transaction)."""
+        return self.db.transaction()
+
     def _setStartCallTime(self, calltype):
         """Set Call Start timer."""
         del calltype
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# pylint: disable=line-too-long
+"""SENSE-O and SiteRM API client factory. Returns real API clients or
+simulated ones (see EndToEndTester.simulator) if simulator is enabled in config.
+
+Real clients share one process wide request wrapper per service (SENSE-O, SiteRM),
+so keep-alive connections, TLS sessions and auth tokens are reused by all workers.
+API objects themselves are not shared (si_uuid is kept per API object).
+Title                   : end-to-end-tester
+Author                  : Justas Balcas
+Email                   : jbalcas (at) es.net
+@Copyright              : Copyright (C) 2025 ESnet
+Date                    : 2025/03/14
+"""
+import time
+import threading
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from sense.common import getHTTPTimeout
+from sense.client.requestwrapper import RequestWrapper
+from sense.client.siterm.requestwrapper import RequestWrapper as SiteRMRequestWrapper
+from sense.client.workflow_combined_api import WorkflowCombinedApi
+from sense.client.workflow_phased_api import WorkflowPhasedApi
+from sense.client.discover_api import DiscoverApi
+from sense.client.siterm.debug_api import DebugApi
+from EndToEndTester.simulator import simulatorEnabled, getOrchestrator
+from EndToEndTester.simulator import SimWorkflowCombinedApi, SimWorkflowPhasedApi, SimDiscoverApi, SimDebugApi
+
+
+class PooledRequestWrapper(RequestWrapper):
+    """SENSE-O request wrapper shared by all workers. Uses one requests.Session
+    (connection pool), per call headers (content/accept type is not shared
+    between threads) and refreshes the token only once if many calls get 401."""
+
+    def __init__(self, config=None, noauth=False, poolsize=20):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=poolsize, pool_maxsize=poolsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.local = threading.local()
+        self.authlock = threading.Lock()
+        super().__init__(config, noauth=noauth)
+
+    def _callHeaders(self):
+        """Headers for this call (thread local content and accept type)"""
+        headers = dict(self.config["headers"])
+        headers["Content-type"] = f"application/{getattr(self.local, 'content', 'json')}"
+        headers["Accept"] = f"application/{getattr(self.local, 'accept', 'json')}"
+        return headers
+
+    def _send(self, method, api_path, params, data=None):
+        """Send request via shared session. Refresh token on 401 (once for all threads)"""
+        url = self.config["REST_API"] + api_path
+        headers = self._callHeaders()
+        out = self.session.request(method, url, headers=headers, verify=self.config["verify"],
+                                   data=data, params=params, timeout=getHTTPTimeout())
+        if out.status_code == 401 and not self.noauth:
+            with self.authlock:
+                # Other thread might have refreshed it already
+                if self.config["headers"].get("Authorization") == headers.get("Authorization"):
+                    self._refreshToken()
+            out = self.session.request(method, url, headers=self._callHeaders(), verify=self.config["verify"],
+                                       data=data, params=params, timeout=getHTTPTimeout())
+        return out
+
+    def _get(self, api_path, params):
+        return self._send("GET", api_path, params)
+
+    def _put(self, api_path, data, params):
+        return self._send("PUT", api_path, params, data)
+
+    def _post(self, api_path, data, params):
+        return self._send("POST", api_path, params, data)
+
+    def _delete(self, api_path, params):
+        return self._send("DELETE", api_path, params)
+
+    def request(self, call_type, api_path, **kwargs):
+        """Request (content/accept type is per call and not stored in shared config)"""
+        self.local.content = kwargs.pop("content_type", "json")
+        self.local.accept = kwargs.pop("accept_type", "json")
+        try:
+            return super().request(call_type, api_path, **kwargs)
+        finally:
+            self.local.content = "json"
+            self.local.accept = "json"
+
+
+class PooledSiteRMRequestWrapper(SiteRMRequestWrapper):
+    """SiteRM request wrapper shared by all workers. rm-configs and site capabilities
+    are loaded once, tokens are shared and httpx clients are kept open (per cert).
+    Auth is resolved under per site lock, so unreachable site does not block others.
+    Failed capability probes are cached for probefailurettl seconds."""
+
+    def __init__(self, poolsize=20, probefailurettl=300):
+        self.poolsize = poolsize
+        self.probefailurettl = probefailurettl
+        self.probefailures = {}
+        self.clients = {}
+        self.clientlock = threading.Lock()
+        self.authlocks = {}
+        self.authlockslock = threading.Lock()
+        self.savelock = threading.Lock()
+        super().__init__()
+
+    def _getAuthLock(self, sitename):
+        """Get auth lock of site"""
+        with self.authlockslock:
+            return self.authlocks.setdefault(sitename, threading.Lock())
+
+    def _probeSiteCapabilities(self, sitename):
+        """Probe site capabilities. Failure is cached, so unreachable site is not probed on every call"""
+        failure = self.probefailures.get(sitename)
+        if failure and time.time() < failure[0]:
+            raise Exception(f"Site {sitename} capabilities probe failed recently (retry in {int(failure[0] - time.time())}s): {failure[1]}")
+        try:
+            caps = super()._probeSiteCapabilities(sitename)
+        except Exception as ex:
+            self.probefailures[sitename] = (time.time() + self.probefailurettl, ex)
+            raise
+        self.probefailures.pop(sitename, None)
+        return caps
+
+    def _saveTokenCache(self):
+        """Save token cache (tokens of different sites are stored concurrently)"""
+        with self.savelock:
+            super()._saveTokenCache()
+
+    def _getClient(self, cert):
+        """Get shared httpx client for cert"""
+        with self.clientlock:
+            if cert not in self.clients:
+                limits = httpx.Limits(max_connections=self.poolsize, max_keepalive_connections=self.poolsize)
+                self.clients[cert] = httpx.Client(timeout=getHTTPTimeout(), verify=self.config["SITERM_VERIFY"],
+                                                  cert=cert, limits=limits)
+            return self.clients[cert]
+
+    def makeRequest(self, sitename, url, **kwargs):
+        """Make HTTP Request via shared client"""
+        verb = kwargs.get("verb")
+        if verb not in {"GET", "POST", "PUT"}:
+            raise Exception("Invalid verb")
+        # Capabilities probe and token fetch only once per site, even if many workers call it at the same time
+        with self._getAuthLock(sitename):
+            authcfg = self._resolveAuthConfig(sitename)
+            headers = {}
+            cert = None
+            if authcfg["method"] == "token":
+                headers["Authorization"] = f"Bearer {authcfg['access_token']}"
+            elif authcfg["method"] in {"m2m", "userpass"}:
+                headers["Authorization"] = f"Bearer {self._getAccessToken(sitename, authcfg)}"
+            elif authcfg["method"] == "cert":
+                cert = (authcfg["cert"], authcfg["key"])
+        fullurl = f"{self._getBaseUrl(sitename)}/{url.lstrip('/')}"
+        resp = self._getClient(cert).request(verb, fullurl, json=kwargs.get("data"),
+                                             params=kwargs.get("urlparams"), headers=headers)
+        try:
+            return resp.json(), resp.is_success, resp
+        except Exception:
+            return resp.text, resp.is_success, resp
+
+
+class PooledDebugApi(DebugApi):
+    """DebugApi using shared SiteRM request wrapper"""
+
+    # pylint: disable=super-init-not-called
+    def __init__(self, client):
+        self.client = client
+
+
+_CLIENTS = {}
+_CLIENTLOCK = threading.Lock()
+
+
+def _poolSize(config):
+    """Connection pool size (default: enough for all worker threads)"""
+    return int(config.get("httppoolsize", max(10, 2 * int(config.get("totalThreads", 1)))))
+
+
+def getSenseClient(config):
+    """Get process wide SENSE-O request wrapper"""
+    with _CLIENTLOCK:
+        if "sense" not in _CLIENTS:
+            _CLIENTS["sense"] = PooledRequestWrapper(poolsize=_poolSize(config))
+        return _CLIENTS["sense"]
+
+
+def getSiteRMClient(config):
+    """Get process wide SiteRM request wrapper"""
+    with _CLIENTLOCK:
+        if "siterm" not in _CLIENTS:
+            _CLIENTS["siterm"] = PooledSiteRMRequestWrapper(poolsize=_poolSize(config),
+                                                            probefailurettl=int(config.get("probefailurettl", 300)))
+        return _CLIENTS["siterm"]
+
+
+def getWorkflowCombinedApi(config):
+    """Get WorkflowCombinedApi client"""
+    if simulatorEnabled(config):
+        return SimWorkflowCombinedApi(getOrchestrator(config))
+    return WorkflowCombinedApi(req_wrapper=getSenseClient(config))
+
+
+def getWorkflowPhasedApi(config):
+    """Get WorkflowPhasedApi client"""
+    if simulatorEnabled(config):
+        return SimWorkflowPhasedApi(getOrchestrator(config))
+    return WorkflowPhasedApi(req_wrapper=getSenseClient(config))
+
+
+def getDiscoverApi(config):
+    """Get DiscoverApi client"""
+    if simulatorEnabled(config):
+        return SimDiscoverApi(getOrchestrator(config))
+    return DiscoverApi(req_wrapper=getSenseClient(config))
+
+
+def getDebugApi(config):
+    """Get SiteRM DebugApi client"""
+    if simulatorEnabled(config):
+        return SimDebugApi(getOrchestrator(config))
+    return PooledDebugApi(getSiteRMClient(config))
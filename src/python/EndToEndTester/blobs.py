@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# pylint: disable=line-too-long
+"""Blob spilling for lifecycle responses. Large parts of response (manifests,
+validation output, ping output) are written to per-lifecycle blob directory
+(workdir/blobs/<blobdir>/<sha256>) and replaced by reference:
+    {"blobref": "<sha256>", "size": <bytes>}
+Recorder resolves references when it loads result file.
+Title                   : end-to-end-tester
+Author                  : Justas Balcas
+Email                   : jbalcas (at) es.net
+@Copyright              : Copyright (C) 2025 ESnet
+Date                    : 2025/03/14
+"""
+import os
+import json
+import shutil
+import hashlib
+from EndToEndTester.utilities import dumpFileJson, loadFileJson, checkCreateDir
+
+BLOBSDIR = "blobs"
+
+
+def isBlobRef(value):
+    """Check if value is blob reference"""
+    return isinstance(value, dict) and len(value) == 2 and "blobref" in value and "size" in value
+
+
+class BlobStore:
+    """Per-lifecycle blob store"""
+
+    def __init__(self, workdir, blobdir, threshold=65536, compression=None):
+        self.blobdir = blobdir
+        self.path = os.path.join(workdir, BLOBSDIR, blobdir)
+        self.threshold = threshold
+        self.compression = compression
+
+    def _write(self, value, content):
+        """Write blob (content addressed, written once)"""
+        digest = hashlib.sha256(content).hexdigest()
+        fname = os.path.join(self.path, digest)
+        if not os.path.exists(fname):
+            checkCreateDir(self.path)
+            dumpFileJson(fname, value, self.compression)
+        return {"blobref": digest, "size": len(content)}
+
+    def spill(self, value):
+        """Replace parts of value larger than threshold with blob references.
+        Children are spilled first; container still over threshold is spilled as whole."""
+        if not self.threshold or isBlobRef(value):
+            return value
+        content = json.dumps(value).encode("utf-8")
+        if len(content) <= self.threshold:
+            return value
+        if isinstance(value, dict):
+            value = {key: self.spill(val) for key, val in value.items()}
+        elif isinstance(value, list):
+            value = [self.spill(val) for val in value]
+        else:
+            return self._write(value, content)
+        content = json.dumps(value).encode("utf-8")
+        if len(content) <= self.threshold:
+            return value
+        return self._write(value, content)
+
+
+def resolveBlobs(value, blobdirs):
+    """Replace blob references with blob content (looked up in blobdirs)"""
+    if isBlobRef(value):
+        for blobdir in blobdirs:
+            fname = os.path.join(blobdir, value["blobref"])
+            if os.path.isfile(fname):
+                return resolveBlobs(loadFileJson(fname), blobdirs)
+        raise ValueError(f"Blob {value['blobref']} not found in {blobdirs}")
+    if isinstance(value, dict):
+        return {key: resolveBlobs(val, blobdirs) for key, val in value.items()}
+    if isinstance(value, list):
+        return [resolveBlobs(val, blobdirs) for val in value]
+    return value
+
+
+def getBlobDirs(workdir, filename, blobdir):
+    """Candidate blob directories for result file (workdir, or next to archived file)"""
+    return [os.path.join(workdir, BLOBSDIR, blobdir),
+            os.path.join(os.path.dirname(filename), BLOBSDIR, blobdir)]
+
+
+def moveBlobs(workdir, blobdir, newdir):
+    """Move lifecycle blob directory next to archived result file"""
+    srcdir = os.path.join(workdir, BLOBSDIR, blobdir)
+    if not blobdir or not os.path.isdir(srcdir):
+        return
+    dstdir = os.path.join(newdir, BLOBSDIR)
+    checkCreateDir(dstdir)
+    shutil.move(srcdir, os.path.join(dstdir, blobdir))
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# pylint: disable=line-too-long
+"""Shared configuration cache. Fetches remote configuration conditionally
+(ETag/If-Modified-Since), keeps last known good copy on disk and notifies
+subscribers about changed entries/mappings.
+Title                   : end-to-end-tester
+Author                  : Justas Balcas
+Email                   : jbalcas (at) es.net
+@Copyright              : Copyright (C) 2025 ESnet
+Date                    : 2025/03/14
+"""
+import os
+import time
+import json
+import hashlib
+import threading
+import requests
+from EndToEndTester.utilities import loadYaml, getUTCnow, checkCreateDir
+
+# Keys tester and recorder can not run without
+REQUIREDKEYS = ["workdir", "runInterval", "sleepbetweenruns"]
+
+
+def diffConfig(oldconfig, newconfig):
+    """Identify what changed between two configs. Returns dict with added/removed/changed
+    entries and mappings, and list of other top level keys changed"""
+    oldconfig = oldconfig or {}
+    newconfig = newconfig or {}
+    changes = {}
+    for key in ["entries", "mappings"]:
+        oldvals = oldconfig.get(key) or {}
+        newvals = newconfig.get(key) or {}
+        changes[key] = {
+            "added": sorted(set(newvals) - set(oldvals)),
+            "removed": sorted(set(oldvals) - set(newvals)),
+            "changed": sorted(
+                item for item in set(oldvals) & set(newvals)
+                if oldvals[item] != newvals[item]
+            ),
+        }
+    changes["other"] = sorted(
+        key for key in set(oldconfig) | set(newconfig)
+        if key not in ["entries", "mappings"] and oldconfig.get(key) != newconfig.get(key)
+    )
+    return changes
+
+
+def configError(config):
+    """Reason why parsed config can not be used (empty string if config is valid)"""
+    if not config or not isinstance(config, dict):
+        return "config is empty or not parsable"
+    missing = [key for key in REQUIREDKEYS if key not in config]
+    if missing:
+        return f"config is missing required keys {missing}"
+    return ""
+
+
+def hasChanges(changes):
+    """Check if diffConfig output has any change"""
+    if changes.get("other"):
+        return True
+    for key in ["entries", "mappings"]:
+        if any(changes.get(key, {}).values()):
+            return True
+    return False
+
+
+class ConfigCache:
+    """Config cache - conditional fetch of remote config with last known good copy on disk"""
+
+    def __init__(self, location, cachedir, logger=None, **kwargs):
+        self.location = location
+        self.cachedir = cachedir
+        self.logger = logger
+        self.retries = kwargs.get("retries", 3)
+        self.sleeptime = kwargs.get("sleep_time", 30)
+        self.timeout = kwargs.get("timeout", 60)
+        self.contentfile = os.path.join(cachedir, "endtoend-config.yaml")
+        self.metafile = os.path.join(cachedir, "endtoend-config.meta")
+        self.config = {}
+        self.checksum = ""
+        self.lastfetch = 0
+        self.subscribers = []
+        self.lock = threading.Lock()
+
+    def _log(self, level, msg):
+        """Log message (or print if no logger)"""
+        if self.logger:
+            getattr(self.logger, level)(msg)
+        else:
+            print(msg)
+
+    def subscribe(self, callback):
+        """Subscribe for config changes. Callback is called with (changes, newconfig)"""
+        if callback not in self.subscribers:
+            self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """Unsubscribe from config changes"""
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def _loadMeta(self):
+        """Load cache metadata (etag, last-modified, checksum)"""
+        if not os.path.isfile(self.metafile):
+            return {}
+        try:
+            with open(self.metafile, "r", encoding="utf-8") as fd:
+                return json.load(fd)
+        except (OSError, json.JSONDecodeError) as ex:
+            self._log("warning", f"Failed to load config cache metadata: {ex}")
+        return {}
+
+    def _loadContent(self):
+        """Load last known good config content from disk"""
+        if not os.path.isfile(self.contentfile):
+            return None
+        with open(self.contentfile, "r", encoding="utf-8") as fd:
+            return fd.read()
+
+    def _writeAtomic(self, fname, content):
+        """Write file via temporary file and atomic rename"""
+        checkCreateDir(self.cachedir)
+        tmpname = f"{fname}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmpname, "w", encoding="utf-8") as fd:
+            fd.write(content)
+        os.replace(tmpname, fname)
+
+    def _storeContent(self, content, headers):
+        """Store new content as last known good copy"""
+        meta = {
+            "etag": headers.get("ETag", ""),
+            "lastmodified": headers.get("Last-Modified", ""),
+            "checksum": hashlib.sha256(content.encode("utf-8")).hexdigest(),
+            "fetched": getUTCnow(),
+            "location": self.location,
+        }
+        self._writeAtomic(self.contentfile, content)
+        self._writeAtomic(self.metafile, json.dumps(meta))
+
+    def _fetchRemote(self):
+        """Fetch remote config conditionally. Returns content or None if not modified/failed"""
+        meta = self._loadMeta()
+        headers = {}
+        havecopy = os.path.isfile(self.contentfile) and meta.get("location") == self.location
+        if havecopy and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if havecopy and meta.get("lastmodified"):
+            headers["If-Modified-Since"] = meta["lastmodified"]
+        # If we have last known good copy - no need to block on retries
+        retries = 1 if havecopy else self.retries
+        for attempt in range(1, retries + 1):
+            try:
+                response = requests.get(self.location, headers=headers, timeout=self.timeout)
+                if response.status_code == 304:
+                    self._log("debug", f"Remote config {self.location} not modified")
+                    return None
+                if response.status_code == 200:
+                    error = configError(loadYaml(response.text))
+                    if not error:
+                        self._storeContent(response.text, response.headers)
+                        return response.text
+                    # Do not overwrite last known good copy (and its validators) with broken config
+                    self._log("error", f"Attempt {attempt}: Remote config {self.location} rejected - {error}")
+                else:
+                    self._log("error", f"Attempt {attempt}: Failed to fetch config with status code {response.status_code}")
+            except requests.RequestException as ex:
+                self._log("error", f"Attempt {attempt}: Exception occurred fetching config - {ex}")
+            if attempt < retries:
+                self._log("info", f"Retrying in {self.sleeptime} seconds...")
+                time.sleep(self.sleeptime)
+        if not havecopy:
+            raise Exception(f"Failed to fetch remote config {self.location} and no last known good copy available.")
+        self._log("warning", f"Failed to fetch remote config {self.location}. Using last known good copy.")
+        return None
+
+    def _fetchLocal(self):
+        """Read local config file"""
+        with open(self.location, "r", encoding="utf-8") as fd:
+            return fd.read()
+
+    def refresh(self):
+        """Refresh config (remote or local). YAML is parsed only if content changed.
+        Subscribers are notified with changes. Returns current config"""
+        with self.lock:
+            if self.location.startswith(("http://", "https://")):
+                content = self._fetchRemote()
+                if content is None:
+                    content = self._loadContent()
+            else:
+                content = self._fetchLocal()
+            self.lastfetch = getUTCnow()
+            if content is None:
+                return self.config
+            checksum = hashlib.sha256(content.encode("utf-8")).hexdigest()
+            if checksum == self.checksum:
+                return self.config
+            newconfig = loadYaml(content)
+            error = configError(newconfig)
+            if error:
+                self._log("error", f"Config from {self.location} rejected - {error}. Keeping previous config.")
+                return self.config
+            changes = diffConfig(self.config, newconfig)
+            firstload = not self.checksum
+            self.config = newconfig
+            self.checksum = checksum
+        if not firstload and hasChanges(changes):
+            self._log("info", f"Config {self.location} changed: {changes}")
+            for callback in self.subscribers:
+                try:
+                    callback(changes, newconfig)
+                except Exception as ex:
+                    self._log("error", f"Config subscriber {callback} failed: {ex}")
+        return newconfig
+
+
+_CACHES = {}
+_CACHELOCK = threading.Lock()
+
+
+def getConfigCache(config, logger=None):
+    """Get process wide config cache for config location (remote configlocation or local file) and cache directory"""
+    location = config.get("configlocation") or "/etc/endtoend.yaml"
+    cachedir = config.get("configcachedir", config.get("workdir", "/tmp"))
+    with _CACHELOCK:
+        if (location, cachedir) not in _CACHES:
+            _CACHES[(location, cachedir)] = ConfigCache(location, cachedir, logger)
+        return _CACHES[(location, cachedir)]
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# pylint: disable=line-too-long
+"""Pause/Resume control for End To End tester. Workers block on it and
+resume as soon as flag is removed (inotify on workdir, polling fallback).
+Title                   : end-to-end-tester
+Author                  : Justas Balcas
+Email                   : jbalcas (at) es.net
+@Copyright              : Copyright (C) 2025 ESnet
+Date                    : 2025/03/14
+"""
+import os
+import time
+import threading
+from EndToEndTester.utilities import checkCreateDir
+from EndToEndTester.fswatch import InotifyWatcher, inotifyAvailable
+from EndToEndTester.fswatch import IN_CLOSE_WRITE, IN_CREATE, IN_DELETE, IN_MOVED_FROM, IN_MOVED_TO, IN_ATTRIB
+
+PAUSEFLAG = "pause-endtoend-testing"
+PAUSETARGETS = "pause-endtoend-testing.targets"
+
+
+class PauseControl:
+    """Pause control.
+    Global pause: file <workdir>/pause-endtoend-testing exists.
+    Targeted pause: file <workdir>/pause-endtoend-testing.targets, one entry per line:
+        site name (e.g. T2_US_SDSC), endpoint urn, or pair of urns separated by whitespace."""
+
+    def __init__(self, workdir, logger=None, pollinterval=30):
+        self.workdir = workdir
+        self.logger = logger
+        self.pollinterval = pollinterval
+        self.flagfile = os.path.join(workdir, PAUSEFLAG)
+        self.targetsfile = os.path.join(workdir, PAUSETARGETS)
+        self.cond = threading.Condition()
+        self.globalpause = False
+        self.targets = set()
+        self.version = 0
+        self.watcher = None
+        checkCreateDir(workdir)
+        self.reload()
+        self._startWatcher()
+
+    def _log(self, msg):
+        """Log info message"""
+        if self.logger:
+            self.logger.info(msg)
+
+    def _startWatcher(self):
+        """Start inotify watcher (or polling thread if inotify is not available)"""
+        if inotifyAvailable():
+            try:
+                checkCreateDir(self.workdir)
+                mask = IN_CLOSE_WRITE | IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ATTRIB
+                self.watcher = InotifyWatcher(self.workdir, mask, self._event, self.logger, onexit=self._watchLost).start()
+                return
+            except OSError as ex:
+                self._log(f"Failed to start inotify watcher on {self.workdir}: {ex}. Will use polling")
+        threading.Thread(target=self._poll, name="pausecontrol-poll", daemon=True).start()
+
+    def _watchLost(self):
+        """Workdir was removed or replaced - reload state and watch again (or fall back to polling)"""
+        self._log(f"Pause control lost inotify watch on {self.workdir}. Watching again")
+        self.reload()
+        self._startWatcher()
+
+    def _event(self, name, _mask):
+        """inotify event callback"""
+        if name is None or name.startswith(PAUSEFLAG):
+            self.reload()
+
+    def _poll(self):
+        """Polling fallback"""
+        while True:
+            time.sleep(self.pollinterval)
+            self.reload()
+
+    def _readTargets(self):
+        """Read targeted pause file"""
+        targets = set()
+        if not os.path.isfile(self.targetsfile):
+            return targets
+        try:
+            with open(self.targetsfile, "r", encoding="utf-8") as fd:
+                for line in fd:
+                    line = line.split("#", 1)[0].strip()
+                    if not line:
+                        continue
+                    items = line.split()
+                    targets.add(frozenset(items) if len(items) == 2 else items[0])
+        except OSError as ex:
+            self._log(f"Failed to read pause targets file {self.targetsfile}: {ex}")
+        return targets
+
+    def reload(self):
+        """Reload pause state from disk and wake up all waiters if it changed"""
+        globalpause = os.path.isfile(self.flagfile)
+        targets = self._readTargets()
+        with self.cond:
+            if globalpause == self.globalpause and targets == self.targets:
+                return
+            self.globalpause = globalpause
+            self.targets = targets
+            self.version += 1
+            self.cond.notify_all()
+        self._log(f"Pause state changed. Global pause: {globalpause}. Paused targets: {targets}")
+
+    def _paused(self, pair, sites):
+        """Check pause state (must be called with condition lock held)"""
+        if self.globalpause:
+            return True
+        if not pair or not self.targets:
+            return False
+        if frozenset(pair) in self.targets:
+            return True
+        return any(item in self.targets for item in list(pair) + list(sites or []))
+
+    def isPaused(self, pair=None, sites=None):
+        """Check if testing is paused globally, or for pair/sites"""
+        with self.cond:
+            return self._paused(pair, sites)
+
+    def waitResumed(self, pair=None, sites=None, timeout=None):
+        """Block until testing is resumed (globally, or for pair/sites). Returns True if not paused"""
+        with self.cond:
+            return self.cond.wait_for(lambda: not self._paused(pair, sites), timeout)
+
+    def waitChange(self, timeout=None):
+        """Block until pause state changes. Returns True if changed"""
+        with self.cond:
+            version = self.version
+            return self.cond.wait_for(lambda: self.version != version, timeout)
+
+
+_CONTROLS = {}
+_CONTROLLOCK = threading.Lock()
+
+
+def getPauseControl(workdir, logger=None):
+    """Get process wide pause control for workdir"""
+    with _CONTROLLOCK:
+        if workdir not in _CONTROLS:
+            _CONTROLS[workdir] = PauseControl(workdir, logger)
+        return _CONTROLS[workdir]
@@ -7,6 +7,8 @@ Email                   : jbalcas (at) es.net
 @Copyright              : Copyright (C) 2025 ESnet
 Date                    : 2025/03/14
 """
+import hashlib
+
 # CREATE TABLES
 create_requests = """CREATE TABLE IF NOT EXISTS requests (
     id SERIAL PRIMARY KEY,
@@ -32,7 +34,8 @@ create_actions = """CREATE TABLE IF NOT EXISTS actions (
     site1 VARCHAR(64) NOT NULL,
     site2 VARCHAR(64) NOT NULL,
     insertdate TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updatedate TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    updatedate TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE(uuid, action)
 );"""
 create_verification = """CREATE TABLE IF NOT EXISTS verification (
     id SERIAL PRIMARY KEY,
@@ -45,7 +48,9 @@ create_verification = """CREATE TABLE IF NOT EXISTS verification (
     urn VARCHAR(4096) NOT NULL,
     verified INTEGER NOT NULL CHECK (verified IN (0,1)),
     insertdate TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updatedate TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    updatedate TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    rowhash CHAR(40) NOT NULL,
+    UNIQUE(rowhash)
 );"""
 create_requeststates = """CREATE TABLE IF NOT EXISTS requeststates (
     id SERIAL PRIMARY KEY,
@@ -59,7 +64,9 @@ create_requeststates = """CREATE TABLE IF NOT EXISTS requeststates (
     sincestart INTEGER NOT NULL,
     entertime TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     insertdate TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updatedate TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    updatedate TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    rowhash CHAR(40) NOT NULL,
+    UNIQUE(rowhash)
 );"""
 
 
@@ -115,7 +122,41 @@ create_pingresults = """CREATE TABLE IF NOT EXISTS pingresults (
     rttmin FLOAT NOT NULL,
     rttavg FLOAT NOT NULL,
     rttmax FLOAT NOT NULL,
-    rttmdev FLOAT NOT NULL
+    rttmdev FLOAT NOT NULL,
+    samples INTEGER NOT NULL DEFAULT 0,
+    seqgaps INTEGER NOT NULL DEFAULT 0,
+    reordered INTEGER NOT NULL DEFAULT 0,
+    duplicates INTEGER NOT NULL DEFAULT 0,
+    rttp50 FLOAT NOT NULL DEFAULT 0,
+    rttp95 FLOAT NOT NULL DEFAULT 0,
+    rttp99 FLOAT NOT NULL DEFAULT 0,
+    rtthist VARCHAR(255) NOT NULL DEFAULT '',
+    rowhash CHAR(40) NOT NULL,
+    UNIQUE(rowhash)
+);"""
+
+create_throughputresults = """CREATE TABLE IF NOT EXISTS throughputresults (
+    id SERIAL PRIMARY KEY,
+    uuid VARCHAR(255) NOT NULL,
+    site1 VARCHAR(64) NOT NULL,
+    site2 VARCHAR(64) NOT NULL,
+    action VARCHAR(255) NOT NULL,
+    port1 VARCHAR(255) NOT NULL,
+    port2 VARCHAR(255) NOT NULL,
+    hostfrom VARCHAR(255) NOT NULL,
+    hostto VARCHAR(255) NOT NULL,
+    ipfrom VARCHAR(255) NOT NULL,
+    ipto VARCHAR(255) NOT NULL,
+    vlanfrom VARCHAR(17) NOT NULL,
+    vlanto VARCHAR(17) NOT NULL,
+    insertdate TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updatedate TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    failed INTEGER NOT NULL CHECK (failed IN (0,1)),
+    requested FLOAT NOT NULL,
+    achieved FLOAT NOT NULL,
+    ratio FLOAT NOT NULL,
+    rowhash CHAR(40) NOT NULL,
+    UNIQUE(rowhash)
 );"""
 
 create_stateorder = """CREATE TABLE IF NOT EXISTS stateorder (
@@ -128,19 +169,28 @@ create_stateorder = """CREATE TABLE IF NOT EXISTS stateorder (
 
 # INSERT INTO TABLES
 insert_requests = """INSERT INTO requests (uuid, port1, port2, finalstate, pathfindissue, vlan, requesttype, insertdate, updatedate, fileloc, site1, site2, failure)
-VALUES (%(uuid)s, %(port1)s, %(port2)s, %(finalstate)s, %(pathfindissue)s, %(vlan)s, %(requesttype)s, FROM_UNIXTIME(%(insertdate)s),FROM_UNIXTIME(%(updatedate)s), %(fileloc)s, %(site1)s, %(site2)s, %(failure)s)"""
+VALUES (%(uuid)s, %(port1)s, %(port2)s, %(finalstate)s, %(pathfindissue)s, %(vlan)s, %(requesttype)s, FROM_UNIXTIME(%(insertdate)s),FROM_UNIXTIME(%(updatedate)s), %(fileloc)s, %(site1)s, %(site2)s, %(failure)s)
+ON DUPLICATE KEY UPDATE id = id"""
 insert_actions = """INSERT INTO actions (uuid, action, site1, site2, insertdate, updatedate)
-VALUES (%(uuid)s, %(action)s, %(site1)s, %(site2)s,  FROM_UNIXTIME(%(insertdate)s), FROM_UNIXTIME(%(updatedate)s))"""
-insert_verification = """INSERT INTO verification (uuid, site, action, site1, site2, netstatus, urn, verified, insertdate, updatedate)
-VALUES (%(uuid)s, %(site)s, %(action)s, %(site1)s, %(site2)s, %(netstatus)s, %(urn)s, %(verified)s, FROM_UNIXTIME(%(insertdate)s), FROM_UNIXTIME(%(updatedate)s))"""
-insert_requeststates = """INSERT INTO requeststates (uuid, state, configstate, action, site1, site2, totaltime, sincestart, entertime, insertdate, updatedate)
-VALUES (%(uuid)s, %(state)s, %(configstate)s, %(action)s,%(site1)s, %(site2)s, %(totaltime)s, %(sincestart)s, FROM_UNIXTIME(%(entertime)s), FROM_UNIXTIME(%(insertdate)s), FROM_UNIXTIME(%(updatedate)s))"""
+VALUES (%(uuid)s, %(action)s, %(site1)s, %(site2)s,  FROM_UNIXTIME(%(insertdate)s), FROM_UNIXTIME(%(updatedate)s))
+ON DUPLICATE KEY UPDATE id = id"""
+insert_verification = """INSERT INTO verification (uuid, site, action, site1, site2, netstatus, urn, verified, insertdate, updatedate, rowhash)
+VALUES (%(uuid)s, %(site)s, %(action)s, %(site1)s, %(site2)s, %(netstatus)s, %(urn)s, %(verified)s, FROM_UNIXTIME(%(insertdate)s), FROM_UNIXTIME(%(updatedate)s), %(rowhash)s)
+ON DUPLICATE KEY UPDATE id = id"""
+insert_requeststates = """INSERT INTO requeststates (uuid, state, configstate, action, site1, site2, totaltime, sincestart, entertime, insertdate, updatedate, rowhash)
+VALUES (%(uuid)s, %(state)s, %(configstate)s, %(action)s,%(site1)s, %(site2)s, %(totaltime)s, %(sincestart)s, FROM_UNIXTIME(%(entertime)s), FROM_UNIXTIME(%(insertdate)s), FROM_UNIXTIME(%(updatedate)s), %(rowhash)s)
+ON DUPLICATE KEY UPDATE id = id"""
 insert_runnerinfo = """INSERT INTO runnerinfo (alive, totalworkers, totalqueue, remainingqueue, lockedrequests, updatedate, insertdate, starttime, nextrun)
 VALUES (%(alive)s, %(totalworkers)s, %(totalqueue)s, %(remainingqueue)s, %(lockedrequests)s, FROM_UNIXTIME(%(updatedate)s), FROM_UNIXTIME(%(insertdate)s), FROM_UNIXTIME(%(starttime)s), FROM_UNIXTIME(%(nextrun)s))"""
 insert_lockedrequests = """INSERT INTO lockedrequests (uuid, port1, port2, finalstate, pathfindissue, vlan, requesttype, insertdate, updatedate, fileloc, site1, site2, failure)
-VALUES (%(uuid)s, %(port1)s, %(port2)s, %(finalstate)s, %(pathfindissue)s, %(vlan)s, %(requesttype)s, FROM_UNIXTIME(%(insertdate)s),FROM_UNIXTIME(%(updatedate)s), %(fileloc)s, %(site1)s, %(site2)s, %(failure)s)"""
-insert_pingresults = """INSERT INTO pingresults (uuid, site1, site2, action, port1, port2, ipto, ipfrom, vlanto, vlanfrom, insertdate, updatedate, failed, transmitted, received, packetloss, rttmin, rttavg, rttmax, rttmdev)
-VALUES (%(uuid)s, %(site1)s, %(site2)s, %(action)s, %(port1)s, %(port2)s, %(ipto)s, %(ipfrom)s, %(vlanto)s, %(vlanfrom)s, FROM_UNIXTIME(%(insertdate)s), FROM_UNIXTIME(%(updatedate)s), %(failed)s, %(transmitted)s, %(received)s, %(packetloss)s, %(rttmin)s, %(rttavg)s, %(rttmax)s, %(rttmdev)s)"""
+VALUES (%(uuid)s, %(port1)s, %(port2)s, %(finalstate)s, %(pathfindissue)s, %(vlan)s, %(requesttype)s, FROM_UNIXTIME(%(insertdate)s),FROM_UNIXTIME(%(updatedate)s), %(fileloc)s, %(site1)s, %(site2)s, %(failure)s)
+ON DUPLICATE KEY UPDATE id = id"""
+insert_pingresults = """INSERT INTO pingresults (uuid, site1, site2, action, port1, port2, ipto, ipfrom, vlanto, vlanfrom, insertdate, updatedate, failed, transmitted, received, packetloss, rttmin, rttavg, rttmax, rttmdev, samples, seqgaps, reordered, duplicates, rttp50, rttp95, rttp99, rtthist, rowhash)
+VALUES (%(uuid)s, %(site1)s, %(site2)s, %(action)s, %(port1)s, %(port2)s, %(ipto)s, %(ipfrom)s, %(vlanto)s, %(vlanfrom)s, FROM_UNIXTIME(%(insertdate)s), FROM_UNIXTIME(%(updatedate)s), %(failed)s, %(transmitted)s, %(received)s, %(packetloss)s, %(rttmin)s, %(rttavg)s, %(rttmax)s, %(rttmdev)s, %(samples)s, %(seqgaps)s, %(reordered)s, %(duplicates)s, %(rttp50)s, %(rttp95)s, %(rttp99)s, %(rtthist)s, %(rowhash)s)
+ON DUPLICATE KEY UPDATE id = id"""
+insert_throughputresults = """INSERT INTO throughputresults (uuid, site1, site2, action, port1, port2, hostfrom, hostto, ipfrom, ipto, vlanfrom, vlanto, insertdate, updatedate, failed, requested, achieved, ratio, rowhash)
+VALUES (%(uuid)s, %(site1)s, %(site2)s, %(action)s, %(port1)s, %(port2)s, %(hostfrom)s, %(hostto)s, %(ipfrom)s, %(ipto)s, %(vlanfrom)s, %(vlanto)s, FROM_UNIXTIME(%(insertdate)s), FROM_UNIXTIME(%(updatedate)s), %(failed)s, %(requested)s, %(achieved)s, %(ratio)s, %(rowhash)s)
+ON DUPLICATE KEY UPDATE id = id"""
 insert_stateorder = """INSERT INTO stateorder (state, action, configstate, orderid) VALUES (%(state)s, %(action)s, %(configstate)s, %(orderid)s)"""
 
 # SELECT FROM TABLES
@@ -151,6 +201,7 @@ get_requeststates = """SELECT * FROM requeststates"""
 get_runnerinfo = """SELECT * FROM runnerinfo"""
 get_lockedrequests = """SELECT * FROM lockedrequests"""
 get_pingresults = """SELECT * FROM pingresults"""
+get_throughputresults = """SELECT * FROM throughputresults"""
 get_stateorder = """SELECT * FROM stateorder"""
 
 # UPDATE TABLES
@@ -164,8 +215,23 @@ delete_delta_connections = "DELETE FROM verification"
 delete_requeststates = "DELETE FROM requeststates"
 delete_lockedrequests = "DELETE FROM lockedrequests"
 delete_pingresults = "DELETE FROM pingresults"
+delete_throughputresults = "DELETE FROM throughputresults"
 delete_stateorder = "DELETE FROM stateorder"
 
+# Natural key of rows (rowhash = SHA1(CONCAT_WS('|', <keys>)), unique) - row is inserted only once
+ROWHASHKEYS = {
+    "verification": ["uuid", "action", "site", "urn", "netstatus", "verified"],
+    "requeststates": ["uuid", "action", "state", "configstate"],
+    "pingresults": ["uuid", "action", "ipfrom", "ipto", "vlanfrom", "vlanto"],
+    "throughputresults": ["uuid", "action", "hostfrom", "hostto", "ipfrom", "ipto"],
+}
+
+
+def rowHash(calltype, entry):
+    """Hash of row natural key (same as SHA1(CONCAT_WS('|', <keys>)) in database)"""
+    return hashlib.sha1("|".join(str(entry[key]) for key in ROWHASHKEYS[calltype]).encode("utf-8")).hexdigest()
+
+
 # This is state orders (global vars to precreate database order for timings)
 GBCONFIGSTATES = ["create", "UNKNOWN", "PENDING", "SCHEDULED", "UNSTABLE", "STABLE"]
 GBCREATESTATES = [["CREATE", "create"],
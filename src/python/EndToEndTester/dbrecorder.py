@@ -7,13 +7,22 @@ Email                   : jbalcas (at) es.net
 @Copyright              : Copyright (C) 2025 ESnet
 Date                    : 2025/03/14
 """
-import re
 import os
-from sense.client.workflow_combined_api import WorkflowCombinedApi
-from EndToEndTester.utilities import loadFileJson, loadJson, getConfig, getUTCnow, timestampToDate
-from EndToEndTester.utilities import moveFile, getLogger, setSenseEnv, checkCreateDir, refreshConfig, renameFile
+import time
+import queue
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from EndToEndTester.utilities import loadFileJson, getConfig, getUTCnow, timestampToDate
+from EndToEndTester.utilities import moveFile, getLogger, setSenseEnv, checkCreateDir, renameFile
+from EndToEndTester.configcache import getConfigCache
+from EndToEndTester.apiclients import getWorkflowCombinedApi
+from EndToEndTester.ingest import IngestServer, pushEnabled, getSocketPath
+from EndToEndTester.blobs import moveBlobs
+from EndToEndTester.scanindex import ScanIndex
+from EndToEndTester.fswatch import InotifyWatcher, inotifyAvailable, IN_CLOSE_WRITE, IN_MOVED_TO, IN_DELETE
 from EndToEndTester.DBBackend import dbinterface
-from EndToEndTester.dbcalls import GBCONFIGSTATES, GBCREATESTATES
+from EndToEndTester.dbcalls import ROWHASHKEYS, rowHash
+from EndToEndTester.recordparser import RECORDERLOG, BATCHKEYS, getSiteName, parseResultFile, initParserProcess
 
 # Loops via all files and records them inside database;
 # Identifies if it is final state (if create/delete is final ok - then final:
@@ -30,7 +39,7 @@ class Archiver:
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.workflowApi = WorkflowCombinedApi()
+        self.workflowApi = getWorkflowCombinedApi(self.config)
         self.senseouuid = ""
         self.senseodata = {}
         self.senseoexc = None
@@ -149,6 +158,8 @@ class Archiver:
                 timestampToDate(self.requestentry["insertdate"]),
             )
             newFName = moveFile(self.requestentry["fileloc"], archiveddir)
+            if newFName:
+                moveBlobs(self.config["workdir"], self.data.get("blobdir"), archiveddir)
         return newFName
 
     def runArchiver(self):
@@ -199,11 +210,8 @@ class DBRecorder:
 
     def writerequest(self):
         """Record request"""
-        dbentry = self.db.get(
-            "requests", limit=1, search=[["uuid", self.requestentry["uuid"]]]
-        )
-        if not dbentry:
-            self.db.insert("requests", [self.requestentry])
+        # Inserted only once (uuid is unique)
+        self.db.insert("requests", [self.requestentry])
 
     def updaterequest(self, newFName):
         """Update Request and set new file location"""
@@ -226,37 +234,27 @@ class DBRecorder:
             ],
         )
 
+    def _insertRows(self, calltype, entries):
+        """Insert entries with one multi-row insert. Rows already in database are skipped
+        by unique key (uuid and action, or rowhash of natural key - see ROWHASHKEYS)"""
+        if not entries:
+            return
+        if calltype in ROWHASHKEYS:
+            for entry in entries:
+                entry["rowhash"] = rowHash(calltype, entry)
+        self.db.insert(calltype, entries)
+
     def writeactions(self):
         """Record actions"""
-        for action in self.actionsentries:
-            searchparams = [["uuid", action["uuid"]], ["action", action["action"]]]
-            dbentry = self.db.get("actions", search=searchparams)
-            if not dbentry:
-                self.db.insert("actions", [action])
+        self._insertRows("actions", self.actionsentries)
 
     def writeverification(self):
         """Record verification"""
-        for verentry in self.verificationentries:
-            searchparams = [
-                [key, value]
-                for key, value in verentry.items()
-                if key not in ["insertdate", "updatedate"]
-            ]
-            dbentry = self.db.get("verification", search=searchparams)
-            if not dbentry:
-                self.db.insert("verification", [verentry])
+        self._insertRows("verification", self.verificationentries)
 
     def writerequeststate(self):
         """Record request state"""
-        for reqentry in self.requeststateentries:
-            searchparams = [
-                [key, value]
-                for key, value in reqentry.items()
-                if key not in ["totaltime", "entertime", "insertdate", "updatedate"]
-            ]
-            dbentry = self.db.get("requeststates", search=searchparams)
-            if not dbentry:
-                self.db.insert("requeststates", [reqentry])
+        self._insertRows("requeststates", self.requeststateentries)
 
     def writerunnerinfo(self, data):
         """Write worker status. Insert if no entries, update if diff"""
@@ -283,22 +281,16 @@ class DBRecorder:
 
     def writelockedinfo(self, data):
         """Write all locked requests"""
-        dbentry = self.db.get(
-            "lockedrequests", limit=1, search=[["uuid", data["uuid"]]]
-        )
-        if not dbentry:
-            self.db.insert("lockedrequests", [data])
+        # Inserted only once (uuid is unique)
+        self.db.insert("lockedrequests", [data])
 
     def writepingresults(self):
         """Write Ping results"""
-        for ping in self.pingresults:
-            searchparams = []
-            for key, value in ping.items():
-                if key not in ["insertdate", "updatedate"] and isinstance(value, str):
-                    searchparams.append([key, value])
-            dbentry = self.db.get("pingresults", search=searchparams)
-            if not dbentry:
-                self.db.insert("pingresults", [ping])
+        self._insertRows("pingresults", self.pingresults)
+
+    def writethroughputresults(self):
+        """Write Throughput results"""
+        self._insertRows("throughputresults", self.throughputresults)
 
     def getlockedinfo(self):
         """Get Locked info requests"""
@@ -319,481 +311,71 @@ class FileParser(DBRecorder, Archiver):
     """Parses files, extracts data, and records information into the database."""
 
     def __init__(self, config):
-        super().__init__()
+        # Config is needed by Archiver to select SENSE-O client
         self.config = config
+        super().__init__()
         self.lastconfigfetch = getUTCnow()
-        self.logger = getLogger(
-            name="DBRecorder", logFile="/var/log/EndToEndTester/DBRecorder.log"
-        )
-        self.requestentry = {}
-        self.actionsentries = []
-        self.verificationentries = []
-        self.requeststateentries = []
-        self.pingresults = []
-        self.lockedfiles = []
-        self.newpingentry = {}
+        self.logger = getLogger(name="DBRecorder", logFile=RECORDERLOG)
+        self.configcache = getConfigCache(config, self.logger)
+        self.configcache.subscribe(self._configChanged)
+        # Record batches of current file (BATCHKEYS, filled by _applyParsed)
+        self.requestentry, self.actionsentries, self.verificationentries = {}, [], []
+        self.requeststateentries, self.pingresults, self.throughputresults = [], [], []
+        # Locked requests (by uuid) seen in current scan
+        self.lockedfiles = {}
         self.data = {}
         self.fname = {}
-        self.db = dbinterface()
-        # Default vals if not specified by hasNetworkStatus
-        # create, verified - activated
-        # create, unverified - create-unverified
-        # cancel, verified - deactivated
-        # cancel, unverified - deactivate-error
-        self.defaultvals = {
-            "create-verified": "activated",
-            "create-unverified": "create-unverified",
-            "modifycreate-verified": "activated",
-            "modifycreate-unverified": "modify-unverified",
-            "reprovision-verified": "activated",
-            "reprovision-unverified": "reprovision-unverified",
-            "modify-verified": "activated",
-            "modify-unverified": "modify-unverified",
-            "cancel-verified": "deactivated",
-            "cancel-unverified": "cancel-unverified",
-            "cancelrep-verified": "deactivated",
-            "cancelrep-unverified": "cancel-unverified",
-            "cancelarch-verified": "deactivated",
-            "cancelarch-unverified": "cancel-unverified",
-        }
+        self.scanindex = ScanIndex(config["workdir"])
 
     def _cleanup(self):
         """Clean up variables"""
-        self.requestentry = {}
-        self.actionsentries = []
-        self.verificationentries = []
-        self.requeststateentries = []
+        for key in BATCHKEYS:
+            setattr(self, key, {} if key == "requestentry" else [])
         self.data = {}
         self.fname = {}
-        self.newpingentry = {}
 
-    def _getSiteName(self, pairval):
-        """Get Sitename of pair (or override from config)"""
-        if self.config.get("entriessitename", ""):
-            return self.config.get("entriessitename")
-        site = self.config.get("entries", {}).get(pairval, {}).get("site", "UNKNOWN")
-        return site
+    def _configChanged(self, changes, newconfig):
+        """Config cache subscriber - use new config and log changed entries and mappings"""
+        self.config = newconfig
+        for key in ["entries", "mappings"]:
+            for change, items in changes.get(key, {}).items():
+                if items:
+                    self.logger.info(f"Config {key} {change}: {items}")
 
     def _forceRefreshConfig(self, pair):
         """Get Sitename - it might overrite config, if Sitename is unknown, or refresh once a day"""
-        if self.lastconfigfetch >= self.lastconfigfetch + 86400:
+        if getUTCnow() >= self.lastconfigfetch + 86400:
             self.logger.debug(f"Last config refresh was at: {self.lastconfigfetch}")
             self.logger.info(
                 "Forced config refresh - as last time we got it was 1 day ago"
             )
-            self.config = refreshConfig(self.config)
+            self.config = self.configcache.refresh()
             self.lastconfigfetch = getUTCnow()
         # If sitename is unknown, we check and refresh config every 1hr
         if (
-            self._getSiteName(pair[0]) == "UNKNOWN"
-            or self._getSiteName(pair[1]) == "UNKNOWN"
+            getSiteName(self.config, pair[0]) == "UNKNOWN"
+            or getSiteName(self.config, pair[1]) == "UNKNOWN"
         ):
             self.logger.info(
                 f"{self.requestentry['uuid']} got unknown sitename. Will force config refresh if older than 1hr"
             )
-            if self.lastconfigfetch >= self.lastconfigfetch + 3600:
+            if getUTCnow() >= self.lastconfigfetch + 3600:
                 self.logger.debug(f"Last config refresh was at: {self.lastconfigfetch}")
                 self.logger.info("Forced config refresh due to unknown site")
-                self.config = refreshConfig(self.config)
+                self.config = self.configcache.refresh()
                 self.lastconfigfetch = getUTCnow()
 
-    def recordinfo(self):
-        """Identify request information"""
-        pair = self.data.get("info", {}).get("pair", [])
-        if not pair or len(pair) != 2:
-            raise ValueError(f"Invalid pair information for {self.fname}")
-        uuid = self.data.get("info", {}).get("uuid", "")
-        if not uuid:
-            raise ValueError(f"Invalid uuid information for {self.fname}")
-        self.requestentry["uuid"] = uuid
-        self._forceRefreshConfig(
-            pair
-        )  # Force refresh if sitename unknown or 24hr passed.
-        self.requestentry["port1"] = pair[0]
-        self.requestentry["port2"] = pair[1]
-        self.requestentry["site1"] = self._getSiteName(pair[0])
-        self.requestentry["site2"] = self._getSiteName(pair[1])
-        self.requestentry["fileloc"] = self.fname
-        self.requestentry["insertdate"] = self.data.get("info", {}).get(
-            "time", getUTCnow()
-        )
-        self.requestentry["updatedate"] = self.data.get("info", {}).get(
-            "time", getUTCnow()
-        )
-        self.requestentry["requesttype"] = self.data.get("info", {}).get(
-            "requesttype", "UNSET"
-        )
-        self.requestentry["failure"] = self.identifyerrors()
-        self.requestentry["finalstate"] = (
-            self.identifyfinalstate()
-        )  # 0 - not final, 1 - final
-        self.requestentry["pathfindissue"] = self.identifyPathFindIssue()
-        self.requestentry["vlan"] = self.data["info"]["req"]["data"]["connections"][0][
-            "terminals"
-        ][0]["vlan_tag"]
-
-    def identifyfinalstate(self):
-        """Identify request information"""
-        finalstate = 0
-        if (
-            self.data.get("create", {}).get("finalstate", "") == "OK"
-            and self.data.get("cancel", {}).get("finalstate", "") == "OK"
-        ):
-            finalstate = 1
-        else:
-            self.logger.info(f"({self.requestentry['uuid']}) Not final state.")
-            self.logger.info(
-                f"({self.requestentry['uuid']}) create: {self.data.get('create', {}).get('finalstate', '')}"
-            )
-            self.logger.info(
-                f"({self.requestentry['uuid']}) cancel: {self.data.get('cancel', {}).get('finalstate', '')}"
-            )
-        return finalstate
-
-    def identifyPathFindIssue(self):
-        """Identify if there was a path finding issue"""
-        if "cannot find feasible path for connection" in self.requestentry["failure"]:
-            return 1
-        return 0
-
-    def identifyerrors(self):
-        """Identify errors from information"""
-        errmsg = ""
-        for key, lookup in {
-            "ERROR": "error",
-            "VALIDATION": "validation-error",
-            "MANIFEST": "manifest-error",
-        }.items():
-            if lookup in self.data.get("create", {}):
-                errmsg += f"{key}_CREATE: " + self.data.get("create", {}).get(
-                    lookup, ""
-                )
-            if lookup in self.data.get("cancel", {}):
-                errmsg += f"{key}_CANCEL: " + self.data.get("create", {}).get(
-                    lookup, ""
-                )
-        return errmsg
-
-    def recordactions(self):
-        """Identify request information"""
-        for key, val in self.data.get("timings", {}).items():
-            action = {
-                "uuid": self.requestentry["uuid"],
-                "action": key,
-                "insertdate": val["starttime"],
-                "updatedate": val["starttime"],
-                "site1": self.requestentry["site1"],
-                "site2": self.requestentry["site2"],
-            }
-            self.actionsentries.append(action)
-
-    def _identifyNetworkStatus(self, inputVal, key):
-        """Record all sites it went through"""
-        # pylint: disable=too-many-nested-blocks
-        netstat = []
-        for ckey, cval in inputVal.get(key, {}).items():
-            if ckey.endswith("hasNetworkStatus"):
-                for netdict in cval:
-                    if netdict.get("value") and netdict.get("value") in inputVal:
-                        for nkey, nval in inputVal[netdict["value"]].items():
-                            if nkey.endswith("value"):
-                                for netstatus in nval:
-                                    if netstatus.get("value"):
-                                        netstat.append(netstatus.get("value"))
-        return netstat
-
-    def _recordIdentifySites(self, inputVal, checkkey):
-        """Record all sites it went through"""
-        output = {}
-        for key in inputVal.keys():
-            for mapkey, mapsite in self.config.get("mappings", {}).items():
-                if key.startswith(mapkey):
-                    netstat = self._identifyNetworkStatus(inputVal, key)
-                    if netstat or checkkey.startswith("cancel"):
-                        output.setdefault(mapkey, [])
-                        output[mapkey].append({"site": mapsite, "netstat": netstat})
-                        break
-        return output
-
-    def _filternetstats(self, inputVal, defaultstatus):
-        """Filter out netstats of equal entries"""
-        output = []
-        site = ""
-        for netstat in inputVal:
-            if netstat["site"] != site:
-                site = netstat["site"]
-            if "netstat" not in netstat:
-                if defaultstatus not in output:
-                    output.append(defaultstatus)
-                continue
-            if len(netstat["netstat"]) == 0:
-                if defaultstatus not in output:
-                    output.append(defaultstatus)
-                continue
-            for stat in netstat["netstat"]:
-                if stat not in output:
-                    output.append(stat)
-        return output, site
-
-    def recordverification(self):
-        """Identify request information"""
-        # This part is most fun to loop over all verification info and prepare database entries
-        # do this for create and verified additions
-        output = {}
-        for key in [
-            "create",
-            "modifycreate",
-            "cancelrep",
-            "reprovision",
-            "modify",
-            "cancel",
-            "cancelarch",
-        ]:
-            if key not in self.data:
-                continue
-            output.setdefault(key, {"verified": {}, "unverified": {}})
-            # Load all verified, unverivied parts
-            tmpdata = loadJson(
-                self.data.get(key, {}).get("validation", {}).get("additionVerified", {})
-            )
-            output[key]["verified"].update(self._recordIdentifySites(tmpdata, key))
-            tmpdata = loadJson(
-                self.data.get(key, {})
-                .get("validation", {})
-                .get("additionUnverified", {})
-            )
-            output[key]["unverified"].update(self._recordIdentifySites(tmpdata, key))
-            tmpdata = loadJson(
-                self.data.get(key, {})
-                .get("validation", {})
-                .get("reductionVerified", {})
-            )
-            output[key]["verified"].update(self._recordIdentifySites(tmpdata, key))
-            tmpdata = loadJson(
-                self.data.get(key, {})
-                .get("validation", {})
-                .get("reductionUnverified", {})
-            )
-            output[key]["unverified"].update(self._recordIdentifySites(tmpdata, key))
-
-        for key, val in output.items():
-            for key1, val1 in val.items():
-                for ckey, cval in val1.items():
-                    # Identify all final network status
-                    # Need to pass defaultstatus - based on keys
-                    if not self.defaultvals.get(f"{key}-{key1}"):
-                        self.logger.debug(
-                            f"({self.requestentry['uuid']}) No default value for {key}-{key1}"
-                        )
-                        continue
-                    netstatus, site = self._filternetstats(
-                        cval, self.defaultvals[f"{key}-{key1}"]
-                    )
-                    if len(netstatus) == 0:
-                        self.logger.debug(
-                            f"({self.requestentry['uuid']}) No network status for {key}-{key1}-{ckey}-{site}"
-                        )
-                        continue
-                    if not site:
-                        self.logger.debug(
-                            f"({self.requestentry['uuid']}) No site for {key}-{key1}-{ckey}"
-                        )
-                        continue
-                    errmsg = ""
-                    for netstat in netstatus:
-                        if netstat != self.defaultvals[f"{key}-{key1}"]:
-                            errmsg += f"{site} {ckey} Network status: {netstat}, "
-                        item = {
-                            "uuid": self.requestentry["uuid"],
-                            "action": key,
-                            "netstatus": netstat,
-                            "site": site,
-                            "urn": ckey,
-                            "verified": 1 if key1 == "verified" else 0,
-                            "site1": self.requestentry["site1"],
-                            "site2": self.requestentry["site2"],
-                            "insertdate": self.requestentry["insertdate"],
-                            "updatedate": self.requestentry["updatedate"],
-                        }
-                        self.verificationentries.append(item)
-                    if errmsg:
-                        self.requestentry["failure"] = (
-                            errmsg + self.requestentry["failure"]
-                        )
-
-    def _calculateTotalTime(self, tmplist):
-        """Calculate total time to transition from one state to another"""
-        lasttimestamp = 0
-        firststart = 0
-        for stfind in GBCREATESTATES:
-            for configstate in GBCONFIGSTATES:
-                findstate = f"{stfind[0]}{configstate}{stfind[1]}"
-                # loop via index via tmplist
-                total = len(tmplist)
-                counter = 0
-                while counter < total:
-                    fullstate = (
-                        tmplist[counter]["state"]
-                        + tmplist[counter]["configstate"]
-                        + tmplist[counter]["action"])
-                    if fullstate == findstate:
-                        # pop item from list
-                        item = tmplist.pop(counter)
-                        if lasttimestamp == 0:
-                            lasttimestamp = item["entertime"]
-                            firststart = item["entertime"]
-                        else:
-                            # This is the diff time spent in previous state.
-                            diff = item["entertime"] - lasttimestamp
-                            self.requeststateentries[-1]["totaltime"] = (
-                                diff if diff > 0 else 0
-                            )
-                            self.requeststateentries[-1]["sincestart"] = (
-                                item["entertime"] - firststart
-                            )
-                            lasttimestamp = item["entertime"]
-                            self.logger.info(
-                                f"({self.requestentry['uuid']}) Found state transition: {item['state']} - {item['configstate']} - {item['action']} - {diff}. Since start: {item['entertime'] - firststart}"
-                            )
-                        self.requeststateentries.append(item)
-                        # If tmplist len is 0, now this is the last item
-                        if len(tmplist) == 0:
-                            # Need to get final state timestamp and update the diff and sincestart
-                            tsreq = self.data.get(item['action'], {}).get('finalstatetimestamp', None)
-                            if tsreq:
-                                diff = item["entertime"] - tsreq
-                                self.requeststateentries[-1]["totaltime"] = diff if diff > 0 else 0
-                                self.requeststateentries[-1]["sincestart"] = item["entertime"] - firststart
-                        counter = total
-                    counter += 1
-        # If we still have entries remaining here, we need to loop via them and add
-        for item in tmplist:
-            self.logger.info(f"Was not able to identify state transition for: {item}")
-            self.requeststateentries.append(item)
-
-        # 2. Loop via all items and see if we can find the next state
-        # 3. If we find the next state - we need to calculate time difference from entertime to next state
-
-    def recordrequeststate(self):
-        """Identify request information"""
-        tmplist = []
-        for key, val in self.data.get("timings", {}).items():
-            for key1, val1 in val.items():
-                if not isinstance(val1, dict):
-                    continue
-                for ckey, cval in val1.get("configStatus", {}).items():
-                    item = {
-                        "uuid": self.requestentry["uuid"],
-                        "action": key,  # create, cancel, cancelrep...
-                        "state": key1,  # CANCEL - READY ...
-                        "configstate": ckey,  # STABLE, UNSTABLE...
-                        "entertime": cval,
-                        "site1": self.requestentry["site1"],
-                        "site2": self.requestentry["site2"],
-                        "totaltime": 0,  # This will be updated later
-                        "sincestart": 0,  # This will be updated later
-                        "insertdate": self.requestentry["insertdate"],
-                        "updatedate": self.requestentry["updatedate"],
-                    }
-                    tmplist.append(item)
-        # Now we need to calculate total time for each entry
-        self._calculateTotalTime(tmplist)
-
-    def _parsepingstdout(self, line):
-        """Parse a line containing ping results and set output values."""
-        # Parse transmitted and received packets
-        transmittedRe = re.search(r"(\d+)\s+packets transmitted", line)
-        receivedRe = re.search(r"(\d+)\s+received", line)
-        if transmittedRe:
-            self.newpingentry["transmitted"] = int(transmittedRe.group(1))
-        if receivedRe:
-            self.newpingentry["received"] = int(receivedRe.group(1))
-        # Parse packet loss
-        packetlossRe = re.search(r"(\d+(\.\d+)?)% packet loss", line)
-        if packetlossRe:
-            self.newpingentry["packetloss"] = float(packetlossRe.group(1))
-        # Parse RTT values (min/avg/max/mdev)
-        rttRe = re.search(
-            r"rtt min/avg/max/mdev = ([\d.]+)/([\d.]+)/([\d.]+)/([\d.]+)", line
-        )
-        if rttRe:
-            self.newpingentry["rttmin"] = float(rttRe.group(1))
-            self.newpingentry["rttavg"] = float(rttRe.group(2))
-            self.newpingentry["rttmax"] = float(rttRe.group(3))
-            self.newpingentry["rttmdev"] = float(rttRe.group(4))
-
-    def __resetpingentry(self):
-        """Reset ping entry"""
-        self.newpingentry = {
-            "uuid": self.requestentry["uuid"],
-            "site1": self.requestentry["site1"],
-            "site2": self.requestentry["site2"],
-            "action": "",
-            "insertdate": self.requestentry["insertdate"],
-            "updatedate": self.requestentry["updatedate"],
-            "port1": self.requestentry["port1"],
-            "port2": self.requestentry["port2"],
-            "ipto": "",
-            "ipfrom": "",
-            "failed": 0,
-            "transmitted": 0,
-            "received": 0,
-            "packetloss": 0.0,
-            "rttmin": 0.0,
-            "rttavg": 0.0,
-            "rttmax": 0.0,
-            "rttmdev": 0.0,
-        }
-
-    def recordpingresults(self, action):
-        """Identify ping results information"""
-        for item in (
-            self.data.get(action, {})
-            .get("pingresults", {})
-            .get("final", {})
-            .get("results", [])
-        ):
-            self.__resetpingentry()
-            self.newpingentry["action"] = action
-            output = loadJson(item.get("output", "{}"))
-            # load requestdict and get ipto
-            requestdict = loadJson(item.get("requestdict", "{}"))
-            # get ipfrom
-            self.newpingentry["ipto"] = requestdict.get("ip", "")
-            ipfrom = "unknown"
-            if requestdict["hostname"] in self.data.get(action, {}).get(
-                "pingresults", {}
-            ).get("submit", {}).get("hostips", {}):
-                ipfrom = self.data[action]["pingresults"]["submit"]["hostips"][
-                    requestdict["hostname"]
-                ]
-            self.newpingentry["ipfrom"] = ipfrom
-            # Identify vlan from request
-            self.newpingentry["vlanfrom"] = "any"
-            self.newpingentry["vlanto"] = "any"
-            if self.newpingentry["ipto"] in self.data.get(action, {}).get(
-                "pingresults", {}
-            ).get("submit", {}).get("ipvlans", {}):
-                self.newpingentry["vlanto"] = self.data[action]["pingresults"][
-                    "submit"
-                ]["ipvlans"][self.newpingentry["ipto"]]
-            if self.newpingentry["ipfrom"] in self.data.get(action, {}).get(
-                "pingresults", {}
-            ).get("submit", {}).get("ipvlans", {}):
-                self.newpingentry["vlanfrom"] = self.data[action]["pingresults"][
-                    "submit"
-                ]["ipvlans"][self.newpingentry["ipfrom"]]
-            # parse the stdout
-            for line in output.get("stdout", []):
-                self._parsepingstdout(line)
-            # Identify if ping failed
-            if self.newpingentry["transmitted"] == 0:
-                self.newpingentry["failed"] = 1
-            if self.newpingentry["received"] == 0:
-                self.newpingentry["failed"] = 1
-            if self.newpingentry["packetloss"] > 0.0:
-                self.newpingentry["failed"] = 1
-            self.pingresults.append(self.newpingentry)
+    def _refreshSiteNames(self):
+        """Refresh config if needed (unknown site, or once a day) and update site names of parsed records"""
+        pair = [self.requestentry["port1"], self.requestentry["port2"]]
+        self._forceRefreshConfig(pair)
+        sites = {"site1": getSiteName(self.config, pair[0]), "site2": getSiteName(self.config, pair[1])}
+        if all(self.requestentry[key] == val for key, val in sites.items()):
+            return
+        for entry in [self.requestentry] + self.actionsentries + self.verificationentries + self.requeststateentries + self.pingresults + self.throughputresults:
+            for key, val in sites.items():
+                if key in entry:
+                    entry[key] = val
 
     def writedata(self):
         """Write data to DB"""
@@ -802,20 +384,14 @@ class FileParser(DBRecorder, Archiver):
                 f"({self.requestentry['uuid']}) DB Done file. Will not write to db again."
             )
         else:
-            self.writerequest()
-            self.writeactions()
-            self.writeverification()
-            self.writerequeststate()
-            self.writepingresults()
-
-    def recorddata(self):
-        """Identify request information"""
-        self.recordinfo()
-        self.recordactions()
-        self.recordverification()
-        self.recordrequeststate()
-        for key in ["create", "reprovision", "modify", "modifycreate"]:
-            self.recordpingresults(key)
+            # One transaction per result file (nothing is written if any insert fails)
+            with self.db.transaction():
+                self.writerequest()
+                self.writeactions()
+                self.writeverification()
+                self.writerequeststate()
+                self.writepingresults()
+                self.writethroughputresults()
 
     def checkrunnerinfo(self):
         """Record worker status inside database"""
@@ -841,7 +417,7 @@ class FileParser(DBRecorder, Archiver):
         for item in self.getlockedinfo():
             alllocked[item["uuid"]] = item
         # For each in self.lockedfiles - check if uuid exists in db output
-        for item in self.lockedfiles:
+        for item in self.lockedfiles.values():
             if item["uuid"] in alllocked:
                 del alllocked[item["uuid"]]
             else:
@@ -854,39 +430,135 @@ class FileParser(DBRecorder, Archiver):
             )
             self.deletelockedinfo(val)
 
+    def _archiveCheck(self, fullpath, entry):
+        """Run scheduled archive check of locked file (from index, without parsing file)"""
+        self.logger.info(f"Scheduled archive check of locked file: {fullpath}")
+        self._cleanup()
+        self.dbdone = True
+        self.fname = fullpath
+        self.requestentry = dict(entry["requestentry"], fileloc=fullpath)
+        self.data = entry.get("archivedata", {})
+        # SENSE-O state is checked again (not cached from previous check)
+        self.senseouuid = ""
+        try:
+            if self.runArchiver():
+                self.scanindex.remove(fullpath)
+                return
+        except Exception as ex:
+            self.logger.error(f" Error: {ex}")
+            self.logger.error("-" * 40)
+        self._recordLocked(fullpath)
+
+    def _recordLocked(self, fullpath):
+        """Keep file as locked and schedule next archive check (recorderarchiveinterval, default 900),
+        but not later than its expiry (3 days after insert)"""
+        self.lockedfiles[self.requestentry["uuid"]] = self.requestentry
+        nextcheck = min(getUTCnow() + int(self.config.get("recorderarchiveinterval", 900)),
+                        int(self.requestentry.get("insertdate", 0)) + 259200)
+        archivedata = {"cancel": {"finalstate": self.data.get("cancel", {}).get("finalstate", "")},
+                       "blobdir": self.data.get("blobdir")}
+        self.scanindex.update(fullpath, "locked", nextcheck, requestentry=self.requestentry, archivedata=archivedata)
+
+    def _needsParse(self, fullpath):
+        """Check if result file has to be parsed. Files not changed since last scan are not
+        parsed again (see ScanIndex) - locked files get scheduled archive check instead"""
+        # Check if lock file present, means running now
+        if os.path.exists(fullpath + ".lock"):
+            self.logger.info(f"FileLock for {fullpath} exists. Means run ongoing")
+            return False
+        if not os.path.isfile(fullpath):
+            # Already processed (e.g. pushed and found by directory scan)
+            return False
+        entry = self.scanindex.unchanged(fullpath)
+        if entry and entry["outcome"] == "locked":
+            if getUTCnow() < entry["nextcheck"]:
+                self.lockedfiles[entry["requestentry"]["uuid"]] = entry["requestentry"]
+            else:
+                self._archiveCheck(fullpath, entry)
+            return False
+        if entry and getUTCnow() < entry["nextcheck"]:
+            # Failed before and not changed since. Retried after recorderretryinterval
+            return False
+        self.logger.info(f"Checking file: {fullpath}")
+        return True
+
+    def _parserConfig(self):
+        """Config needed by RecordParser (passed to worker processes)"""
+        return {key: self.config.get(key) for key in ["workdir", "entries", "entriessitename", "mappings"] if key in self.config}
+
+    def _applyParsed(self, fullpath, parsed):
+        """Write parsed record batches of result file into database and run archiver"""
+        retry = getUTCnow() + int(self.config.get("recorderretryinterval", 600))
+        if parsed.get("error"):
+            self.logger.error(f" Error: {parsed['error']}")
+            self.logger.error("-" * 40)
+            self.scanindex.update(fullpath, "error", retry)
+            return
+        self._cleanup()
+        self.dbdone = fullpath.endswith(".dbdone")
+        self.fname = fullpath
+        for key in BATCHKEYS:
+            setattr(self, key, parsed[key])
+        self.data = parsed["archivedata"]
+        try:
+            self._refreshSiteNames()
+            self.writedata()
+            if self.runArchiver():
+                self.scanindex.remove(fullpath)
+            else:
+                # Recorded and renamed to .dbdone
+                self._recordLocked(fullpath if self.dbdone else f"{fullpath}.dbdone")
+        except Exception as ex:
+            self.logger.error(f" Error: {ex}")
+            self.logger.error("-" * 40)
+            self.scanindex.update(fullpath, "error", retry)
+
+    def processFile(self, fullpath):
+        """Record one result file (.json or .dbdone) into database and run archiver"""
+        if self._needsParse(fullpath):
+            self._applyParsed(fullpath, parseResultFile(fullpath, self._parserConfig()))
+
+    def _serveFile(self, fullpath):
+        """Record file received from event (failure is logged and file retried later, loop keeps running)"""
+        try:
+            self.processFile(fullpath)
+        except Exception as ex:
+            self.logger.error(f"Failed to record {fullpath}: {ex}")
+            self.scanindex.update(fullpath, "error", getUTCnow() + int(self.config.get("recorderretryinterval", 600)))
+        self.scanindex.save()
+
+    def processFiles(self, files):
+        """Record result files. If more than recorderpoolthreshold (default 50) files have to be parsed
+        (backfill, catch up after outage), they are parsed on process pool (recorderprocesses, default
+        number of cpus) and batches are written to database by this process as they are parsed"""
+        files = [fullpath for fullpath in files if self._needsParse(fullpath)]
+        processes = min(int(self.config.get("recorderprocesses", os.cpu_count() or 1)), len(files))
+        if processes <= 1 or len(files) <= int(self.config.get("recorderpoolthreshold", 50)):
+            for fullpath in files:
+                self._applyParsed(fullpath, parseResultFile(fullpath, self._parserConfig()))
+            return
+        self.logger.info(f"Parsing {len(files)} files with {processes} processes")
+        parserconfig = self._parserConfig()
+        # spawn - recorder runs threads (ingest socket, inotify), fork is not safe
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=initParserProcess) as executor:
+            futures = {executor.submit(parseResultFile, fullpath, parserconfig): fullpath for fullpath in files}
+            for future in as_completed(futures):
+                try:
+                    parsed = future.result()
+                except Exception as ex:
+                    parsed = {"error": f"Parser process failed for {futures[future]}: {ex}"}
+                self._applyParsed(futures[future], parsed)
+
     def main(self):
         """Main Run loop all json run output"""
         # loop current directory files and load json
-        self.lockedfiles = []
+        self.lockedfiles = {}
         checkCreateDir(self.config["workdir"])
-        for file in os.listdir(self.config["workdir"]):
-            self.dbdone = False
-            self.data = {}
-            self.fname = None
-            if file.endswith(".json") or file.endswith(".dbdone"):
-                fullpath = os.path.join(self.config["workdir"], file)
-                # Check if lock file present, means running now
-                if os.path.exists(fullpath + ".lock"):
-                    self.logger.info(
-                        f"FileLock for {fullpath} exists. Means run ongoing"
-                    )
-                    continue
-                if fullpath.endswith(".dbdone"):
-                    self.dbdone = True
-                self.logger.info(f"Checking file: {fullpath}")
-                self._cleanup()
-                self.fname = fullpath
-            if self.fname:
-                self.data = loadFileJson(self.fname)
-            if self.data:
-                try:
-                    self.recorddata()
-                    self.writedata()
-                    if not self.runArchiver():
-                        self.lockedfiles.append(self.requestentry)
-                except Exception as ex:
-                    self.logger.error(f" Error: {ex}")
-                    self.logger.error("-" * 40)
+        self.processFiles([os.path.join(self.config["workdir"], file) for file in os.listdir(self.config["workdir"])
+                           if file.endswith(".json") or file.endswith(".dbdone")])
+        self.scanindex.prune(os.listdir(self.config["workdir"]))
+        self.scanindex.save()
         try:
             self.checklockedrequests()
         except Exception as ex:
@@ -898,6 +570,89 @@ class FileParser(DBRecorder, Archiver):
             self.logger.error(f" Error: {ex}")
             self.logger.error("-" * 40)
 
+    def _workdirEvent(self, events, name, mask):
+        """inotify callback. Queue finished result files (written or renamed into workdir,
+        or lock file removed). None is queued on overflow (full scan is needed)"""
+        if name is None:
+            events.put(None)
+            return
+        if mask & IN_DELETE:
+            if name.endswith(".json.lock"):
+                events.put(os.path.join(self.config["workdir"], name[:-len(".lock")]))
+            return
+        if name.endswith(".json") or name.endswith(".dbdone"):
+            events.put(os.path.join(self.config["workdir"], name))
+
+    def _startWatcher(self, events):
+        """Start inotify watcher of workdir (if recorderinotify set, default True). Returns watcher or None"""
+        if not self.config.get("recorderinotify", True) or not inotifyAvailable():
+            return None
+        try:
+            mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE
+            return InotifyWatcher(self.config["workdir"], mask,
+                                  lambda name, mask: self._workdirEvent(events, name, mask), self.logger).start()
+        except OSError as ex:
+            self.logger.error(f"Failed to start inotify watcher on {self.config['workdir']}: {ex}. Will use only directory scan")
+        return None
+
+    def serve(self):
+        """Run forever. Record result files as soon as they are finished - pushed by tester (if push
+        ingestion enabled) or seen by inotify watcher of workdir (if recorderinotify enabled).
+        Full directory scan runs every recorderscaninterval seconds as fallback"""
+        events = queue.Queue()
+        server = None
+        if pushEnabled(self.config):
+            try:
+                server = IngestServer(getSocketPath(self.config), self.logger, events).start()
+            except OSError as ex:
+                self.logger.error(f"Failed to start ingest socket: {ex}. Will use only directory scan")
+        checkCreateDir(self.config["workdir"])
+        watcher = self._startWatcher(events)
+        try:
+            self._serveLoop(events, bool(server or watcher))
+        finally:
+            if watcher:
+                watcher.stop()
+            if server:
+                server.stop()
+
+    def _serveLoop(self, events, eventdriven):
+        """Event loop of serve"""
+        scaninterval = self.config.get("recorderscaninterval", 600 if eventdriven else 60)
+        nextscan = 0
+        nextstatus = 0
+        while True:
+            if getUTCnow() >= nextscan:
+                self.logger.info("Timer passed. Running full directory scan")
+                try:
+                    self.main()
+                except Exception as ex:
+                    self.logger.error(f"Full directory scan failed: {ex}")
+                nextscan = getUTCnow() + scaninterval
+                nextstatus = getUTCnow() + 60
+                continue
+            if not eventdriven:
+                time.sleep(max(1, nextscan - getUTCnow()))
+                continue
+            try:
+                fname = events.get(timeout=max(1, min(nextscan, nextstatus) - getUTCnow()))
+            except queue.Empty:
+                fname = ""
+            if fname is None:
+                self.logger.warning("inotify event queue overflow. Running full directory scan")
+                nextscan = 0
+            elif fname and os.path.dirname(os.path.abspath(fname)) == os.path.abspath(self.config["workdir"]):
+                self.logger.info(f"Received finished result file: {fname}")
+                self._serveFile(fname)
+            elif fname:
+                self.logger.warning(f"Pushed file {fname} is not in workdir. Ignoring")
+            if getUTCnow() >= nextstatus:
+                # Tester status is refreshed more often than full scan
+                try:
+                    self.checkrunnerinfo()
+                except Exception as ex:
+                    self.logger.error(f" Error: {ex}")
+                nextstatus = getUTCnow() + 60
 
 if __name__ == "__main__":
     mainconf = getConfig()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# pylint: disable=line-too-long
+"""Minimal inotify directory watcher (via libc, no external dependencies)
+Title                   : end-to-end-tester
+Author                  : Justas Balcas
+Email                   : jbalcas (at) es.net
+@Copyright              : Copyright (C) 2025 ESnet
+Date                    : 2025/03/14
+"""
+import os
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+
+EVENTHEADER = struct.Struct("iIII")
+
+
+def _getLibc():
+    """Get libc with inotify support or None"""
+    libname = ctypes.util.find_library("c")
+    if not libname:
+        return None
+    try:
+        libc = ctypes.CDLL(libname, use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, "inotify_init1") or not hasattr(libc, "inotify_add_watch"):
+        return None
+    return libc
+
+
+def inotifyAvailable():
+    """Check if inotify is available on this system"""
+    return _getLibc() is not None
+
+
+class InotifyWatcher:
+    """Watch a directory with inotify and call callback(filename, mask) for every event.
+    If queue overflows, callback is called with filename None (caller should rescan).
+    If directory is removed (or replaced), watch stops and onexit() is called."""
+
+    def __init__(self, path, mask, callback, logger=None, onexit=None):
+        self.path = path
+        self.mask = mask | IN_DELETE_SELF | IN_MOVE_SELF
+        self.callback = callback
+        self.logger = logger
+        self.onexit = onexit
+        self.libc = _getLibc()
+        if not self.libc:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        wdesc = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.mask)
+        if wdesc < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"inotify_add_watch failed for {path}: {os.strerror(err)}")
+        self.wakeread, self.wakewrite = os.pipe()
+        self.running = False
+        self.lost = False
+        self.closed = False
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        """Start watcher thread"""
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=f"inotify-{self.path}", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop watcher thread"""
+        self.running = False
+        with self.lock:
+            if not self.closed:
+                os.write(self.wakewrite, b"x")
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join()
+        self._close()
+
+    def _close(self):
+        """Close inotify and wakeup descriptors (once)"""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            for fd in [self.fd, self.wakeread, self.wakewrite]:
+                os.close(fd)
+
+    def _parse(self, data):
+        """Parse inotify events buffer"""
+        offset = 0
+        while offset + EVENTHEADER.size <= len(data):
+            _wd, mask, _cookie, namelen = EVENTHEADER.unpack_from(data, offset)
+            offset += EVENTHEADER.size
+            name = data[offset:offset + namelen].rstrip(b"\0").decode("utf-8", "replace")
+            offset += namelen
+            yield (name or None), mask
+
+    def _run(self):
+        """Read inotify events and call callback"""
+        while self.running:
+            readable, _, _ = select.select([self.fd, self.wakeread], [], [])
+            if self.wakeread in readable or not self.running:
+                break
+            data = os.read(self.fd, 65536)
+            for name, mask in self._parse(data):
+                if mask & IN_Q_OVERFLOW:
+                    name = None
+                try:
+                    self.callback(name, mask)
+                except Exception as ex:
+                    if self.logger:
+                        self.logger.error(f"inotify callback failed for {name}: {ex}")
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                    self.running = False
+                    self.lost = True
+        if self.lost:
+            self._close()
+            if self.logger:
+                self.logger.warning(f"inotify watch on {self.path} lost (directory removed or replaced)")
+            if self.onexit:
+                try:
+                    self.onexit()
+                except Exception as ex:
+                    if self.logger:
+                        self.logger.error(f"inotify onexit callback failed for {self.path}: {ex}")
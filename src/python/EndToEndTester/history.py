@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# pylint: disable=line-too-long
+"""Lifecycle duration history (used to estimate if a pair can finish before
+run deadline) and list of pairs not started in previous run.
+Title                   : end-to-end-tester
+Author                  : Justas Balcas
+Email                   : jbalcas (at) es.net
+@Copyright              : Copyright (C) 2025 ESnet
+Date                    : 2025/03/14
+"""
+import os
+import threading
+from EndToEndTester.utilities import loadFileJson, dumpFileJson, checkCreateDir
+
+HISTORYFILE = "lifecycle.history"
+UNSTARTEDFILE = "unstarted.pairs"
+
+
+def pairKey(pair):
+    """Key of pair (order independent)"""
+    return "|".join(sorted(str(item) for item in pair))
+
+
+class LifecycleHistory:
+    """Keeps recent lifecycle durations per pair (and global) in workdir"""
+
+    def __init__(self, workdir, perpair=10, total=500):
+        self.fname = os.path.join(workdir, HISTORYFILE)
+        self.perpair = perpair
+        self.total = total
+        self.lock = threading.Lock()
+        checkCreateDir(workdir)
+        self.data = loadFileJson(self.fname) or {"pairs": {}, "all": []}
+
+    def record(self, pair, duration):
+        """Record lifecycle duration (seconds) of pair"""
+        with self.lock:
+            key = pairKey(pair)
+            self.data["pairs"].setdefault(key, [])
+            self.data["pairs"][key] = (self.data["pairs"][key] + [int(duration)])[-self.perpair:]
+            self.data["all"] = (self.data["all"] + [int(duration)])[-self.total:]
+            dumpFileJson(self.fname, self.data)
+
+    def estimate(self, pair, default=None):
+        """Estimated lifecycle duration of pair. Longest recent duration of the pair,
+        or 90th percentile of all recent lifecycles, or default if there is no history"""
+        with self.lock:
+            durations = self.data["pairs"].get(pairKey(pair))
+            if durations:
+                return max(durations)
+            if self.data["all"]:
+                values = sorted(self.data["all"])
+                return values[min(len(values) - 1, int(len(values) * 0.9))]
+        return default
+
+
+def loadUnstarted(workdir):
+    """Load pairs which were not started in previous run"""
+    return [tuple(pair) for pair in loadFileJson(os.path.join(workdir, UNSTARTEDFILE)) or []]
+
+
+def saveUnstarted(workdir, pairs):
+    """Save pairs which were not started in this run (scheduled first in next run)"""
+    dumpFileJson(os.path.join(workdir, UNSTARTEDFILE), [list(pair) for pair in pairs])
+
+
+_HISTORIES = {}
+_HISTORYLOCK = threading.Lock()
+
+
+def getLifecycleHistory(workdir):
+    """Get process wide lifecycle history for workdir"""
+    with _HISTORYLOCK:
+        if workdir not in _HISTORIES:
+            _HISTORIES[workdir] = LifecycleHistory(workdir)
+        return _HISTORIES[workdir]
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# pylint: disable=line-too-long
+"""Push channel from tester workers to DB Recorder (local Unix datagram socket).
+Tester notifies recorder with path of written result file, so it is recorded
+within seconds. Result file stays in workdir - if recorder is not running (or
+message is lost), it is picked up by recorder directory scan.
+Title                   : end-to-end-tester
+Author                  : Justas Balcas
+Email                   : jbalcas (at) es.net
+@Copyright              : Copyright (C) 2025 ESnet
+Date                    : 2025/03/14
+"""
+import os
+import json
+import queue
+import socket
+import threading
+
+INGESTSOCKET = "endtoend-ingest.sock"
+
+
+def pushEnabled(config):
+    """Check if push ingestion is enabled (default True)"""
+    return bool(config.get("pushingest", True))
+
+
+def getSocketPath(config):
+    """Get ingest socket path"""
+    return config.get("ingestsocket") or os.path.join(config["workdir"], INGESTSOCKET)
+
+
+def notifyRecorder(config, filename, logger=None):
+    """Notify recorder about new result file. Returns True if message was delivered to socket"""
+    if not pushEnabled(config):
+        return False
+    sockpath = getSocketPath(config)
+    if not os.path.exists(sockpath):
+        return False
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(1)
+            sock.sendto(json.dumps({"file": filename}).encode("utf-8"), sockpath)
+        return True
+    except OSError as ex:
+        if logger:
+            logger.info(f"Failed to notify recorder via {sockpath}: {ex}. Recorder will pick up file on scan")
+    return False
+
+
+class IngestServer:
+    """Receives result file paths from tester workers and queues them for recorder"""
+
+    def __init__(self, sockpath, logger=None, events=None):
+        self.sockpath = sockpath
+        self.logger = logger
+        # Queue can be shared with other event sources (e.g. inotify watcher)
+        self.queue = events if events is not None else queue.Queue()
+        self.running = False
+        self.thread = None
+        if os.path.exists(sockpath):
+            os.remove(sockpath)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(sockpath)
+        self.sock.settimeout(1)
+
+    def start(self):
+        """Start receiver thread"""
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="ingest-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop receiver thread and remove socket"""
+        self.running = False
+        if self.thread:
+            self.thread.join()
+        self.sock.close()
+        if os.path.exists(self.sockpath):
+            os.remove(self.sockpath)
+
+    def _run(self):
+        """Receive messages and queue file names"""
+        while self.running:
+            try:
+                data = self.sock.recv(65536)
+            except socket.timeout:
+                continue
+            except OSError as ex:
+                if self.logger:
+                    self.logger.error(f"Ingest socket receive failed: {ex}")
+                continue
+            try:
+                fname = json.loads(data).get("file")
+            except (ValueError, AttributeError):
+                fname = None
+            if fname:
+                self.queue.put(fname)
+            elif self.logger:
+                self.logger.warning(f"Ingest socket received not understood message: {data[:200]}")
+
+    def get(self, timeout=None):
+        """Get next pushed file name (None if timeout)"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
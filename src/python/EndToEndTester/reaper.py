@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# pylint: disable=line-too-long
+"""Bulk cleanup of leftover tester instances in SENSE-O (after incident, or
+when many instances were left uncancelled). Instances are found by alias
+("YYYY-MM-DD <part0>-<part1>-<vlan>", parts of configured entries only) and by
+uuids recorded in workdir lock files (.json.lock) and are cancelled, then
+optionally archived or deleted concurrently. Finished (and failed, kept for
+debugging) instances from result files are never touched. Safe to run many times - instances already cancelled are not
+cancelled again and instances not found in SENSE-O are counted as done.
+Title                   : end-to-end-tester
+Author                  : Justas Balcas
+Email                   : jbalcas (at) es.net
+@Copyright              : Copyright (C) 2025 ESnet
+Date                    : 2025/03/14
+"""
+import os
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from EndToEndTester.utilities import loadJson, getUTCnow
+from EndToEndTester.apiclients import getWorkflowCombinedApi, getDiscoverApi
+from EndToEndTester.tester import getAliasPart
+
+ALIASRE = re.compile(r"^\d{4}-\d{2}-\d{2} (\S+)$")
+ACTIONS = ["cancel", "archive", "delete"]
+
+
+def aliasMatches(alias, parts=None):
+    """Check if alias is tester alias. If parts are given, it must start with one of known entry parts"""
+    match = ALIASRE.match(alias or "")
+    if not match:
+        return False
+    if parts is None:
+        return True
+    return any(match.group(1).startswith(f"{part}-") for part in parts)
+
+
+def isNotFound(ex):
+    """Check if exception is SENSE-O not found"""
+    return "NOT_FOUND" in str(ex) or "404" in str(ex)
+
+
+class Reaper:
+    """Cancel and archive/delete leftover tester instances with bounded thread pool"""
+
+    def __init__(self, config, logger, **kwargs):
+        self.config = config
+        self.logger = logger
+        self.action = kwargs.get("action", "cancel")
+        if self.action not in ACTIONS:
+            raise ValueError(f"Unknown reaper action {self.action}. Supported: {ACTIONS}")
+        self.workers = int(kwargs.get("workers") or config.get("reaperworkers", 10))
+        self.search = kwargs.get("search")
+        if not self._knownParts() and not self.search:
+            raise ValueError("No entries in config (dynamic entries?) to match instance aliases. Use search to select instances")
+        self.dryrun = kwargs.get("dryrun", False)
+        self.removelocks = kwargs.get("removelocks", False)
+        self.timeout = int(config.get("timeouts", {}).get("cancel", 1200))
+        self.interval = int(config.get("statusinterval", 30))
+        self.lock = threading.Lock()
+        self.done = 0
+        self.total = 0
+        self.results = {}
+
+    def _knownParts(self):
+        """Alias parts of configured entries (empty if entries are dynamic)"""
+        return {getAliasPart(key) for key in self.config.get("entries", {})}
+
+    def _fromSense(self):
+        """Tester instances known to SENSE-O (matched by alias with configured entries, or by search only)"""
+        found = {}
+        kwargs = {"search": self.search} if self.search else {}
+        out = loadJson(getDiscoverApi(self.config).discover_service_instances_get(**kwargs))
+        # Without configured entries only instances selected by search are matched (see discover)
+        parts = self._knownParts() or None
+        for item in out.get("instances", []) if isinstance(out, dict) else out:
+            if aliasMatches(item.get("alias"), parts):
+                found[item["referenceUUID"]] = {"alias": item.get("alias"), "lockfile": None}
+        return found
+
+    def _fromWorkdir(self):
+        """Instances recorded in workdir lock files (in progress or left over by tester).
+        Result files are skipped - failed instances there are kept for debugging"""
+        found = {}
+        workdir = self.config["workdir"]
+        if not os.path.isdir(workdir):
+            return found
+        for fname in os.listdir(workdir):
+            fullpath = os.path.join(workdir, fname)
+            try:
+                if not fname.endswith(".json.lock"):
+                    continue
+                with open(fullpath, "r", encoding="utf-8") as fd:
+                    data = loadJson(fd.read())
+                if data.get("uuid"):
+                    found[data["uuid"]] = {"alias": data.get("alias"), "lockfile": fullpath}
+            except (OSError, ValueError, AttributeError) as ex:
+                self.logger.warning(f"Failed to read {fullpath}: {ex}")
+        return found
+
+    def discover(self):
+        """All tester instances to clean up (uuid: {alias, lockfile})"""
+        instances = self._fromWorkdir()
+        for si_uuid, item in self._fromSense().items():
+            instances.setdefault(si_uuid, item)
+        if self.search:
+            instances = {key: val for key, val in instances.items() if self.search in (val["alias"] or "")}
+        return instances
+
+    def _getState(self, workflowApi, si_uuid):
+        """Get instance state (None if instance is not in SENSE-O)"""
+        try:
+            status = loadJson(workflowApi.instance_get_status(si_uuid=si_uuid, verbose=True))
+        except Exception as ex:
+            if isNotFound(ex):
+                return None
+            raise
+        return status.get("state", "") if isinstance(status, dict) else str(status)
+
+    def _waitCancel(self, workflowApi, si_uuid):
+        """Wait until cancel reaches final state"""
+        starttime = getUTCnow()
+        while getUTCnow() - starttime < self.timeout:
+            state = self._getState(workflowApi, si_uuid)
+            if state is None or state in ("CANCEL - READY", "CANCEL - FAILED"):
+                return state
+            time.sleep(self.interval)
+        return "TIMEOUT"
+
+    def reapInstance(self, si_uuid):
+        """Cancel and archive/delete one instance. Returns result name"""
+        workflowApi = getWorkflowCombinedApi(self.config)
+        state = self._getState(workflowApi, si_uuid)
+        if state is None:
+            return "notfound"
+        if self.dryrun:
+            return f"dryrun ({state})"
+        if not state.startswith("CANCEL"):
+            self.logger.info(f"Cancel {si_uuid} in state {state}")
+            try:
+                workflowApi.instance_operate("cancel", si_uuid=si_uuid, force=bool("READY" not in state))
+            except Exception as ex:
+                if isNotFound(ex):
+                    return "notfound"
+                self.logger.error(f"Cancel of {si_uuid} failed: {ex}")
+        state = self._waitCancel(workflowApi, si_uuid)
+        if state is None:
+            return "notfound"
+        if state == "TIMEOUT":
+            return "canceltimeout"
+        if self.action == "cancel":
+            return "cancelled" if state == "CANCEL - READY" else "cancelfailed"
+        try:
+            if self.action == "delete":
+                workflowApi.instance_delete(si_uuid=si_uuid)
+            else:
+                workflowApi.instance_archive(si_uuid=si_uuid)
+        except Exception as ex:
+            if isNotFound(ex):
+                return "notfound"
+            raise
+        return f"{self.action}d" if state == "CANCEL - READY" else f"{self.action}d (cancel failed)"
+
+    def _reap(self, si_uuid, item):
+        """Reap instance, record result and report progress"""
+        try:
+            result = self.reapInstance(si_uuid)
+        except Exception as ex:
+            result = "error"
+            self.logger.error(f"Failed to clean up {si_uuid}: {ex}")
+        if self.removelocks and item["lockfile"] and result not in ("error", "canceltimeout") and not self.dryrun:
+            if os.path.exists(item["lockfile"]):
+                os.remove(item["lockfile"])
+        with self.lock:
+            self.done += 1
+            self.results.setdefault(result, 0)
+            self.results[result] += 1
+            self.logger.info(f"Reaper progress {self.done}/{self.total}: {si_uuid} ({item['alias']}) {result}")
+        return result
+
+    def run(self):
+        """Clean up all tester instances. Returns summary of results"""
+        instances = self.discover()
+        self.done, self.total, self.results = 0, len(instances), {}
+        self.logger.info(f"Reaper found {self.total} instances. Action: {self.action}, workers: {self.workers}, dryrun: {self.dryrun}")
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self._reap, si_uuid, item) for si_uuid, item in instances.items()]
+            for future in as_completed(futures):
+                future.result()
+        self.logger.info(f"Reaper finished: {self.results}")
+        return self.results
@@ -0,0 +1,591 @@
+#!/usr/bin/env python3
+# pylint: disable=line-too-long
+"""Result file parser of DB Recorder. Parses one result file into record
+batches (request, actions, verification, states, ping and throughput results)
+without database access, so it can run in worker processes. Batches are
+written to database by FileParser (dbrecorder).
+Title                   : end-to-end-tester
+Author                  : Justas Balcas
+Email                   : jbalcas (at) es.net
+@Copyright              : Copyright (C) 2025 ESnet
+Date                    : 2025/03/14
+"""
+import re
+import json
+import logging
+from bisect import bisect_left
+from EndToEndTester.utilities import loadJson, getLogger, getUTCnow
+from EndToEndTester.blobs import resolveBlobs, getBlobDirs
+from EndToEndTester.resultreader import loadResultFile
+from EndToEndTester.dbcalls import GBCONFIGSTATES, GBCREATESTATES
+
+
+RECORDERLOG = "/var/log/EndToEndTester/DBRecorder.log"
+# Record batches parsed from result file (written to database by FileParser)
+BATCHKEYS = ["requestentry", "actionsentries", "verificationentries", "requeststateentries", "pingresults", "throughputresults"]
+
+# Ping stdout patterns (per packet reply, summary and rtt summary line)
+PINGREPLYRE = re.compile(r"icmp_seq=(\d+).*?time=([\d.]+)")
+PINGSUMMARYRE = re.compile(r"(\d+)\s+packets transmitted,\s+(\d+)\s+received.*?(\d+(?:\.\d+)?)% packet loss")
+PINGRTTRE = re.compile(r"= ([\d.]+)/([\d.]+)/([\d.]+)/([\d.]+)")
+# iperf3 text summary line: "<rate> [KMGT]bits/sec ... sender|receiver"
+IPERFRATERE = re.compile(r"([\d.]+)\s+([KMGT]?)bits/sec.*\b(sender|receiver)\b")
+IPERFUNITS = {"": 1e-6, "K": 1e-3, "M": 1, "G": 1e3, "T": 1e6}
+# RTT histogram bucket upper bounds (ms). Last bucket counts everything above 1000ms
+RTTBUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000]
+
+
+def parsePingOutput(lines):
+    """Parse ping stdout in one pass. Returns summary (transmitted, received, packetloss,
+    rtt min/avg/max/mdev), per packet rtts and sequence gaps, reordered and duplicate replies"""
+    out = {"transmitted": 0, "received": 0, "packetloss": 0.0,
+           "rttmin": 0.0, "rttavg": 0.0, "rttmax": 0.0, "rttmdev": 0.0,
+           "rtts": [], "seqgaps": 0, "reordered": 0, "duplicates": 0}
+    seen, maxseq = set(), None
+    for line in lines:
+        if "icmp_seq=" in line:
+            match = PINGREPLYRE.search(line)
+            if not match:
+                continue
+            seq = int(match.group(1))
+            if seq in seen:
+                out["duplicates"] += 1
+                continue
+            if maxseq is not None and seq < maxseq:
+                out["reordered"] += 1
+            seen.add(seq)
+            maxseq = seq if maxseq is None else max(maxseq, seq)
+            out["rtts"].append(float(match.group(2)))
+        elif "packets transmitted" in line:
+            match = PINGSUMMARYRE.search(line)
+            if match:
+                out["transmitted"] = int(match.group(1))
+                out["received"] = int(match.group(2))
+                out["packetloss"] = float(match.group(3))
+        elif "min/avg/max" in line:
+            match = PINGRTTRE.search(line)
+            if match:
+                out["rttmin"], out["rttavg"], out["rttmax"], out["rttmdev"] = [float(val) for val in match.groups()]
+    if seen:
+        out["seqgaps"] = maxseq - min(seen) + 1 - len(seen)
+    return out
+
+
+def rttDistribution(rtts):
+    """RTT percentiles (p50/p95/p99, nearest rank) and histogram (counts per RTTBUCKETS bucket)"""
+    hist = [0] * (len(RTTBUCKETS) + 1)
+    for rtt in rtts:
+        hist[bisect_left(RTTBUCKETS, rtt)] += 1
+    out = {"samples": len(rtts), "rttp50": 0.0, "rttp95": 0.0, "rttp99": 0.0,
+           "rtthist": json.dumps(hist, separators=(",", ":"))}
+    if rtts:
+        values = sorted(rtts)
+        for key, perc in [("rttp50", 50), ("rttp95", 95), ("rttp99", 99)]:
+            out[key] = values[max(0, -(-len(values) * perc // 100) - 1)]
+    return out
+
+
+def getSiteName(config, pairval):
+    """Get Sitename of pair (or override from config)"""
+    if config.get("entriessitename", ""):
+        return config.get("entriessitename")
+    return config.get("entries", {}).get(pairval, {}).get("site", "UNKNOWN")
+
+
+# pylint: disable=too-many-instance-attributes
+class RecordParser:
+    """Parses one result file into record batches (request, actions, verification,
+    request states, ping and throughput results). Does not use database or SENSE-O,
+    so it runs in worker processes (see parseResultFile)"""
+
+    def __init__(self, config, logger=None):
+        self.config = config
+        self.logger = logger or logging.getLogger("DBRecorder")
+        self.requestentry = {}
+        self.actionsentries = []
+        self.verificationentries = []
+        self.requeststateentries = []
+        self.pingresults = []
+        self.throughputresults = []
+        self.newpingentry = {}
+        self.data = {}
+        self.fname = None
+        # Default vals if not specified by hasNetworkStatus
+        # create, verified - activated
+        # create, unverified - create-unverified
+        # cancel, verified - deactivated
+        # cancel, unverified - deactivate-error
+        self.defaultvals = {
+            "create-verified": "activated",
+            "create-unverified": "create-unverified",
+            "modifycreate-verified": "activated",
+            "modifycreate-unverified": "modify-unverified",
+            "reprovision-verified": "activated",
+            "reprovision-unverified": "reprovision-unverified",
+            "modify-verified": "activated",
+            "modify-unverified": "modify-unverified",
+            "cancel-verified": "deactivated",
+            "cancel-unverified": "cancel-unverified",
+            "cancelrep-verified": "deactivated",
+            "cancelrep-unverified": "cancel-unverified",
+            "cancelarch-verified": "deactivated",
+            "cancelarch-unverified": "cancel-unverified",
+        }
+
+    def recordinfo(self):
+        """Identify request information"""
+        pair = self.data.get("info", {}).get("pair", [])
+        if not pair or len(pair) != 2:
+            raise ValueError(f"Invalid pair information for {self.fname}")
+        uuid = self.data.get("info", {}).get("uuid", "")
+        if not uuid:
+            raise ValueError(f"Invalid uuid information for {self.fname}")
+        self.requestentry["uuid"] = uuid
+        self.requestentry["port1"] = pair[0]
+        self.requestentry["port2"] = pair[1]
+        self.requestentry["site1"] = getSiteName(self.config, pair[0])
+        self.requestentry["site2"] = getSiteName(self.config, pair[1])
+        self.requestentry["fileloc"] = self.fname
+        self.requestentry["insertdate"] = self.data.get("info", {}).get(
+            "time", getUTCnow()
+        )
+        self.requestentry["updatedate"] = self.data.get("info", {}).get(
+            "time", getUTCnow()
+        )
+        self.requestentry["requesttype"] = self.data.get("info", {}).get(
+            "requesttype", "UNSET"
+        )
+        self.requestentry["failure"] = self.identifyerrors()
+        self.requestentry["finalstate"] = (
+            self.identifyfinalstate()
+        )  # 0 - not final, 1 - final
+        self.requestentry["pathfindissue"] = self.identifyPathFindIssue()
+        self.requestentry["vlan"] = self.data["info"]["req"]["data"]["connections"][0][
+            "terminals"
+        ][0]["vlan_tag"]
+
+    def identifyfinalstate(self):
+        """Identify request information"""
+        finalstate = 0
+        if (
+            self.data.get("create", {}).get("finalstate", "") == "OK"
+            and self.data.get("cancel", {}).get("finalstate", "") == "OK"
+        ):
+            finalstate = 1
+        else:
+            self.logger.info(f"({self.requestentry['uuid']}) Not final state.")
+            self.logger.info(
+                f"({self.requestentry['uuid']}) create: {self.data.get('create', {}).get('finalstate', '')}"
+            )
+            self.logger.info(
+                f"({self.requestentry['uuid']}) cancel: {self.data.get('cancel', {}).get('finalstate', '')}"
+            )
+        return finalstate
+
+    def identifyPathFindIssue(self):
+        """Identify if there was a path finding issue"""
+        if "cannot find feasible path for connection" in self.requestentry["failure"]:
+            return 1
+        return 0
+
+    def identifyerrors(self):
+        """Identify errors from information"""
+        errmsg = ""
+        for key, lookup in {
+            "ERROR": "error",
+            "VALIDATION": "validation-error",
+            "MANIFEST": "manifest-error",
+        }.items():
+            if lookup in self.data.get("create", {}):
+                errmsg += f"{key}_CREATE: " + self.data.get("create", {}).get(
+                    lookup, ""
+                )
+            if lookup in self.data.get("cancel", {}):
+                errmsg += f"{key}_CANCEL: " + self.data.get("create", {}).get(
+                    lookup, ""
+                )
+        return errmsg
+
+    def recordactions(self):
+        """Identify request information"""
+        for key, val in self.data.get("timings", {}).items():
+            action = {
+                "uuid": self.requestentry["uuid"],
+                "action": key,
+                "insertdate": val["starttime"],
+                "updatedate": val["starttime"],
+                "site1": self.requestentry["site1"],
+                "site2": self.requestentry["site2"],
+            }
+            self.actionsentries.append(action)
+
+    def _identifyNetworkStatus(self, inputVal, key):
+        """Record all sites it went through"""
+        # pylint: disable=too-many-nested-blocks
+        netstat = []
+        for ckey, cval in inputVal.get(key, {}).items():
+            if ckey.endswith("hasNetworkStatus"):
+                for netdict in cval:
+                    if netdict.get("value") and netdict.get("value") in inputVal:
+                        for nkey, nval in inputVal[netdict["value"]].items():
+                            if nkey.endswith("value"):
+                                for netstatus in nval:
+                                    if netstatus.get("value"):
+                                        netstat.append(netstatus.get("value"))
+        return netstat
+
+    def _recordIdentifySites(self, inputVal, checkkey):
+        """Record all sites it went through"""
+        output = {}
+        for key in inputVal.keys():
+            for mapkey, mapsite in self.config.get("mappings", {}).items():
+                if key.startswith(mapkey):
+                    netstat = self._identifyNetworkStatus(inputVal, key)
+                    if netstat or checkkey.startswith("cancel"):
+                        output.setdefault(mapkey, [])
+                        output[mapkey].append({"site": mapsite, "netstat": netstat})
+                        break
+        return output
+
+    def _filternetstats(self, inputVal, defaultstatus):
+        """Filter out netstats of equal entries"""
+        output = []
+        site = ""
+        for netstat in inputVal:
+            if netstat["site"] != site:
+                site = netstat["site"]
+            if "netstat" not in netstat:
+                if defaultstatus not in output:
+                    output.append(defaultstatus)
+                continue
+            if len(netstat["netstat"]) == 0:
+                if defaultstatus not in output:
+                    output.append(defaultstatus)
+                continue
+            for stat in netstat["netstat"]:
+                if stat not in output:
+                    output.append(stat)
+        return output, site
+
+    def recordverification(self):
+        """Identify request information"""
+        # This part is most fun to loop over all verification info and prepare database entries
+        # do this for create and verified additions
+        output = {}
+        for key in [
+            "create",
+            "modifycreate",
+            "cancelrep",
+            "reprovision",
+            "modify",
+            "cancel",
+            "cancelarch",
+        ]:
+            if key not in self.data:
+                continue
+            output.setdefault(key, {"verified": {}, "unverified": {}})
+            # Load all verified, unverivied parts. Embedded JSON is decoded one part at a time
+            # (only if not empty) and validation is dropped once used (not needed by later steps)
+            validation = self.data[key].pop("validation", None) or {}
+            for part, verified in [("additionVerified", "verified"), ("additionUnverified", "unverified"),
+                                   ("reductionVerified", "verified"), ("reductionUnverified", "unverified")]:
+                if validation.get(part):
+                    tmpdata = loadJson(validation.pop(part))
+                    output[key][verified].update(self._recordIdentifySites(tmpdata, key))
+
+        for key, val in output.items():
+            for key1, val1 in val.items():
+                for ckey, cval in val1.items():
+                    # Identify all final network status
+                    # Need to pass defaultstatus - based on keys
+                    if not self.defaultvals.get(f"{key}-{key1}"):
+                        self.logger.debug(
+                            f"({self.requestentry['uuid']}) No default value for {key}-{key1}"
+                        )
+                        continue
+                    netstatus, site = self._filternetstats(
+                        cval, self.defaultvals[f"{key}-{key1}"]
+                    )
+                    if len(netstatus) == 0:
+                        self.logger.debug(
+                            f"({self.requestentry['uuid']}) No network status for {key}-{key1}-{ckey}-{site}"
+                        )
+                        continue
+                    if not site:
+                        self.logger.debug(
+                            f"({self.requestentry['uuid']}) No site for {key}-{key1}-{ckey}"
+                        )
+                        continue
+                    errmsg = ""
+                    for netstat in netstatus:
+                        if netstat != self.defaultvals[f"{key}-{key1}"]:
+                            errmsg += f"{site} {ckey} Network status: {netstat}, "
+                        item = {
+                            "uuid": self.requestentry["uuid"],
+                            "action": key,
+                            "netstatus": netstat,
+                            "site": site,
+                            "urn": ckey,
+                            "verified": 1 if key1 == "verified" else 0,
+                            "site1": self.requestentry["site1"],
+                            "site2": self.requestentry["site2"],
+                            "insertdate": self.requestentry["insertdate"],
+                            "updatedate": self.requestentry["updatedate"],
+                        }
+                        self.verificationentries.append(item)
+                    if errmsg:
+                        self.requestentry["failure"] = (
+                            errmsg + self.requestentry["failure"]
+                        )
+
+    def _calculateTotalTime(self, tmplist):
+        """Calculate total time to transition from one state to another"""
+        lasttimestamp = 0
+        firststart = 0
+        for stfind in GBCREATESTATES:
+            for configstate in GBCONFIGSTATES:
+                findstate = f"{stfind[0]}{configstate}{stfind[1]}"
+                # loop via index via tmplist
+                total = len(tmplist)
+                counter = 0
+                while counter < total:
+                    fullstate = (
+                        tmplist[counter]["state"]
+                        + tmplist[counter]["configstate"]
+                        + tmplist[counter]["action"])
+                    if fullstate == findstate:
+                        # pop item from list
+                        item = tmplist.pop(counter)
+                        if lasttimestamp == 0:
+                            lasttimestamp = item["entertime"]
+                            firststart = item["entertime"]
+                        else:
+                            # This is the diff time spent in previous state.
+                            diff = item["entertime"] - lasttimestamp
+                            self.requeststateentries[-1]["totaltime"] = (
+                                diff if diff > 0 else 0
+                            )
+                            self.requeststateentries[-1]["sincestart"] = (
+                                item["entertime"] - firststart
+                            )
+                            lasttimestamp = item["entertime"]
+                            self.logger.info(
+                                f"({self.requestentry['uuid']}) Found state transition: {item['state']} - {item['configstate']} - {item['action']} - {diff}. Since start: {item['entertime'] - firststart}"
+                            )
+                        self.requeststateentries.append(item)
+                        # If tmplist len is 0, now this is the last item
+                        if len(tmplist) == 0:
+                            # Need to get final state timestamp and update the diff and sincestart
+                            tsreq = self.data.get(item['action'], {}).get('finalstatetimestamp', None)
+                            if tsreq:
+                                diff = item["entertime"] - tsreq
+                                self.requeststateentries[-1]["totaltime"] = diff if diff > 0 else 0
+                                self.requeststateentries[-1]["sincestart"] = item["entertime"] - firststart
+                        counter = total
+                    counter += 1
+        # If we still have entries remaining here, we need to loop via them and add
+        for item in tmplist:
+            self.logger.info(f"Was not able to identify state transition for: {item}")
+            self.requeststateentries.append(item)
+
+        # 2. Loop via all items and see if we can find the next state
+        # 3. If we find the next state - we need to calculate time difference from entertime to next state
+
+    def recordrequeststate(self):
+        """Identify request information"""
+        tmplist = []
+        for key, val in self.data.get("timings", {}).items():
+            for key1, val1 in val.items():
+                if not isinstance(val1, dict):
+                    continue
+                for ckey, cval in val1.get("configStatus", {}).items():
+                    item = {
+                        "uuid": self.requestentry["uuid"],
+                        "action": key,  # create, cancel, cancelrep...
+                        "state": key1,  # CANCEL - READY ...
+                        "configstate": ckey,  # STABLE, UNSTABLE...
+                        "entertime": cval,
+                        "site1": self.requestentry["site1"],
+                        "site2": self.requestentry["site2"],
+                        "totaltime": 0,  # This will be updated later
+                        "sincestart": 0,  # This will be updated later
+                        "insertdate": self.requestentry["insertdate"],
+                        "updatedate": self.requestentry["updatedate"],
+                    }
+                    tmplist.append(item)
+        # Now we need to calculate total time for each entry
+        self._calculateTotalTime(tmplist)
+
+    def __resetpingentry(self):
+        """Reset ping entry"""
+        self.newpingentry = {
+            "uuid": self.requestentry["uuid"],
+            "site1": self.requestentry["site1"],
+            "site2": self.requestentry["site2"],
+            "action": "",
+            "insertdate": self.requestentry["insertdate"],
+            "updatedate": self.requestentry["updatedate"],
+            "port1": self.requestentry["port1"],
+            "port2": self.requestentry["port2"],
+            "ipto": "",
+            "ipfrom": "",
+            "failed": 0,
+            "transmitted": 0,
+            "received": 0,
+            "packetloss": 0.0,
+            "rttmin": 0.0,
+            "rttavg": 0.0,
+            "rttmax": 0.0,
+            "rttmdev": 0.0,
+            "samples": 0,
+            "seqgaps": 0,
+            "reordered": 0,
+            "duplicates": 0,
+            "rttp50": 0.0,
+            "rttp95": 0.0,
+            "rttp99": 0.0,
+            "rtthist": "",
+        }
+
+    def recordpingresults(self, action):
+        """Identify ping results information"""
+        for item in (
+            self.data.get(action, {})
+            .get("pingresults", {})
+            .get("final", {})
+            .get("results", [])
+        ):
+            self.__resetpingentry()
+            self.newpingentry["action"] = action
+            output = loadJson(item.get("output", "{}"))
+            # load requestdict and get ipto
+            requestdict = loadJson(item.get("requestdict", "{}"))
+            # get ipfrom
+            self.newpingentry["ipto"] = requestdict.get("ip", "")
+            ipfrom = "unknown"
+            if requestdict["hostname"] in self.data.get(action, {}).get(
+                "pingresults", {}
+            ).get("submit", {}).get("hostips", {}):
+                ipfrom = self.data[action]["pingresults"]["submit"]["hostips"][
+                    requestdict["hostname"]
+                ]
+            self.newpingentry["ipfrom"] = ipfrom
+            # Identify vlan from request
+            self.newpingentry["vlanfrom"] = "any"
+            self.newpingentry["vlanto"] = "any"
+            if self.newpingentry["ipto"] in self.data.get(action, {}).get(
+                "pingresults", {}
+            ).get("submit", {}).get("ipvlans", {}):
+                self.newpingentry["vlanto"] = self.data[action]["pingresults"][
+                    "submit"
+                ]["ipvlans"][self.newpingentry["ipto"]]
+            if self.newpingentry["ipfrom"] in self.data.get(action, {}).get(
+                "pingresults", {}
+            ).get("submit", {}).get("ipvlans", {}):
+                self.newpingentry["vlanfrom"] = self.data[action]["pingresults"][
+                    "submit"
+                ]["ipvlans"][self.newpingentry["ipfrom"]]
+            # parse the stdout (summary, per packet rtts and sequence)
+            parsed = parsePingOutput(output.get("stdout", []))
+            rtts = parsed.pop("rtts")
+            self.newpingentry.update(parsed)
+            self.newpingentry.update(rttDistribution(rtts))
+            # Identify if ping failed
+            if self.newpingentry["transmitted"] == 0:
+                self.newpingentry["failed"] = 1
+            if self.newpingentry["received"] == 0:
+                self.newpingentry["failed"] = 1
+            if self.newpingentry["packetloss"] > 0.0:
+                self.newpingentry["failed"] = 1
+            self.pingresults.append(self.newpingentry)
+
+    @staticmethod
+    def _parsethroughput(output):
+        """Achieved throughput (Mbit/s) from iperf3 output (json or text). None if not found"""
+        stdout = output.get("stdout", [])
+        jsonout = loadJson("\n".join(stdout)) if stdout and stdout[0].strip().startswith("{") else {}
+        if jsonout.get("end"):
+            summary = jsonout["end"].get("sum_received") or jsonout["end"].get("sum") or {}
+            if "bits_per_second" in summary:
+                return float(summary["bits_per_second"]) / 1e6
+        sender = None
+        for line in stdout:
+            if "bits/sec" not in line:
+                continue
+            match = IPERFRATERE.search(line)
+            if match:
+                rate = float(match.group(1)) * IPERFUNITS[match.group(2)]
+                if match.group(3) == "receiver":
+                    return rate
+                sender = rate
+        return sender
+
+    def recordthroughputresults(self, action):
+        """Identify throughput results information"""
+        throughput = self.data.get(action, {}).get("throughputresults", {})
+        ipvlans = self.data.get(action, {}).get("pingresults", {}).get("submit", {}).get("ipvlans", {})
+        for item in throughput.get("results", []):
+            requested = float(item.get("requested", throughput.get("requested", 0)) or 0)
+            achieved = None
+            clientresult = item.get("clientresult") or {}
+            if clientresult.get("state") not in ["new", "active", None]:
+                achieved = self._parsethroughput(loadJson(clientresult.get("output", "{}")))
+            self.throughputresults.append({
+                "uuid": self.requestentry["uuid"],
+                "site1": self.requestentry["site1"],
+                "site2": self.requestentry["site2"],
+                "action": action,
+                "port1": self.requestentry["port1"],
+                "port2": self.requestentry["port2"],
+                "hostfrom": item.get("hostfrom", ""),
+                "hostto": item.get("hostto", ""),
+                "ipfrom": item.get("ipfrom", ""),
+                "ipto": item.get("ipto", ""),
+                "vlanfrom": ipvlans.get(item.get("ipfrom"), "any"),
+                "vlanto": ipvlans.get(item.get("ipto"), "any"),
+                "insertdate": self.requestentry["insertdate"],
+                "updatedate": self.requestentry["updatedate"],
+                "failed": 1 if achieved is None else 0,
+                "requested": requested,
+                "achieved": achieved or 0.0,
+                "ratio": (achieved or 0.0) / requested if requested else 0.0,
+            })
+
+    def recorddata(self):
+        """Identify request information"""
+        self.recordinfo()
+        self.recordactions()
+        self.recordverification()
+        self.recordrequeststate()
+        for key in ["create", "reprovision", "modify", "modifycreate"]:
+            self.recordpingresults(key)
+            self.recordthroughputresults(key)
+
+    def batches(self):
+        """Record batches and data needed by archiver"""
+        out = {key: getattr(self, key) for key in BATCHKEYS}
+        out["archivedata"] = {"cancel": {"finalstate": self.data.get("cancel", {}).get("finalstate", "")},
+                              "blobdir": self.data.get("blobdir")}
+        return out
+
+
+def parseResultFile(fullpath, config):
+    """Parse result file into record batches (pure - runs in worker process).
+    Returns batches, or {"error": message} if file can not be parsed"""
+    parser = RecordParser(config)
+    parser.fname = fullpath
+    try:
+        parser.data = loadResultFile(fullpath)
+        if not parser.data:
+            return {"error": f"Failed to load {fullpath}"}
+        if parser.data.get("blobdir"):
+            parser.data = resolveBlobs(parser.data, getBlobDirs(config["workdir"], fullpath, parser.data["blobdir"]))
+        parser.recorddata()
+    except Exception as ex:
+        return {"error": str(ex)}
+    return parser.batches()
+
+
+def initParserProcess():
+    """Worker process initializer (log to recorder log file)"""
+    getLogger(name="DBRecorder", logFile=RECORDERLOG)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# pylint: disable=line-too-long
+"""Result file reader for DB Recorder. Only fields used by recorder are kept
+(RESULTFIELDS) - manifests, responses and requests of phases are dropped, so
+their blobs are never loaded. If ijson is installed, file is parsed as stream
+(plain, gzip or zstd compressed) and dropped fields are never built in memory,
+otherwise file is loaded with json and projected.
+Title                   : end-to-end-tester
+Author                  : Justas Balcas
+Email                   : jbalcas (at) es.net
+@Copyright              : Copyright (C) 2025 ESnet
+Date                    : 2025/03/14
+"""
+import os
+import gzip
+import json
+from EndToEndTester.utilities import decompressData, GZIPMAGIC, ZSTDMAGIC
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+PHASES = ["create", "modifycreate", "cancelrep", "reprovision", "modify", "cancel", "cancelarch"]
+PHASEFIELDS = ["finalstate", "finalstatetimestamp", "error", "validation-error", "manifest-error",
+               "validation", "pingresults", "throughputresults"]
+LOADERRORS = (json.JSONDecodeError, OSError, EOFError, ValueError) + ((ijson.JSONError,) if ijson else ())
+RESULTFIELDS = frozenset(["info", "timings", "blobdir"] + [f"{phase}.{field}" for phase in PHASES for field in PHASEFIELDS])
+
+
+def _setPath(out, path, value):
+    """Set value in nested dict by dotted path"""
+    parts = path.split(".")
+    for part in parts[:-1]:
+        out = out.setdefault(part, {})
+    out[parts[-1]] = value
+
+
+def projectResult(data, fields=RESULTFIELDS):
+    """Keep only fields (dotted paths) of result"""
+    out = {}
+    for field in fields:
+        value = data
+        for part in field.split("."):
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            _setPath(out, field, value)
+    return out
+
+
+def _openStream(filename):
+    """Open result file as (decompressed) binary stream"""
+    with open(filename, "rb") as fd:
+        magic = fd.read(4)
+    if magic.startswith(GZIPMAGIC):
+        return gzip.open(filename, "rb")
+    if magic.startswith(ZSTDMAGIC):
+        if not zstandard:
+            raise ValueError("File is zstd compressed, but zstandard module is not available")
+        return zstandard.ZstdDecompressor().stream_reader(open(filename, "rb"), closefd=True)  # pylint: disable=consider-using-with
+    return open(filename, "rb")  # pylint: disable=consider-using-with
+
+
+def _streamProject(stream, fields):
+    """Parse stream with ijson and build only fields (dotted paths)"""
+    out = {}
+    builder, target = None, None
+    for prefix, event, value in ijson.parse(stream, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == target and event in ("end_map", "end_array"):
+                _setPath(out, target, builder.value)
+                builder = None
+            continue
+        if prefix not in fields:
+            continue
+        if event in ("start_map", "start_array"):
+            builder, target = ijson.ObjectBuilder(), prefix
+            builder.event(event, value)
+        elif event not in ("map_key", "end_map", "end_array"):
+            _setPath(out, prefix, value)
+    return out
+
+
+def loadResultFile(filename, fields=RESULTFIELDS):
+    """Load fields of result file (plain, gzip or zstd compressed JSON). Empty dict if file can not be loaded"""
+    if not os.path.isfile(filename):
+        print(f"Input {filename} is not a file. return empty dict")
+        return {}
+    try:
+        if ijson:
+            with _openStream(filename) as stream:
+                return _streamProject(stream, fields)
+        with open(filename, "rb") as fd:
+            return projectResult(json.loads(decompressData(fd.read())), fields)
+    except LOADERRORS as ex:
+        print(f"Error in loading file: {ex}")
+    return {}
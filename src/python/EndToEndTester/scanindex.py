@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# pylint: disable=line-too-long
+"""DB Recorder scan state index. Keeps inode, mtime, size and last outcome of
+each result file in workdir, so directory scan parses only new or changed
+files. Files which are locked (waiting for SENSE-O or expiry) keep request
+entry and data needed by Archiver, so archive check runs without parsing.
+Title                   : end-to-end-tester
+Author                  : Justas Balcas
+Email                   : jbalcas (at) es.net
+@Copyright              : Copyright (C) 2025 ESnet
+Date                    : 2025/03/14
+"""
+import os
+import threading
+from EndToEndTester.utilities import loadFileJson, dumpFileJson, checkCreateDir
+
+SCANINDEXFILE = "recorder.scanindex"
+
+
+def fileStat(fullpath):
+    """File identity (inode, mtime, size). None if file is gone"""
+    try:
+        stat = os.stat(fullpath)
+    except OSError:
+        return None
+    return {"inode": stat.st_ino, "mtime": stat.st_mtime, "size": stat.st_size}
+
+
+class ScanIndex:
+    """Per workdir index of result files (file name: stat, outcome, nextcheck and archive data)"""
+
+    def __init__(self, workdir):
+        self.fname = os.path.join(workdir, SCANINDEXFILE)
+        self.lock = threading.Lock()
+        self.changed = False
+        checkCreateDir(workdir)
+        self.data = loadFileJson(self.fname) or {}
+
+    def unchanged(self, fullpath):
+        """Index entry of file if file has not changed since it was recorded (otherwise None)"""
+        stat = fileStat(fullpath)
+        with self.lock:
+            entry = self.data.get(os.path.basename(fullpath))
+        if not stat or not entry:
+            return None
+        if any(entry.get(key) != stat[key] for key in stat):
+            return None
+        return entry
+
+    def update(self, fullpath, outcome, nextcheck=0, **kwargs):
+        """Record outcome of file (kwargs are kept with entry, e.g. requestentry and archivedata)"""
+        stat = fileStat(fullpath)
+        with self.lock:
+            if not stat:
+                self.data.pop(os.path.basename(fullpath), None)
+            else:
+                self.data[os.path.basename(fullpath)] = dict(stat, outcome=outcome, nextcheck=nextcheck, **kwargs)
+            self.changed = True
+
+    def remove(self, fullpath):
+        """Remove file from index"""
+        with self.lock:
+            if self.data.pop(os.path.basename(fullpath), None) is not None:
+                self.changed = True
+
+    def prune(self, present):
+        """Remove files which are no longer in workdir"""
+        with self.lock:
+            for name in set(self.data) - set(present):
+                del self.data[name]
+                self.changed = True
+
+    def save(self):
+        """Write index to workdir (only if changed)"""
+        with self.lock:
+            if self.changed:
+                dumpFileJson(self.fname, self.data)
+                self.changed = False
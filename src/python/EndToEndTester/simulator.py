@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+# pylint: disable=line-too-long
+"""In-process stand-in for SENSE-O (WorkflowCombinedApi, WorkflowPhasedApi, DiscoverApi)
+and SENSE-SiteRM (DebugApi). Used for load and scale testing without touching
+production SENSE-O. Enabled via config:
+
+simulator:
+  enabled: true
+  seed: 1                   # Random seed (optional)
+  timescale: 1.0            # Multiplier for all simulated delays
+  latency:                  # API call latency (seconds)
+    sense: {distribution: lognormal, mean: 0.2, sigma: 0.5}
+    siterm: {distribution: uniform, min: 0.05, max: 0.3}
+  transition: {distribution: exponential, mean: 2}  # Time spent in each SENSE-O state
+  pingduration: 1.0         # Multiplier of requested ping time until debug action finishes
+  throughput: {distribution: uniform, min: 800, max: 1000}  # iperf achieved bitrate (Mbit/s)
+  failures:                 # Probabilities (0..1)
+    create: 0.01            # CREATE - FAILED
+    cancel: 0.01            # CANCEL - FAILED
+    reprovision: 0.01       # REINSTATE - FAILED
+    modify: 0.01            # MODIFY - FAILED
+    pathfind: 0.05          # guaranteedCapped: cannot find feasible path for connection
+    unverified: 0.05        # Validation reports unverified resources
+    http: 0.0               # Any API call raises an exception
+    pingsubmit: 0.0         # SiteRM refuses ping submission
+    pingloss: 0.05          # Ping reports packet loss
+    pingtimeout: 0.0        # Debug action never finishes
+
+Distributions: fixed (mean), uniform (min, max), exponential (mean),
+normal (mean, sigma), lognormal (mean, sigma).
+Title                   : end-to-end-tester
+Author                  : Justas Balcas
+Email                   : jbalcas (at) es.net
+@Copyright              : Copyright (C) 2025 ESnet
+Date                    : 2025/03/14
+"""
+import math
+import time
+import json
+import uuid
+import random
+import threading
+from EndToEndTester.utilities import loadJson, getUTCnow
+
+SUBSTATES = ["PENDING", "COMPILED", "PROPAGATED", "COMMITTING", "COMMITTED"]
+PHASES = {
+    "provision": ("CREATE", "create"),
+    "cancel": ("CANCEL", "cancel"),
+    "reprovision": ("REINSTATE", "reprovision"),
+    "modify": ("MODIFY", "modify"),
+}
+
+
+def simulatorEnabled(config):
+    """Check if simulator is enabled in config"""
+    return bool((config or {}).get("simulator", {}).get("enabled", False))
+
+
+class SimOrchestrator:
+    """Shared simulated state of SENSE-O instances and SiteRM debug actions"""
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, config):
+        self.config = config
+        self.simconfig = config.get("simulator", {})
+        self.failures = self.simconfig.get("failures", {})
+        self.timescale = float(self.simconfig.get("timescale", 1.0))
+        self.random = random.Random(self.simconfig.get("seed"))
+        self.lock = threading.Lock()
+        self.instances = {}
+        self.debugactions = {}
+        self.calls = {}
+        self.debugid = 0
+
+    # ---------------------------------------------------------------
+    # Helpers
+    # ---------------------------------------------------------------
+    def sample(self, spec, default=0.0):
+        """Sample value (seconds) from distribution spec"""
+        if spec is None:
+            return default * self.timescale
+        if isinstance(spec, (int, float)):
+            return float(spec) * self.timescale
+        dist = spec.get("distribution", "fixed")
+        mean = float(spec.get("mean", default))
+        with self.lock:
+            if dist == "uniform":
+                value = self.random.uniform(float(spec.get("min", 0)), float(spec.get("max", 2 * mean)))
+            elif dist == "exponential":
+                value = self.random.expovariate(1.0 / mean) if mean > 0 else 0.0
+            elif dist == "normal":
+                value = self.random.gauss(mean, float(spec.get("sigma", mean / 4)))
+            elif dist == "lognormal":
+                sigma = float(spec.get("sigma", 0.5))
+                value = self.random.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma) if mean > 0 else 0.0
+            else:
+                value = mean
+        return max(0.0, value) * self.timescale
+
+    def chance(self, key):
+        """Random failure decision for failure key"""
+        prob = float(self.failures.get(key, 0.0))
+        if prob <= 0:
+            return False
+        with self.lock:
+            return self.random.random() < prob
+
+    def call(self, group, name, si_uuid=None):
+        """Account API call, apply latency and random http failures"""
+        with self.lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if si_uuid and si_uuid in self.instances:
+                self.instances[si_uuid]["calls"].setdefault(name, 0)
+                self.instances[si_uuid]["calls"][name] += 1
+        delay = self.sample(self.simconfig.get("latency", {}).get(group))
+        if delay:
+            time.sleep(delay)
+        if self.chance("http"):
+            raise ValueError(f"Returned code 503 with error 'Simulated failure of {name}'")
+
+    def _getInstance(self, si_uuid):
+        """Get instance or raise not found (same as SENSE-O)"""
+        if si_uuid not in self.instances or self.instances[si_uuid]["deleted"]:
+            raise ValueError(f"Returned code 404 with error NOT_FOUND. Service instance {si_uuid} was not found")
+        return self.instances[si_uuid]
+
+    def _getSite(self, urn):
+        """Get sitename for urn from config"""
+        site = self.config.get("entries", {}).get(urn, {}).get("site")
+        if site:
+            return site
+        for mapkey, mapsite in self.config.get("mappings", {}).items():
+            if urn.startswith(mapkey):
+                return mapsite
+        return "T0_SIMULATED"
+
+    # ---------------------------------------------------------------
+    # SENSE-O simulation
+    # ---------------------------------------------------------------
+    def newInstance(self):
+        """New instance uuid"""
+        si_uuid = str(uuid.uuid4())
+        with self.lock:
+            self.instances[si_uuid] = {
+                "uuid": si_uuid, "schedule": [(time.time(), "CREATE - PENDING", "UNKNOWN")],
+                "intent": {}, "alias": "", "archived": False, "deleted": False,
+                "created": time.time(), "finished": None, "calls": {}, "ipv6": {},
+            }
+        return si_uuid
+
+    def create(self, si_uuid, intent):
+        """Create instance intent (raises path finding issue if simulated)"""
+        instance = self._getInstance(si_uuid)
+        qos = intent["data"]["connections"][0].get("bandwidth", {}).get("qos_class", "")
+        if qos == "guaranteedCapped" and self.chance("pathfind"):
+            raise ValueError("Returned code 400 with error 'cannot find feasible path for connection 'Connection 1''")
+        with self.lock:
+            instance["intent"] = intent
+            instance["alias"] = intent.get("alias", "")
+        return {"service_uuid": si_uuid, "intent_uuid": str(uuid.uuid4())}
+
+    def operate(self, si_uuid, action):
+        """Start phase (provision/cancel/reprovision/modify) and schedule state progression"""
+        instance = self._getInstance(si_uuid)
+        phase, failkey = PHASES[action]
+        steps = [f"{phase} - {substate}" for substate in SUBSTATES]
+        now = time.time()
+        schedule = []
+        failat = None
+        if self.chance(failkey):
+            with self.lock:
+                failat = self.random.randint(1, len(steps))
+        for idx, state in enumerate(steps):
+            now += self.sample(self.simconfig.get("transition"), 1.0)
+            if failat is not None and idx >= failat:
+                schedule.append((now, f"{phase} - FAILED", "UNSTABLE"))
+                break
+            schedule.append((now, state, "UNKNOWN"))
+        else:
+            now += self.sample(self.simconfig.get("transition"), 1.0)
+            schedule.append((now, f"{phase} - READY", "UNSTABLE"))
+            now += self.sample(self.simconfig.get("transition"), 1.0)
+            schedule.append((now, f"{phase} - READY", "STABLE"))
+        with self.lock:
+            instance["schedule"] = schedule
+
+    def status(self, si_uuid, verbose=False):
+        """Current status of instance"""
+        instance = self._getInstance(si_uuid)
+        now = time.time()
+        state, configstate = instance["schedule"][0][1:]
+        for timestamp, tmpstate, tmpconfig in instance["schedule"]:
+            if timestamp > now:
+                break
+            state, configstate = tmpstate, tmpconfig
+        if not verbose:
+            return state
+        superstate, substate = state.split(" - ", 1)
+        return {"referenceUUID": si_uuid, "alias": instance["alias"], "state": state,
+                "superState": superstate, "subState": substate, "configState": configstate,
+                "archived": instance["archived"], "locked": False}
+
+    def delete(self, si_uuid):
+        """Delete instance"""
+        instance = self._getInstance(si_uuid)
+        with self.lock:
+            instance["deleted"] = True
+            instance["finished"] = time.time()
+
+    def archive(self, si_uuid):
+        """Archive instance"""
+        instance = self._getInstance(si_uuid)
+        with self.lock:
+            instance["archived"] = True
+            instance["finished"] = time.time()
+
+    def _instanceHosts(self, si_uuid):
+        """Generate hosts (sitename:hostname) and IPs of instance terminals"""
+        instance = self._getInstance(si_uuid)
+        hosts = []
+        for idx, terminal in enumerate(instance["intent"].get("data", {}).get("connections", [{}])[0].get("terminals", [])):
+            uri = terminal.get("uri", f"urn:ogf:network:simulated:2025:host{idx}")
+            hostname = uri.split(":")[-1] if uri.split(":")[-1] != "+" else uri.split(":")[-2]
+            vlan = terminal.get("vlan_tag", "any")
+            vlan = str(3000 + idx) if vlan == "any" else vlan
+            ipv6 = instance["ipv6"].setdefault(uri, f"fc00:{abs(hash(si_uuid)) % 65535:x}::{idx + 1}/64")
+            hosts.append({"uri": uri, "site": self._getSite(uri), "hostname": hostname, "vlan": vlan, "ipv6": ipv6})
+        return hosts
+
+    def manifest(self, si_uuid, template):
+        """Fill manifest template"""
+        if "All Endpoint Ports" in template:
+            ports = [{"URI": urn} for urn in self.config.get("entries", {})]
+            return {"jsonTemplate": json.dumps({"All Endpoint Ports": ports})}
+        ports = []
+        for host in self._instanceHosts(si_uuid):
+            ports.append({"Port": host["uri"], "Name": host["hostname"], "Vlan": host["vlan"],
+                          "Mac": "?port_mac?", "IPv6": "?port_ipv6?", "IPv4": "?port_ipv4?",
+                          "Node": host["hostname"], "Peer": "?peer?", "Site": host["site"],
+                          "Host": [{"Interface": "eth0", "Name": f"{host['site']}:{host['hostname']}",
+                                    "IPv4": "?ipv4?", "IPv6": host["ipv6"], "Mac": "?mac?"}]})
+        return {"jsonTemplate": json.dumps({"Ports": ports})}
+
+    def verify(self, si_uuid):
+        """Validation output (same structure as SENSE-O verify)"""
+        instance = self._getInstance(si_uuid)
+        verified, unverified = {}, {}
+        for host in self._instanceHosts(si_uuid):
+            urn = f"{host['uri']}:vlanport+{host['vlan']}"
+            statusurn = f"{urn}:netstatus"
+            netstatus = "activated"
+            target = verified
+            if self.chance("unverified"):
+                netstatus = "activate-error"
+                target = unverified
+            target[urn] = {"http://schemas.ogf.org/mrs/2013/12/topology#hasNetworkStatus": [{"value": statusurn}]}
+            target[statusurn] = {"http://schemas.ogf.org/mrs/2013/12/topology#value": [{"value": netstatus}]}
+        return {"referenceUUID": si_uuid, "state": self.status(si_uuid),
+                "verified": not unverified, "archived": instance["archived"],
+                "additionVerified": json.dumps(verified), "additionUnverified": json.dumps(unverified),
+                "reductionVerified": json.dumps({}), "reductionUnverified": json.dumps({})}
+
+    def instances_list(self, search=None):
+        """List of all instances (discover service instances)"""
+        out = []
+        with self.lock:
+            for si_uuid, instance in self.instances.items():
+                if instance["deleted"]:
+                    continue
+                if search and search not in instance["alias"]:
+                    continue
+                out.append({"referenceUUID": si_uuid, "alias": instance["alias"],
+                            "archived": instance["archived"]})
+        for item in out:
+            item["state"] = self.status(item["referenceUUID"])
+        return {"instances": out}
+
+    # ---------------------------------------------------------------
+    # SiteRM simulation
+    # ---------------------------------------------------------------
+    def submitDebug(self, request):
+        """Submit debug action"""
+        if self.chance("pingsubmit"):
+            return {"Status": "FAILED", "error": "Simulated SiteRM submit failure"}, False, None
+        with self.lock:
+            self.debugid += 1
+            debugid = self.debugid
+        duration = float(request.get("time", 60)) * float(self.simconfig.get("pingduration", 1.0)) * self.timescale
+        finishat = time.time() + duration if not self.chance("pingtimeout") else float("inf")
+        item = {"id": debugid, "hostname": request.get("hostname"), "sitename": request.get("sitename"),
+                "requestdict": json.dumps(request), "insertdate": getUTCnow(), "updatedate": getUTCnow(),
+                "state": "new", "output": json.dumps({}), "finishat": finishat,
+                "loss": self.chance("pingloss")}
+        with self.lock:
+            self.debugactions[debugid] = item
+        return {"ID": debugid, "Status": "OK"}, True, None
+
+    def _pingOutput(self, item):
+        """Generate ping stdout for debug action"""
+        request = loadJson(item["requestdict"])
+        count = max(1, int(float(request.get("time", 60)) / max(float(request.get("interval", 5)), 0.001)))
+        ipaddr = request.get("ip", "::1")
+        lines = [f"PING {ipaddr}({ipaddr}) {request.get('packetsize', 56)} data bytes"]
+        rtts = []
+        with self.lock:
+            for seq in range(1, count + 1):
+                if item["loss"] and self.random.random() < 0.3:
+                    continue
+                rtt = self.random.lognormvariate(math.log(20), 0.2)
+                rtts.append(rtt)
+                lines.append(f"64 bytes from {ipaddr}: icmp_seq={seq} ttl=64 time={rtt:.3f} ms")
+        received = len(rtts)
+        loss = 100.0 * (count - received) / count
+        lines.append(f"--- {ipaddr} ping statistics ---")
+        lines.append(f"{count} packets transmitted, {received} received, {loss:.4g}% packet loss, time {int(count * float(request.get('interval', 5)) * 1000)}ms")
+        if rtts:
+            avg = sum(rtts) / received
+            mdev = math.sqrt(sum((rtt - avg) ** 2 for rtt in rtts) / received)
+            lines.append(f"rtt min/avg/max/mdev = {min(rtts):.3f}/{avg:.3f}/{max(rtts):.3f}/{mdev:.3f} ms")
+        return {"stdout": lines, "stderr": [], "exitCode": 0 if received else 1}
+
+    def _iperfOutput(self, item):
+        """Generate iperf3 stdout for debug action (client reports achieved bitrate)"""
+        request = loadJson(item["requestdict"])
+        if request.get("type") == "iperf-server":
+            return {"stdout": [f"Server listening on {request.get('port', 5201)}"], "stderr": [], "exitCode": 0}
+        ttime = float(request.get("runtime", request.get("time", 30)))
+        # Bitrate is not a delay - timescale does not apply
+        rate = self.sample(self.simconfig.get("throughput"), 900.0) / (self.timescale or 1.0)
+        transfer = rate * ttime / 8 / 1024
+        lines = [f"Connecting to host {request.get('ip', '::1')}, port {request.get('port', 5201)}",
+                 "[ ID] Interval           Transfer     Bitrate         Retr",
+                 f"[  5]   0.00-{ttime:.2f}  sec  {transfer:.2f} GBytes  {rate:.0f} Mbits/sec    0             sender",
+                 f"[  5]   0.00-{ttime:.2f}  sec  {transfer:.2f} GBytes  {rate:.0f} Mbits/sec                  receiver",
+                 "", "iperf Done."]
+        return {"stdout": lines, "stderr": [], "exitCode": 0}
+
+    def _refreshDebug(self, item):
+        """Move debug action state based on time"""
+        if item["state"] in ["new", "active"]:
+            now = time.time()
+            if now >= item["finishat"]:
+                item["state"] = "finished"
+                if loadJson(item["requestdict"]).get("type", "").startswith("iperf"):
+                    item["output"] = json.dumps(self._iperfOutput(item))
+                else:
+                    item["output"] = json.dumps(self._pingOutput(item))
+                item["updatedate"] = getUTCnow()
+            elif item["state"] == "new":
+                item["state"] = "active"
+        return {key: val for key, val in item.items() if key not in ["finishat", "loss"]}
+
+    def getDebug(self, debugid):
+        """Get debug action"""
+        item = self.debugactions.get(int(debugid))
+        if not item:
+            return {"error": f"Debug action {debugid} not found"}, False, None
+        return [self._refreshDebug(item)], True, None
+
+    def getAllDebug(self, sitename, hostname=None, state=None):
+        """Get all debug actions for site (and hostname, state)"""
+        out = []
+        for item in list(self.debugactions.values()):
+            if item["sitename"] != sitename or (hostname and item["hostname"] != hostname):
+                continue
+            tmpitem = self._refreshDebug(item)
+            if state and tmpitem["state"] != state:
+                continue
+            out.append(tmpitem)
+        return out, True, None
+
+    def stats(self):
+        """Statistics of simulated instances and API calls"""
+        with self.lock:
+            instances = list(self.instances.values())
+            calls = dict(self.calls)
+        statuscalls = [inst["calls"].get("instance_get_status", 0) for inst in instances]
+        lifecycles = [inst["finished"] - inst["created"] for inst in instances if inst["finished"]]
+        return {"instances": len(instances), "calls": calls, "statuscalls": statuscalls,
+                "lifecycles": lifecycles, "debugactions": len(self.debugactions)}
+
+
+class SimWorkflowCombinedApi:
+    """Simulated sense.client.workflow_combined_api.WorkflowCombinedApi"""
+
+    def __init__(self, orchestrator):
+        self.orchestrator = orchestrator
+        self.si_uuid = None
+
+    def _uuid(self, kwargs):
+        """Get si_uuid from kwargs or object"""
+        si_uuid = kwargs.get("si_uuid") or self.si_uuid
+        if not si_uuid:
+            raise ValueError("Missing the required parameter `si_uuid`")
+        return si_uuid
+
+    def instance_new(self, **_kwargs):
+        """New instance"""
+        self.orchestrator.call("sense", "instance_new")
+        self.si_uuid = self.orchestrator.newInstance()
+        return self.si_uuid
+
+    def instance_create(self, intent, **kwargs):
+        """Create instance"""
+        si_uuid = self._uuid(kwargs)
+        self.orchestrator.call("sense", "instance_create", si_uuid)
+        return self.orchestrator.create(si_uuid, loadJson(intent))
+
+    def instance_operate(self, action, **kwargs):
+        """Operate instance (provision, cancel, reprovision)"""
+        si_uuid = self._uuid(kwargs)
+        self.orchestrator.call("sense", "instance_operate", si_uuid)
+        self.orchestrator.operate(si_uuid, action)
+
+    def instance_modify(self, intent, **kwargs):
+        """Modify instance"""
+        si_uuid = self._uuid(kwargs)
+        self.orchestrator.call("sense", "instance_modify", si_uuid)
+        del intent
+        self.orchestrator.operate(si_uuid, "modify")
+
+    def instance_get_status(self, **kwargs):
+        """Get instance status"""
+        si_uuid = self._uuid(kwargs)
+        self.orchestrator.call("sense", "instance_get_status", si_uuid)
+        return self.orchestrator.status(si_uuid, kwargs.get("verbose", False))
+
+    def instance_delete(self, **kwargs):
+        """Delete instance"""
+        si_uuid = self._uuid(kwargs)
+        self.orchestrator.call("sense", "instance_delete", si_uuid)
+        self.orchestrator.delete(si_uuid)
+
+    def instance_archive(self, **kwargs):
+        """Archive instance"""
+        si_uuid = self._uuid(kwargs)
+        self.orchestrator.call("sense", "instance_archive", si_uuid)
+        self.orchestrator.archive(si_uuid)
+
+    def manifest_create(self, template, **kwargs):
+        """Create manifest"""
+        si_uuid = kwargs.get("si_uuid") or self.si_uuid
+        self.orchestrator.call("sense", "manifest_create", si_uuid)
+        return self.orchestrator.manifest(si_uuid, loadJson(template))
+
+
+class SimWorkflowPhasedApi(SimWorkflowCombinedApi):
+    """Simulated sense.client.workflow_phased_api.WorkflowPhasedApi"""
+
+    def instance_verify(self, **kwargs):
+        """Verify instance"""
+        si_uuid = self._uuid(kwargs)
+        self.orchestrator.call("sense", "instance_verify", si_uuid)
+        return self.orchestrator.verify(si_uuid)
+
+
+class SimDiscoverApi:
+    """Simulated sense.client.discover_api.DiscoverApi"""
+
+    def __init__(self, orchestrator):
+        self.orchestrator = orchestrator
+
+    def discover_get(self, **_kwargs):
+        """Discover domains"""
+        self.orchestrator.call("sense", "discover_get")
+        domains = set(self.orchestrator.config.get("mappings", {}).keys())
+        if self.orchestrator.config.get("entriesdynamic"):
+            domains.add(self.orchestrator.config["entriesdynamic"])
+        return {"domains": [{"domain_uri": domain} for domain in sorted(domains)]}
+
+    def discover_service_instances_get(self, **kwargs):
+        """List service instances"""
+        self.orchestrator.call("sense", "discover_service_instances_get")
+        return self.orchestrator.instances_list(kwargs.get("search"))
+
+
+class SimDebugApi:
+    """Simulated sense.client.siterm.debug_api.DebugApi"""
+
+    def __init__(self, orchestrator):
+        self.orchestrator = orchestrator
+
+    def submit_ping(self, **kwargs):
+        """Submit ping"""
+        self.orchestrator.call("siterm", "submit_ping")
+        kwargs["type"] = "rapid-ping"
+        return self.orchestrator.submitDebug(kwargs)
+
+    def submit_iperfserver(self, **kwargs):
+        """Submit iperf server"""
+        self.orchestrator.call("siterm", "submit_iperfserver")
+        kwargs["type"] = "iperf-server"
+        return self.orchestrator.submitDebug(kwargs)
+
+    def submit_iperfclient(self, **kwargs):
+        """Submit iperf client"""
+        self.orchestrator.call("siterm", "submit_iperfclient")
+        kwargs["type"] = "iperf-client"
+        return self.orchestrator.submitDebug(kwargs)
+
+    def get_debug(self, **kwargs):
+        """Get debug action"""
+        self.orchestrator.call("siterm", "get_debug")
+        return self.orchestrator.getDebug(kwargs["id"])
+
+    def get_all_debug_hostname(self, **kwargs):
+        """Get all debug actions for hostname"""
+        self.orchestrator.call("siterm", "get_all_debug_hostname")
+        return self.orchestrator.getAllDebug(kwargs.get("sitename"), kwargs.get("hostname"), kwargs.get("state"))
+
+
+_ORCHESTRATOR = {}
+_ORCHLOCK = threading.Lock()
+
+
+def getOrchestrator(config):
+    """Get process wide simulated orchestrator"""
+    with _ORCHLOCK:
+        if "main" not in _ORCHESTRATOR:
+            _ORCHESTRATOR["main"] = SimOrchestrator(config)
+        return _ORCHESTRATOR["main"]
+
+
+def resetOrchestrator():
+    """Drop process wide simulated orchestrator (new one is created on next use)"""
+    with _ORCHLOCK:
+        _ORCHESTRATOR.pop("main", None)
@@ -3,9 +3,131 @@
 """
 Class for interacting with SENSE SiteRMs
 """
+import copy
+import json
 import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from EndToEndTester.utilities import loadJson, getUTCnow
-from sense.client.siterm.debug_api import DebugApi
+from EndToEndTester.apiclients import getDebugApi
+
+_SHARED = {}
+_SHAREDLOCK = threading.Lock()
+
+
+def getSiteRMExecutor(config):
+    """Get process wide thread pool for SiteRM calls (bounded by sitermworkers, default 8)"""
+    with _SHAREDLOCK:
+        if "siterm" not in _SHARED:
+            _SHARED["siterm"] = ThreadPoolExecutor(max_workers=int((config or {}).get("sitermworkers", 8)),
+                                                   thread_name_prefix="siterm")
+        return _SHARED["siterm"]
+
+
+FINGERPRINTKEYS = ["sitename", "hostname", "type", "ip", "interface", "packetsize", "interval", "time", "onetime"]
+
+
+def actionFingerprint(request):
+    """Canonical fingerprint of debug action request"""
+    request = request or {}
+    return hashlib.sha1(json.dumps([request.get(key) for key in FINGERPRINTKEYS], default=str).encode("utf-8")).hexdigest()
+
+
+class DebugActionCache:
+    """Process wide cache of new and active SiteRM debug actions per (sitename, hostname),
+    indexed by action fingerprint. Filled with one list call per state and updated with
+    our own submissions. Entries expire after ttl seconds (actions finish and new ones
+    are added by others). Workers reserve fingerprint before submit, so the same action
+    is submitted only once in the process."""
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.hostlocks = {}
+        self.actions = {}
+        self.fetched = {}
+        self.pending = {}
+
+    def _hostLock(self, hostkey):
+        """Lock per host (only one fetch per host, even if many workers ask)"""
+        with self.lock:
+            return self.hostlocks.setdefault(hostkey, threading.Lock())
+
+    def get(self, sitename, hostname, fetchfunc):
+        """Get debug actions of host (fetchfunc(sitename, hostname) is called if not cached or expired)"""
+        hostkey = (sitename, hostname)
+        with self._hostLock(hostkey):
+            if getUTCnow() - self.fetched.get(hostkey, 0) >= self.ttl:
+                actions = fetchfunc(sitename, hostname)
+                index = {}
+                for action in actions:
+                    index.setdefault(actionFingerprint(action.get("requestdict")), action)
+                with self.lock:
+                    self.actions[hostkey] = index
+                    self.fetched[hostkey] = getUTCnow()
+        with self.lock:
+            return list(self.actions.get(hostkey, {}).values())
+
+    def findOrReserve(self, request, timeout=120):
+        """Get present action for request. Returns (action, reserved):
+        (action, False) - action is present;
+        (None, True) - reserved, caller submits it and must call add or release;
+        (None, False) - other worker did not finish same submission within timeout (not reserved)"""
+        fprint = actionFingerprint(request)
+        hostkey = (request.get("sitename"), request.get("hostname"))
+        while True:
+            with self.lock:
+                action = self.actions.get(hostkey, {}).get(fprint)
+                if action:
+                    return action, False
+                event = self.pending.get(fprint)
+                if not event:
+                    self.pending[fprint] = threading.Event()
+                    return None, True
+            if not event.wait(timeout):
+                return None, False
+
+    def add(self, request, submitout):
+        """Add our own submitted debug action (and release reservation)"""
+        fprint = actionFingerprint(request)
+        hostkey = (request.get("sitename"), request.get("hostname"))
+        action = {"id": (submitout or {}).get("ID"), "sitename": hostkey[0], "hostname": hostkey[1],
+                  "state": "new", "insertdate": getUTCnow(), "requestdict": dict(request)}
+        with self.lock:
+            self.actions.setdefault(hostkey, {})[fprint] = action
+            event = self.pending.pop(fprint, None)
+        if event:
+            event.set()
+
+    def release(self, request):
+        """Release reservation (submission failed)"""
+        with self.lock:
+            event = self.pending.pop(actionFingerprint(request), None)
+        if event:
+            event.set()
+
+    def discard(self, sitename, debugid):
+        """Remove finished debug action"""
+        with self.lock:
+            for hostkey, index in self.actions.items():
+                if hostkey[0] == sitename:
+                    self.actions[hostkey] = {fprint: action for fprint, action in index.items()
+                                             if str(action.get("id")) != str(debugid)}
+
+    def clear(self):
+        """Drop all cached debug actions"""
+        with self.lock:
+            self.actions = {}
+            self.fetched = {}
+
+
+def getDebugActionCache(config):
+    """Get process wide debug action cache (debugcachettl, default 60 seconds)"""
+    with _SHAREDLOCK:
+        if "debugcache" not in _SHARED:
+            _SHARED["debugcache"] = DebugActionCache(int((config or {}).get("debugcachettl", 60)))
+        return _SHARED["debugcache"]
 
 
 class SiteRMApi:
@@ -14,11 +136,13 @@ class SiteRMApi:
     def __init__(self, **kwargs):
         self.config = kwargs.get("config")
         self.logger = kwargs.get("logger")
-        self.siterm_debug = DebugApi()
+        self.siterm_debug = getDebugApi(self.config)
+        # Ping results of last probe plan (reused while path is not re-provisioned)
+        self.pingshare = {}
 
-    @staticmethod
-    def _sr_all_keys_match(action, newaction):
-        return all(newaction.get(key) == action.get(key) for key in newaction)
+    def resetPingShare(self):
+        """Forget shared ping results (new lifecycle, path was cancelled or re-provisioned)"""
+        self.pingshare = {}
 
     def _sr_get_all_hosts(self, **kwargs):
         """Get all hosts from manifest"""
@@ -44,42 +168,65 @@ class SiteRMApi:
                         allIPs[key].append(hostdata[key].split("/")[0])
         return allHosts, allIPs
 
-    def sr_get_debug_actions(self, **kwargs):
-        """Get all debug actions for a site and hostname"""
+    def _sr_fetch_debug_actions(self, sitename, hostname):
+        """Get all new and active debug actions (with details) of a site and hostname"""
         allDebugActions = []
         for key in ["new", "active"]:
-            jsonOut = {}
             out = self.siterm_debug.get_all_debug_hostname(
-                sitename=kwargs.get("sitename"),
-                hostname=kwargs.get("hostname"),
-                state=key,
+                sitename=sitename, hostname=hostname, state=key
             )
             allitems = []
+            if out and out[1] is False:
+                self.logger.warning(f"Failed to get {key} debug actions for {sitename}:{hostname}: {out[0]}")
+                continue
             if out and out[0]:
                 allitems = loadJson(out[0])
             for tmpitem in allitems:
-                jsonOut = loadJson(tmpitem)
-                print(f"Debug action found: {jsonOut}")
-                if not jsonOut.get("id"):
-                    self.logger.warning(f"Debug action {jsonOut} has no ID. Skipping.")
+                ditem = loadJson(tmpitem)
+                if not ditem.get("id"):
+                    self.logger.warning(f"Debug action {ditem} has no ID. Skipping.")
                     continue
-                ditem = self.siterm_debug.get_debug(
-                    sitename=kwargs.get("sitename"), id=jsonOut["id"], details=True
-                )
-                if ditem and ditem[0]:
-                    ditem = ditem[0]
-                    ditem["requestdict"] = loadJson(ditem["requestdict"])
+                # List call returns details. Old SiteRMs might not - get them one by one
+                if "requestdict" not in ditem:
+                    out = self.siterm_debug.get_debug(sitename=sitename, id=ditem["id"], details=True)
+                    if not out or not out[0]:
+                        continue
+                    ditem = out[0][0] if isinstance(out[0], list) else out[0]
+                ditem["requestdict"] = loadJson(ditem.get("requestdict"))
                 allDebugActions.append(ditem)
         return allDebugActions
 
-    def sr_submit_ping(self, **kwargs):
-        """Submit a ping test to the SENSE-SiteRM API"""
-        # pylint: disable=too-many-nested-blocks,too-many-locals
-        self.logger.info("Start check for ping test if needed")
-        hosts, allIPs = self._sr_get_all_hosts(**kwargs)
-        # based on our variables;
+    def sr_get_debug_actions(self, **kwargs):
+        """Get all debug actions for a site and hostname (cached, see DebugActionCache)"""
+        return getDebugActionCache(self.config).get(
+            kwargs.get("sitename"), kwargs.get("hostname"), self._sr_fetch_debug_actions
+        )
+
+    @staticmethod
+    def _sr_ping_hostidx(hosts):
+        """Index of host entry owning each host IP (per IP family)"""
+        hostidx = {}
+        for idx, host in enumerate(hosts):
+            for key, defval in [("IPv4", "?ipv4?"), ("IPv6", "?ipv6?")]:
+                if host.get(key) and host[key] != defval:
+                    hostidx.setdefault(key, {}).setdefault(host[key].split("/")[0], idx)
+        return hostidx
+
+    @staticmethod
+    def _sr_ping_source(idx1, idx2):
+        """Host entry which probes host-host pair in symmetric mesh (alternates, so load is balanced)"""
+        low, high = min(idx1, idx2), max(idx1, idx2)
+        return low if (low + high) % 2 == 0 else high
+
+    def _sr_ping_tasks(self, hosts, allIPs, **kwargs):
+        """Prepare ping actions per host (sitename, hostname) and fill host IPs and vlans.
+        With pingmesh symmetric (default), each host-host pair is probed once (from one side);
+        switch port IPs are probed from every host. With pingmesh full, every host pings every IP"""
         ping_out = {"errors": [], "results": [], "hostips": {}, "ipvlans": {}}
-        for host in hosts:
+        tasks = []
+        symmetric = self.config.get("pingmesh", "symmetric") == "symmetric"
+        hostidx = self._sr_ping_hostidx(hosts)
+        for idx, host in enumerate(hosts):
             # Check if IPv6 or IPv4 is defined
             for key, defval in [("IPv4", "?ipv4?"), ("IPv6", "?ipv6?")]:
                 if host.get(key) and host[key] != defval:
@@ -90,22 +237,16 @@ class SiteRMApi:
                         ipaddr,
                         host["Interface"] if not host.get("vlan") else host["vlan"],
                     )
-                    try:
-                        allDebugActions = self.sr_get_debug_actions(
-                            **{"sitename": hostspl[0], "hostname": hostspl[1]}
-                        )
-                    except Exception as ex:
-                        errmsg = f"Failed to get debug actions for {hostspl[0]}:{hostspl[1]}: {ex}"
-                        ping_out["errors"].append(errmsg)
-                        self.logger.error(errmsg)
-                        allDebugActions = []
-                        continue
+                    actions = []
                     for ip in allIPs.get(key, []):
                         if ipaddr == ip:
                             # We ignore ourself. No need to ping ourself
                             continue
-                        # Loop all debug actions and check if the action is already in the list of actions
-                        newaction = {
+                        peer = hostidx.get(key, {}).get(ip)
+                        if symmetric and peer is not None and self._sr_ping_source(idx, peer) != idx:
+                            # Reverse direction of this pair is probed by peer host
+                            continue
+                        actions.append({
                             "hostname": hostspl[1],
                             "type": "rapid-ping",
                             "sitename": hostspl[0],
@@ -117,53 +258,145 @@ class SiteRMApi:
                             if not host.get("vlan")
                             else host["vlan"],
                             "time": kwargs.get("time", 60),
-                        }
-                        actionPresent = False
-                        for action in allDebugActions:
-                            if self._sr_all_keys_match(
-                                action.get("requestdict"), newaction
-                            ):
-                                self.logger.info(
-                                    "Action already present. Monitor the existing action"
-                                )
-                                newaction["submit_time"] = action.get("insertdate")
-                                newaction["submit_out"] = {
-                                    "ID": action.get("id"),
-                                    "Status": "OK",
-                                }
-                                ping_out["results"].append(newaction)
-                                actionPresent = True
-                                break
-                        if not actionPresent:
-                            repeat = 3
-                            tmpout = []
-                            while repeat > 0:
-                                self.logger.info(
-                                    f"Submitting ping test for {newaction}"
-                                )
-                                out = self.siterm_debug.submit_ping(**newaction)
-                                # Check if out [1] is True, which means the action was submitted successfully
-                                # Retry up to 3 times, and
-                                if len(out) == 3 and out[1] is True:
-                                    newaction["submit_time"] = getUTCnow()
-                                    newaction["submit_out"] = out[0]
-                                    self.logger.info(
-                                        f"Submitted ping test for {newaction}: {out}"
-                                    )
-                                    ping_out["results"].append(newaction)
-                                    repeat = 0
-                                else:
-                                    errmsg = f"Failed to submit ping test for {newaction}: {out}"
-                                    self.logger.error(errmsg)
-                                    tmpout.append(out)
-                                    repeat -= 1
-                                    if repeat == 0:
-                                        ping_out["submit_errors"] = tmpout
-                                        errmsg = f"Failed to submit ping test after 3 attempts. Last error: {errmsg}"
-                                        self.logger.error(errmsg)
-                                        return ping_out, False
-                                    time.sleep(10)
-        return ping_out, True
+                        })
+                    tasks.append(((hostspl[0], hostspl[1]), actions))
+        return ping_out, tasks
+
+    def _sr_host_debug_actions(self, hostkeys):
+        """Load debug actions of all hosts into cache concurrently. Returns {(sitename, hostname): error}"""
+        executor = getSiteRMExecutor(self.config)
+        futures = {hostkey: executor.submit(self.sr_get_debug_actions, sitename=hostkey[0], hostname=hostkey[1])
+                   for hostkey in hostkeys}
+        out = {}
+        for hostkey, future in futures.items():
+            try:
+                future.result()
+                out[hostkey] = None
+            except Exception as ex:
+                out[hostkey] = f"Failed to get debug actions for {hostkey[0]}:{hostkey[1]}: {ex}"
+        return out
+
+    def _sr_submit_one(self, newaction, abort, retries=3, retrydelay=10):
+        """Submit one ping action (own retry timer) unless the same action is present.
+        Returns (submitted, failed outputs), submitted is None if other submission failed and abort was set"""
+        cache = getDebugActionCache(self.config)
+        action, reserved = cache.findOrReserve(newaction)
+        if action:
+            self.logger.info("Action already present. Monitor the existing action")
+            newaction["submit_time"] = action.get("insertdate")
+            newaction["submit_out"] = {"ID": action.get("id"), "Status": "OK"}
+            return True, []
+        if not reserved:
+            # Other worker still submits same action - do not submit duplicate
+            return False, [f"Timed out waiting for other worker to submit the same action {newaction}"]
+        tmpout = []
+        try:
+            for attempt in range(retries):
+                if abort.is_set():
+                    return None, tmpout
+                self.logger.info(f"Submitting ping test for {newaction}")
+                out = self.siterm_debug.submit_ping(**newaction)
+                # Check if out [1] is True, which means the action was submitted successfully
+                if len(out) == 3 and out[1] is True:
+                    cache.add(newaction, out[0])
+                    newaction["submit_time"] = getUTCnow()
+                    newaction["submit_out"] = out[0]
+                    self.logger.info(f"Submitted ping test for {newaction}: {out}")
+                    return True, tmpout
+                self.logger.error(f"Failed to submit ping test for {newaction}: {out}")
+                tmpout.append(out)
+                if attempt < retries - 1:
+                    abort.wait(retrydelay)
+            abort.set()
+            return False, tmpout
+        finally:
+            cache.release(newaction)
+
+    def sr_submit_ping(self, **kwargs):
+        """Submit a ping test to the SENSE-SiteRM API. Debug actions lookup and
+        submissions run concurrently across hosts and sites (bounded pool)"""
+        self.logger.info("Start check for ping test if needed")
+        hosts, allIPs = self._sr_get_all_hosts(**kwargs)
+        ping_out, tasks = self._sr_ping_tasks(hosts, allIPs, **kwargs)
+        hosterrors = self._sr_host_debug_actions({hostkey for hostkey, _ in tasks})
+        executor = getSiteRMExecutor(self.config)
+        # Set by first submission which fails all retries (others stop, same as before)
+        abort = threading.Event()
+        submits = []
+        for hostkey, actions in tasks:
+            if hosterrors[hostkey]:
+                ping_out["errors"].append(hosterrors[hostkey])
+                self.logger.error(hosterrors[hostkey])
+                continue
+            # Present actions are found by fingerprint (see DebugActionCache)
+            for newaction in actions:
+                submits.append((newaction, executor.submit(self._sr_submit_one, newaction, abort)))
+        exitCode = True
+        for newaction, future in submits:
+            submitted, tmpout = future.result()
+            if submitted:
+                ping_out["results"].append(newaction)
+            elif submitted is False:
+                ping_out.setdefault("submit_errors", []).extend(tmpout)
+                self.logger.error(f"Failed to submit ping test after 3 attempts for {newaction}. Last error: {tmpout[-1] if tmpout else ''}")
+                exitCode = False
+        return ping_out, exitCode
+
+    def _sr_get_ping(self, endpoint):
+        """Get debug action of ping (None if SiteRM did not return it)"""
+        out = self.siterm_debug.get_debug(sitename=endpoint["sitename"], id=endpoint["id"], details=True)
+        self.logger.debug(f"Checking ping test {endpoint['sitename']}:{endpoint['id']}. Output: {out}")
+        if out and out[1] is not False and isinstance(out[0], list) and out[0]:
+            return out[0][0]
+        return None
+
+    def sr_monitor_pings(self, endpoints):
+        """Poll all outstanding pings concurrently and yield (endpoint, debug action, error) as
+        each finishes. First poll is when ping should be done (submit time + requested time),
+        then with backoff (doubling, up to requested time). Each ping has own deadline
+        (requested time + pingmonitorgrace, default 540 seconds). pingpollscale (default 1.0)
+        scales requested time (e.g. for simulator with shorter pings)"""
+        executor = getSiteRMExecutor(self.config)
+        grace = int(self.config.get("pingmonitorgrace", 540))
+        scale = float(self.config.get("pingpollscale", 1.0))
+        now = time.time()
+        for endpoint in endpoints:
+            ptime = max(1, int(endpoint.get("time") or 60)) * scale
+            start = min(now, float(endpoint.get("submit_time") or now))
+            endpoint["nextpoll"] = max(now, start + ptime)
+            endpoint["delay"] = max(scale, ptime / 10)
+            endpoint["maxdelay"] = ptime
+            endpoint["deadline"] = now + ptime + grace
+        pending = list(endpoints)
+        while pending:
+            wait = min(endpoint["nextpoll"] for endpoint in pending) - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            now = time.time()
+            due = [endpoint for endpoint in pending if endpoint["nextpoll"] <= now]
+            futures = {executor.submit(self._sr_get_ping, endpoint): endpoint for endpoint in due}
+            for future in as_completed(futures):
+                endpoint = futures[future]
+                try:
+                    item = future.result()
+                except Exception as ex:
+                    self.logger.warning(f"Failed to get ping test {endpoint['sitename']}:{endpoint['id']}: {ex}")
+                    item = None
+                if item and item.get("state") not in ["new", "active"]:
+                    self.logger.info(f'Ping test {endpoint["sitename"]}:{endpoint["id"]} finished')
+                    self.logger.debug(f'Ping test {endpoint["sitename"]}:{endpoint["id"]} finished with {item}')
+                    getDebugActionCache(self.config).discard(endpoint["sitename"], endpoint["id"])
+                    pending.remove(endpoint)
+                    yield endpoint, item, None
+                elif time.time() >= endpoint["deadline"]:
+                    errmsg = f"Timeout to get ping finished for {endpoint['sitename']}:{endpoint['id']}"
+                    self.logger.error(errmsg)
+                    self.logger.debug(f"{errmsg}. Debug: {item}")
+                    pending.remove(endpoint)
+                    yield endpoint, item, errmsg
+                else:
+                    endpoint["nextpoll"] = time.time() + endpoint["delay"]
+                    endpoint["delay"] = min(endpoint["maxdelay"], endpoint["delay"] * 2)
 
     def monitorping(self, **kwargs):
         """Monitor ping tests"""
@@ -175,59 +408,114 @@ class SiteRMApi:
             status = item["submit_out"].get("Status")
             if status == "OK":
                 # Submission state was ok;
-                monitorendpoints.append({"id": pingid, "sitename": sitename})
+                monitorendpoints.append({"id": pingid, "sitename": sitename, "time": item.get("time"),
+                                         "submit_time": item.get("submit_time")})
             else:
                 output["results"].append(
                     {"Status": "FailedSubmit", "id": pingid, "sitename": sitename}
                 )
-        # Now we loop over monitorendpoints and check the status
-        monitor = bool(monitorendpoints)
-        starttime = getUTCnow()
-        while monitor:
-            delitems = []
-            for idx, endpoint in enumerate(monitorendpoints):
-                out = self.siterm_debug.get_debug(
-                    sitename=endpoint["sitename"], id=endpoint["id"], details=True
-                )
-                if out and out[0]:
-                    out = out[0]
-                self.logger.debug(
-                    f"Checking ping test {endpoint['sitename']}:{endpoint['id']}. Output: {out}"
-                )
-                if out[0]["state"] not in ["new", "active"]:
-                    self.logger.info(
-                        f'Ping test {endpoint["sitename"]}:{endpoint["id"]} finished'
-                    )
-                    self.logger.debug(
-                        f'Ping test {endpoint["sitename"]}:{endpoint["id"]} finished with {out[0]}'
-                    )
-                    delitems.append(idx)
-                    output["results"].append(out[0])
-                if getUTCnow() - starttime > 600:
-                    self.logger.error(
-                        f"Timeout to get ping finished for {sitename}:{pingid}"
-                    )
-                    self.logger.debug(
-                        f"Timeout to get ping finished for {sitename}:{pingid}. Debug: {out[0]}"
-                    )
-                    output["errors"].append(
-                        f"Timeout to get ping finished for {sitename}:{pingid}"
-                    )
-                    delitems.append(idx)
-                    output["results"].append(out[0])
-                time.sleep(1)
-            for idx in sorted(delitems, reverse=True):
-                del monitorendpoints[idx]
-            if not monitorendpoints:
-                break
+        # Results are added as pings finish
+        for _endpoint, item, errmsg in self.sr_monitor_pings(monitorendpoints):
+            if errmsg:
+                output["errors"].append(errmsg)
+            if item:
+                output["results"].append(item)
         return output
 
+    def _sr_ping_plankey(self, **kwargs):
+        """Key of probe plan (all planned ping actions, host IPs and vlans)"""
+        hosts, allIPs = self._sr_get_all_hosts(**kwargs)
+        ping_out, tasks = self._sr_ping_tasks(hosts, allIPs, **kwargs)
+        plan = sorted(actionFingerprint(action) for _hostkey, actions in tasks for action in actions)
+        return hashlib.sha1(json.dumps([plan, ping_out["hostips"], ping_out["ipvlans"]], sort_keys=True).encode("utf-8")).hexdigest()
+
     def testPing(self, finalReturn):
-        """Test Ping"""
+        """Test Ping. If pingreuse is set (default), probe plan is same as in previous
+        test and path was not re-provisioned since then, previous results are reused instead of probing again"""
+        sharekey = self._sr_ping_plankey(**finalReturn) if self.config.get("pingreuse", True) else None
+        if sharekey and sharekey in self.pingshare:
+            self.logger.info("Path has not changed or been re-provisioned since previous ping test. Reusing its results")
+            finalReturn["pingresults"] = copy.deepcopy(self.pingshare[sharekey])
+            finalReturn["pingresults"]["shared"] = True
+            return finalReturn
         finalReturn.setdefault("pingresults", {"submit": {}, "final": {}})
         pingSubmitResults, exitCode = self.sr_submit_ping(**finalReturn)
         finalReturn["pingresults"]["submit"] = pingSubmitResults
         if exitCode:
             pingStatusResults = self.monitorping(**finalReturn)
             finalReturn["pingresults"]["final"] = pingStatusResults
+            if sharekey and not pingStatusResults["errors"]:
+                self.pingshare = {sharekey: copy.deepcopy(finalReturn["pingresults"])}
+        return finalReturn
+
+    def _sr_throughput_pairs(self, hosts):
+        """Client and server hosts for throughput tests (each host pair once, IPv6 preferred)"""
+        for key, defval in [("IPv6", "?ipv6?"), ("IPv4", "?ipv4?")]:
+            tmphosts = [host for host in hosts if host.get(key) and host[key] != defval]
+            if len(tmphosts) >= 2:
+                return [(tmphosts[idx], tmphosts[idx2], key)
+                        for idx in range(len(tmphosts)) for idx2 in range(idx + 1, len(tmphosts))]
+        return []
+
+    def _sr_throughput_port(self, ipfrom, ipto):
+        """iperf port of the pair (from throughputports range, so parallel tests on the same host do not collide)"""
+        start, end = self.config.get("throughputports", [5201, 5300])
+        return start + int(hashlib.sha1(f"{ipfrom}-{ipto}".encode("utf-8")).hexdigest(), 16) % (end - start + 1)
+
+    def _sr_wait_active(self, endpoint, timeout=60):
+        """Wait until debug action is started (iperf server must listen before client starts)"""
+        deadline = time.time() + timeout * float(self.config.get("pingpollscale", 1.0))
+        while time.time() < deadline:
+            item = self._sr_get_ping(endpoint)
+            if item and item.get("state") != "new":
+                return item
+            time.sleep(min(1, max(0.01, deadline - time.time())))
+        return None
+
+    def sr_test_throughput(self, client, server, family, requested):
+        """Run one iperf server/client test between two hosts. Returns (result, error)"""
+        ttime = int(self.config.get("throughputtime", 30))
+        clispl, srvspl = client["Name"].split(":"), server["Name"].split(":")
+        ipfrom, ipto = client[family].split("/")[0], server[family].split("/")[0]
+        port = self._sr_throughput_port(ipfrom, ipto)
+        common = {"onetime": True, "port": port}
+        srvreq = dict(common, hostname=srvspl[1], sitename=srvspl[0], ip=ipto, time=ttime + 30)
+        clireq = dict(common, hostname=clispl[1], sitename=clispl[0], ip=ipto, time=ttime, runtime=ttime,
+                      streams=int(self.config.get("throughputstreams", 1)),
+                      interface=client["Interface"] if not client.get("vlan") else client["vlan"])
+        result = {"hostfrom": clispl[1], "hostto": srvspl[1], "sitefrom": clispl[0], "siteto": srvspl[0],
+                  "ipfrom": ipfrom, "ipto": ipto, "requested": requested, "server": srvreq, "client": clireq}
+        out = self.siterm_debug.submit_iperfserver(**srvreq)
+        if len(out) != 3 or out[1] is not True:
+            return result, f"Failed to submit iperf server {srvspl[0]}:{srvspl[1]}: {out}"
+        srvendpoint = {"sitename": srvspl[0], "id": out[0].get("ID"), "time": srvreq["time"], "submit_time": getUTCnow()}
+        if not self._sr_wait_active(srvendpoint):
+            return result, f"iperf server {srvspl[0]}:{srvspl[1]}:{srvendpoint['id']} did not start"
+        out = self.siterm_debug.submit_iperfclient(**clireq)
+        if len(out) != 3 or out[1] is not True:
+            return result, f"Failed to submit iperf client {clispl[0]}:{clispl[1]}: {out}"
+        cliendpoint = {"sitename": clispl[0], "id": out[0].get("ID"), "time": ttime, "submit_time": getUTCnow()}
+        errmsg = None
+        # Server stops itself (onetime), only client output is needed
+        for _endpoint, item, tmperr in self.sr_monitor_pings([cliendpoint]):
+            result["clientresult"] = item
+            errmsg = tmperr
+        return result, errmsg
+
+    def testThroughput(self, finalReturn, requested=0):
+        """Test throughput (iperf) between hosts of manifest. Tests run one after another,
+        as parallel tests over the same path would compete for bandwidth"""
+        output = {"errors": [], "results": [], "requested": requested}
+        hosts, _allIPs = self._sr_get_all_hosts(**finalReturn)
+        for client, server, family in self._sr_throughput_pairs(hosts):
+            try:
+                result, errmsg = self.sr_test_throughput(client, server, family, requested)
+            except Exception as ex:
+                result, errmsg = None, f"Throughput test between {client.get('Name')} and {server.get('Name')} failed: {ex}"
+            if errmsg:
+                self.logger.error(errmsg)
+                output["errors"].append(errmsg)
+            if result:
+                output["results"].append(result)
+        finalReturn["throughputresults"] = output
         return finalReturn
@@ -12,20 +12,22 @@ import sys
 import json
 import time
 import copy
-import pprint
+import reprlib
 import threading
 import random
 import queue
 import traceback
 from itertools import combinations
 from EndToEndTester.utilities import loadJson, dumpJson, getUTCnow, getConfig, checkCreateDir
-from EndToEndTester.utilities import getLogger, setSenseEnv, dumpFileJson, timestampToDate
-from EndToEndTester.utilities import fetchRemoteConfig, loadYaml, pauseTesting
-from EndToEndTester.siterm import SiteRMApi
+from EndToEndTester.utilities import getLogger, setSenseEnv, dumpFileJson, timestampToDate, getToolConfig
+from EndToEndTester.configcache import getConfigCache
+from EndToEndTester.control import getPauseControl
+from EndToEndTester.ingest import notifyRecorder
+from EndToEndTester.history import getLifecycleHistory, loadUnstarted, saveUnstarted, pairKey
+from EndToEndTester.blobs import BlobStore
+from EndToEndTester.siterm import SiteRMApi, getDebugActionCache
+from EndToEndTester.apiclients import getWorkflowCombinedApi, getWorkflowPhasedApi, getDiscoverApi
 from sense.common import classwrapper
-from sense.client.workflow_combined_api import WorkflowCombinedApi
-from sense.client.workflow_phased_api import WorkflowPhasedApi
-from sense.client.discover_api import DiscoverApi
 
 
 requests = {
@@ -166,6 +168,29 @@ def getFullTraceback(ex):
     return tracebackMsg
 
 
+# Lock file of running tester service (endtester.py). Reaper refuses to run while it exists
+TESTERLOCK = "/tmp/endtester.lock"
+
+# Bounded repr for debug prints (responses can be very large)
+SHORTREPR = reprlib.Repr()
+SHORTREPR.maxlevel = 3
+SHORTREPR.maxstring = 200
+SHORTREPR.maxother = 200
+SHORTREPR.maxdict = 10
+SHORTREPR.maxlist = 10
+
+
+def getAliasPart(part):
+    """Get alias part - if + then return last 2 parts. If fails - return full part"""
+    ret = part.split(":")[-1]
+    if ret == "+":
+        try:
+            ret = ":".join(part.split(":")[-3:-1])
+        except Exception:
+            ret = part
+    return ret
+
+
 def timer_func(func):
     """Decorator function to calculate the execution time of a function"""
 
@@ -174,9 +199,9 @@ def timer_func(func):
         result = func(*args, **kwargs)
         t2 = getUTCnow()
         print(f"== Function {func.__name__!r} executed in {(t2 - t1):.4f}s")
-        print(f"== Function {func.__name__!r} returned: {result}")
-        print(f"== Function {func.__name__!r} args: {args}")
-        print(f"== Function {func.__name__!r} kwargs: {kwargs}")
+        print(f"== Function {func.__name__!r} returned: {SHORTREPR.repr(result)}")
+        print(f"== Function {func.__name__!r} args: {SHORTREPR.repr(args)}")
+        print(f"== Function {func.__name__!r} kwargs: {SHORTREPR.repr(kwargs)}")
         return result
 
     return wrap_func
@@ -216,16 +241,17 @@ class SENSEWorker:
     # pylint: disable=too-many-return-statements,too-many-instance-attributes,too-many-branches
 
     @timer_func
-    def __init__(self, task_queue, workerid=0, config=None):
+    def __init__(self, task_queue, workerid=0, config=None, deadline=None):
         self.task_queue = task_queue
         self.config = config if config else getConfig()
         self.logger = getLogger(
             name="Tester", logFile="/var/log/EndToEndTester/Tester.log"
         )
         self.siterm = SiteRMApi(**{"config": self.config, "logger": self.logger})
+        self.pausecontrol = getPauseControl(self.config["workdir"], self.logger)
         setSenseEnv(self.config)
-        self.workflowApi = WorkflowCombinedApi()
-        self.workflowPhasedApi = WorkflowPhasedApi()
+        self.workflowApi = getWorkflowCombinedApi(self.config)
+        self.workflowPhasedApi = getWorkflowPhasedApi(self.config)
         self.states = {
             "create": "CREATE - READY",
             "modifycreate": "MODIFY - READY",
@@ -254,6 +280,12 @@ class SENSEWorker:
         self.finalstats = True
         self.vlan = "any"
         self.currentaction = None
+        # Run deadline (nextRun) and pairs not started because of it
+        self.deadline = deadline
+        self.history = getLifecycleHistory(self.config["workdir"])
+        self.unstarted = []
+        # Large response parts are spilled to blob files (per lifecycle)
+        self.blobs = None
 
     @timer_func
     def _setWorkerHeader(self, header):
@@ -277,6 +309,14 @@ class SENSEWorker:
         self.vlan = "any"
         self.currentaction = None
 
+    @timer_func
+    def updateConfig(self, newconfig):
+        """Hot reload config. In-flight lifecycle continues, but uses new timeouts"""
+        self.logger.info(f"{self.workerid} received new config")
+        self.config = newconfig
+        self.siterm.config = newconfig
+        self.timeouts = copy.deepcopy(newconfig["timeouts"])
+
     @timer_func
     def checkifJsonExists(self, pair):
         """Check if json exists"""
@@ -312,18 +352,33 @@ class SENSEWorker:
         with open(filename, "w", encoding="utf-8") as fd:
             json.dump({"worker": self.workerheader, "timestamp": getUTCnow()}, fd)
 
+    @timer_func
+    def updateJsonLock(self, pair, **kwargs):
+        """Add instance information (uuid, alias) to json lock (used by reaper)"""
+        fname = str(pair[0]) + "-" + str(pair[1]) + "-" + str(self.vlan)
+        filename = os.path.join(self.config["workdir"], fname + ".json.lock")
+        lockinfo = {"worker": self.workerheader, "timestamp": getUTCnow()}
+        if os.path.exists(filename):
+            with open(filename, "r", encoding="utf-8") as fd:
+                lockinfo = loadJson(fd.read()) or lockinfo
+        lockinfo.update(kwargs)
+        with open(filename, "w", encoding="utf-8") as fd:
+            json.dump(lockinfo, fd)
+
     @timer_func
     def writeJsonOutput(self, pair):
         """Write json output"""
         # Generate filename (it can either pair (0,1) or (1,0))
         fname = str(pair[0]) + "-" + str(pair[1]) + "-" + str(self.vlan)
         filename = os.path.join(self.config["workdir"], fname + ".json")
-        with open(filename, "w", encoding="utf-8") as fd:
-            json.dump(self.response, fd)
+        # Compressed (gzip, zstd or none) and atomically renamed into place
+        dumpFileJson(filename, self.response, self.config.get("outputcompression", "none"))
         # Delete json lock
-        filename = os.path.join(self.config["workdir"], fname + ".json.lock")
-        if os.path.exists(filename):
-            os.remove(filename)
+        lockname = os.path.join(self.config["workdir"], fname + ".json.lock")
+        if os.path.exists(lockname):
+            os.remove(lockname)
+        # Push to recorder (file stays as fallback if recorder does not get it)
+        notifyRecorder(self.config, filename, self.logger)
 
     @timer_func
     def _logTiming(self, status, call, configstatus, timestamp):
@@ -414,10 +469,13 @@ class SENSEWorker:
         status = self.workflowApi.instance_get_status(si_uuid=serviceuuid, verbose=True)
         iterationcounter = 0
         sleeptime = 1
-        runUntil = getUTCnow() + self.timeouts.get(
+        callstart = getUTCnow()
+        runUntil = callstart + self.timeouts.get(
             calltype, 1200
         )  # 20 mins by default;
         while not self._validateState(status, calltype):
+            # Timeouts might change via config reload
+            runUntil = callstart + self.timeouts.get(calltype, 1200)
             sleeptime = (iterationcounter // 15) + 1
             iterationcounter += 1
             time.sleep(sleeptime)
@@ -491,6 +549,23 @@ class SENSEWorker:
             output = self.__getValidation(output, uuid)
         return output
 
+    @staticmethod
+    def _requestedCapacity(req):
+        """Requested bandwidth (Mbit/s) of request (0 if not set)"""
+        try:
+            return int(req["data"]["connections"][0]["bandwidth"]["capacity"])
+        except (KeyError, IndexError, TypeError, ValueError):
+            return 0
+
+    @timer_func
+    def _testPath(self, finalReturn, req=None):
+        """Validate provisioned path - ping and (if throughputtest set) throughput test"""
+        finalReturn = self.siterm.testPing(finalReturn)
+        if self.config.get("throughputtest", False):
+            req = req or self.response.get("info", {}).get("req")
+            finalReturn = self.siterm.testThroughput(finalReturn, self._requestedCapacity(req))
+        return finalReturn
+
     @timer_func
     def _checkpathfindissue(self, retDict, reqtype):
         """Check if there was path finding issue."""
@@ -540,7 +615,7 @@ class SENSEWorker:
                     finalReturn = self._setFinalStats(retDict, newreq, uuid)
                     if "finalstate" in retDict and retDict["finalstate"] == "OK":
                         if not self.config.get("ignoreping", False):
-                            return self.siterm.testPing(finalReturn), retDict.get(
+                            return self._testPath(finalReturn), retDict.get(
                                 "error"
                             )
                         self.logger.info(
@@ -569,17 +644,6 @@ class SENSEWorker:
         )
         return {"error": errmsg}, errmsg
 
-    @staticmethod
-    def __getpart(part):
-        """Get part - if + then return last 2 parts. If fails - return full part"""
-        ret = part.split(":")[-1]
-        if ret == "+":
-            try:
-                ret = ":".join(part.split(":")[-3:-1])
-            except Exception:
-                ret = part
-        return ret
-
     def _getIPRange(self, pairname):
         """Get IP Range for the pair"""
         # Get the IPv6 Range from config
@@ -592,14 +656,14 @@ class SENSEWorker:
 
     def _getAlias(self, pair):
         """Get alias for the pair"""
-        return f"{timestampToDate(getUTCnow())} {self.__getpart(pair[0])}-{self.__getpart(pair[1])}-{self.vlan}"
+        return f"{timestampToDate(getUTCnow())} {getAliasPart(pair[0])}-{getAliasPart(pair[1])}-{self.vlan}"
 
     @timer_func
     def __create(self, pair, reqtype, template):
         """Create a service instance in SENSE-0"""
         self.starttime = getUTCnow()
         self._logTiming("CREATE", "create", "create", getUTCnow())
-        self.workflowApi = WorkflowCombinedApi()
+        self.workflowApi = getWorkflowCombinedApi(self.config)
         newreq = copy.deepcopy(template)
         self.response["info"] = {
             "pair": pair,
@@ -631,6 +695,7 @@ class SENSEWorker:
         self.workflowApi.si_uuid = None
         newuuid = self.workflowApi.instance_new()
         self.response["info"]["uuid"] = newuuid
+        self.updateJsonLock(pair, uuid=newuuid, alias=newreq["alias"])
         try:
             self.logger.info(f"{self.workerid} Create new instance {newreq}")
             response = self.workflowApi.instance_create(json.dumps(newreq))
@@ -695,6 +760,8 @@ class SENSEWorker:
     @timer_func
     def cancel(self, serviceuuid, delete=False, archive=False):
         """Cancel a service instance in SENSE-0"""
+        # Path is released - ping results can not be reused after this
+        self.siterm.resetPingShare()
         try:
             retDict = self.__cancel(serviceuuid, delete, archive)
             finalout = self._setFinalStats(retDict, None, serviceuuid)
@@ -767,6 +834,8 @@ class SENSEWorker:
     def reprovision(self, serviceuuid):
         """Reprovision a service instance in SENSE-0"""
         self.currentaction = "reprovision"
+        # Path is provisioned again - connectivity must be measured again
+        self.siterm.resetPingShare()
         self.starttime = getUTCnow()
         self._logTiming("CREATE", "reprovision", "create", getUTCnow())
         status = self.workflowApi.instance_get_status(si_uuid=serviceuuid)
@@ -787,7 +856,7 @@ class SENSEWorker:
             status["finalstate"] = "OK"
             finalReturn = self._setFinalStats(status, None, serviceuuid)
             if not self.config.get("ignoreping", False):
-                return self.siterm.testPing(finalReturn), status.get("error")
+                return self._testPath(finalReturn), status.get("error")
             self.logger.info(
                 f"{self.workerheader} Ignoring ping test due to config parameter set"
             )
@@ -804,6 +873,8 @@ class SENSEWorker:
     @timer_func
     def modify(self, serviceuuid, action="division"):
         """Modify a service instance in SENSE-0"""
+        # Path is re-provisioned (modify, modifycreate) - connectivity must be measured again
+        self.siterm.resetPingShare()
         self.starttime = getUTCnow()
         self._logTiming("CREATE", self.currentaction, "create", getUTCnow())
         status = self.workflowApi.instance_get_status(si_uuid=serviceuuid)
@@ -879,7 +950,7 @@ class SENSEWorker:
             status["finalstate"] = "OK"
             finalReturn = self._setFinalStats(status, None, serviceuuid)
             if not self.config.get("ignoreping", False):
-                return self.siterm.testPing(finalReturn), status.get("error")
+                return self._testPath(finalReturn, originReq), status.get("error")
             self.logger.info(
                 f"{self.workerheader} Ignoring ping test due to config parameter set"
             )
@@ -908,12 +979,22 @@ class SENSEWorker:
             )
             return
         self.creatJsonLock(pair)
+        self.siterm.resetPingShare()
+        lifecyclestart = getUTCnow()
+        self.blobs = BlobStore(
+            self.config["workdir"],
+            f"{pair[0]}-{pair[1]}-{self.vlan}-{lifecyclestart}",
+            self.config.get("blobthreshold", 65536),
+            self.config.get("outputcompression", "none"),
+        )
+        self.response["blobdir"] = self.blobs.blobdir
         cancelled = False
         try:
             # Create;
             self.currentaction = "create"
             self.response["create"], errmsg = self.create(pair)
-            self.logger.info(f"({self.workerheader}) response: {self.response}")
+            self._spillPhase("create")
+            self.logger.info(f"({self.workerheader}) response: {self._responseSummary()}")
             serviceuuid = (
                 self.response.get("create", {}).get("response", {}).get("service_uuid")
             )
@@ -925,6 +1006,7 @@ class SENSEWorker:
                 self.response["modifycreate"], errmsg = self.modify(
                     serviceuuid, modaction
                 )
+                self._spillPhase("modifycreate")
                 modaction = "multiply"
                 if errmsg:
                     raise ValueError(errmsg)
@@ -936,11 +1018,13 @@ class SENSEWorker:
                 self.response["cancelrep"], errmsg = self.cancel(
                     serviceuuid, False, False
                 )
+                self._spillPhase("cancelrep")
                 if errmsg:
                     raise ValueError(errmsg)
                 # Reprovision;
                 self.currentaction = "reprovision"
                 self.response["reprovision"], errmsg = self.reprovision(serviceuuid)
+                self._spillPhase("reprovision")
                 if errmsg:
                     raise ValueError(errmsg)
             else:
@@ -950,6 +1034,7 @@ class SENSEWorker:
                 # Modify;
                 self.currentaction = "modify"
                 self.response["modify"], errmsg = self.modify(serviceuuid, modaction)
+                self._spillPhase("modify")
                 if errmsg:
                     raise ValueError(errmsg)
             else:
@@ -957,6 +1042,7 @@ class SENSEWorker:
             # Cancel;
             self.currentaction = "cancel"
             self.response["cancel"], errmsg = self.cancel(serviceuuid, True, False)
+            self._spillPhase("cancel")
             if errmsg:
                 raise ValueError(errmsg)
             cancelled = True
@@ -981,6 +1067,7 @@ class SENSEWorker:
                     self.response["cancelarch"], errmsg = self.cancel(
                         serviceuuid, False, True
                     )
+                    self._spillPhase("cancelarch")
                 else:
                     self.logger.info(
                         "Archive flag is False and we got Error. Leave instance not canceled/archived"
@@ -990,66 +1077,250 @@ class SENSEWorker:
                 self.logger.debug(getFullTraceback(exc))
         self.logger.info(f"({self.workerheader}) Final response:")
         self.response["timings"] = self.timings
-        self.logger.info(pprint.pformat(self.response))
+        self.logger.info(self._responseSummary())
         # Write response into output file
         self.writeJsonOutput(pair)
+        self.history.record(pair, getUTCnow() - lifecyclestart)
+
+    def _spillPhase(self, phase):
+        """Spill large parts of phase response to blob files (keeps only references in memory)"""
+        # Phase status keys are used by run() and recorder directly - they are never spilled
+        if self.blobs and isinstance(self.response.get(phase), dict):
+            self.response[phase] = {
+                key: val if key in ["finalstate", "state", "error", "errorlevel", "timeout", "response"] else self.blobs.spill(val)
+                for key, val in self.response[phase].items()
+            }
+
+    def _responseSummary(self):
+        """Compact summary of response for logging"""
+        summary = {"info": {key: self.response.get("info", {}).get(key) for key in ["pair", "uuid", "requesttype"]}}
+        for phase, val in self.response.items():
+            if phase in ["info", "timings", "blobdir"] or not isinstance(val, dict):
+                continue
+            summary[phase] = {key: val[key] for key in ["finalstate", "state", "error", "timeout"] if key in val}
+        return json.dumps(summary, default=str)
+
+    def _fitsDeadline(self, pair):
+        """Check if pair lifecycle (estimated from history) can finish before run deadline"""
+        if not self.deadline or not self.config.get("rundeadline", True):
+            return True
+        estimate = self.history.estimate(pair, self.config.get("lifecycleestimate"))
+        if estimate is None:
+            return True
+        return getUTCnow() + estimate <= self.deadline - self.config.get("drainmargin", 0)
+
+    def _deferUnstarted(self, pair):
+        """Report pair as not started in this run (will be scheduled first in next run)"""
+        self.logger.info(
+            f"Worker {self.workerid} will not start pair: {pair}. Expected lifecycle would overrun run deadline {self.deadline}"
+        )
+        if pair not in self.unstarted:
+            self.unstarted.append(pair)
+
+    def _getSites(self, pair):
+        """Get site names of pair (used for targeted pause)"""
+        return [
+            self.config.get("entries", {}).get(urn, {}).get("site", "")
+            for urn in pair
+        ]
+
+    def _waitSlice(self):
+        """Seconds to wait for pause change before re-checking deadline and config (<= 0 if deadline passed)"""
+        interval = self.config.get("statusinterval", 30)
+        if not self.deadline or not self.config.get("rundeadline", True):
+            return interval
+        return min(interval, self.deadline - getUTCnow())
+
+    def _waitResumed(self, pair=None):
+        """Wait until testing (or pair) is resumed. Returns False if run deadline passed
+        or pair was disabled/removed from config while waiting"""
+        sites = self._getSites(pair) if pair else None
+        while self.pausecontrol.isPaused(pair, sites):
+            timeout = self._waitSlice()
+            if timeout <= 0 or (pair and not pairEnabled(self.config, pair)):
+                return False
+            self.pausecontrol.waitResumed(pair, sites, timeout)
+        return True
+
+    def _deferPausedPair(self, pair):
+        """Put paused pair back to the queue. If only paused pairs remain - wait until pause state changes.
+        After run deadline paused pair is reported as not started"""
+        if self._waitSlice() <= 0:
+            self._deferUnstarted(pair)
+            self.task_queue.task_done()
+            return
+        self.task_queue.put(pair)
+        self.task_queue.task_done()
+        with self.task_queue.mutex:
+            queued = list(self.task_queue.queue)
+        if queued and all(self.pausecontrol.isPaused(item, self._getSites(item)) for item in queued):
+            self.logger.info(
+                f"Worker {self.workerid} only paused pairs remain in queue. Waiting for pause state change"
+            )
+            self.pausecontrol.waitChange(self._waitSlice())
 
     @timer_func
     def startwork(self):
         """Process tasks from the queue"""
-        while not self.task_queue.empty():
+        while True:
             try:
-                if pauseTesting(
-                    os.path.join(self.config["workdir"], "pause-endtoend-testing")
-                ):
+                if self.pausecontrol.isPaused():
                     self.logger.info(
                         "Pause testing flag set. Will not get new work from the queue"
                     )
-                    time.sleep(30)
-                else:
-                    pair = self.task_queue.get_nowait()
-                    self.logger.info(f"Worker {self.workerid} processing pair: {pair}")
-                    # In case we have vlans, we need also to use vlan tag. Otherwise, we use default
-                    self.vlan = "any"
-                    vlanrange = getvlanrange(self.config)
-                    self.logger.info(f"Worker {self.workerid} vlan range: {vlanrange}")
-                    successvlans = []
-                    # Loop via all vlans.
-                    for vlan in vlanrange:
-                        while pauseTesting(
-                            os.path.join(
-                                self.config["workdir"], "pause-endtoend-testing"
-                            )
-                        ):
-                            self.logger.info(
-                                "Pause testing flag set. Will not get new to execute new vlan test"
-                            )
-                            time.sleep(30)
-                        if vlan in successvlans:
-                            self.logger.info(
-                                f"Worker {self.workerid} already processed with vlan: {vlan}"
-                            )
-                            continue
-                        self._reset()
-                        self.vlan = vlan
+                    if not self._waitResumed():
                         self.logger.info(
-                            f"Worker {self.workerid} processing pair: {pair} with vlan: {vlan}"
+                            f"Worker {self.workerid} run deadline passed while paused. Stopping"
                         )
-                        self.run(pair)
-                        if (
-                            self.response.get("create", {}).get("finalstate", None)
-                            == "OK"
-                            and self.vlan != "any"
-                        ):
-                            self.logger.info(
-                                f"Worker {self.workerid} processing pair: {pair} with vlan: {vlan} - success"
-                            )
-                            successvlans.append(vlan)
+                        break
+                    continue
+                pair = self.task_queue.get_nowait()
+                if not pairEnabled(self.config, pair):
+                    self.logger.info(
+                        f"Worker {self.workerid} skipping pair: {pair}. Entry disabled or removed from config"
+                    )
                     self.task_queue.task_done()
+                    continue
+                if self.pausecontrol.isPaused(pair, self._getSites(pair)):
+                    self.logger.info(
+                        f"Worker {self.workerid} pair {pair} is paused. Will not start it now"
+                    )
+                    self._deferPausedPair(pair)
+                    continue
+                if not self._fitsDeadline(pair):
+                    self._deferUnstarted(pair)
+                    self.task_queue.task_done()
+                    continue
+                self.logger.info(f"Worker {self.workerid} processing pair: {pair}")
+                # In case we have vlans, we need also to use vlan tag. Otherwise, we use default
+                self.vlan = "any"
+                vlanrange = getvlanrange(self.config)
+                self.logger.info(f"Worker {self.workerid} vlan range: {vlanrange}")
+                successvlans = []
+                # Loop via all vlans.
+                for vlan in vlanrange:
+                    if self.pausecontrol.isPaused(pair, self._getSites(pair)):
+                        self.logger.info(
+                            "Pause testing flag set. Will not get new to execute new vlan test"
+                        )
+                        if not self._waitResumed(pair):
+                            if pairEnabled(self.config, pair):
+                                self._deferUnstarted(pair)
+                            break
+                    if vlan in successvlans:
+                        self.logger.info(
+                            f"Worker {self.workerid} already processed with vlan: {vlan}"
+                        )
+                        continue
+                    if not pairEnabled(self.config, pair):
+                        self.logger.info(
+                            f"Worker {self.workerid} stop processing pair: {pair}. Entry disabled or removed from config"
+                        )
+                        break
+                    if not self._fitsDeadline(pair):
+                        self._deferUnstarted(pair)
+                        break
+                    self._reset()
+                    self.vlan = vlan
+                    self.logger.info(
+                        f"Worker {self.workerid} processing pair: {pair} with vlan: {vlan}"
+                    )
+                    self.run(pair)
+                    if (
+                        self.response.get("create", {}).get("finalstate", None)
+                        == "OK"
+                        and self.vlan != "any"
+                    ):
+                        self.logger.info(
+                            f"Worker {self.workerid} processing pair: {pair} with vlan: {vlan} - success"
+                        )
+                        successvlans.append(vlan)
+                self.task_queue.task_done()
             except queue.Empty:
                 break
 
 
+def pairEnabled(config, pair):
+    """Check if pair is still enabled in config (entries might be disabled/removed via config reload)"""
+    entries = config.get("entries", {})
+    if not entries:
+        # Dynamic entries - nothing to check against
+        return True
+    for urn in pair:
+        if urn in entries:
+            if entries[urn].get("disabled", False):
+                return False
+        elif urn not in config.get("vlansto", []):
+            return False
+    return True
+
+
+def filterQueue(task_queue, keep):
+    """Remove all queued items for which keep(item) is False. Returns removed items"""
+    kept, removed = [], []
+    while True:
+        try:
+            item = task_queue.get_nowait()
+        except queue.Empty:
+            break
+        if keep(item):
+            kept.append(item)
+        else:
+            removed.append(item)
+        task_queue.task_done()
+    for item in kept:
+        task_queue.put(item)
+    return removed
+
+
+class ConfigReloader:
+    """Propagate config changes to running workers and the task queue"""
+
+    def __init__(self, task_queue, workers, pairs, config, mlogger):
+        self.task_queue = task_queue
+        self.workers = workers
+        # Latest valid config (used for workers started after reload)
+        self.config = config
+        self.knownpairs = {frozenset(pair) for pair in pairs}
+        self.logger = mlogger
+
+    def configChanged(self, changes, newconfig):
+        """Config cache subscriber"""
+        try:
+            checkconfig(newconfig)
+        except ValueError as ex:
+            self.logger.error(f"New config is not valid. Will not reload running workers: {ex}")
+            return
+        self.config = newconfig
+        for worker in self.workers:
+            worker.updateConfig(newconfig)
+        pairkeys = ["vlans", "vlansto", "filter", "entriesdynamic", "submissiontemplate", "maxpairs"]
+        if not any(changes["entries"].values()) and not set(pairkeys) & set(changes["other"]):
+            return
+        newpairs = getAllGroupedHosts(newconfig, self.logger)
+        validpairs = {frozenset(pair) for pair in newpairs}
+        removed = filterQueue(self.task_queue, lambda pair: frozenset(pair) in validpairs)
+        if removed:
+            self.logger.info(f"Removed from queue due to config reload: {removed}")
+        room = max(0, newconfig.get("maxpairs", 100) - len(self.knownpairs))
+        added = [pair for pair in newpairs if frozenset(pair) not in self.knownpairs][:room]
+        random.shuffle(added)
+        for pair in added:
+            self.knownpairs.add(frozenset(pair))
+            self.task_queue.put(pair)
+        if added:
+            self.logger.info(f"Added to queue due to config reload: {added}")
+
+
+def startWorker(task_queue, threads, workers, config, nextRunTime):
+    """Start new worker thread on task queue"""
+    worker = SENSEWorker(task_queue, len(workers), config, nextRunTime)
+    workers.append(worker)
+    thworker = threading.Thread(target=worker.startwork, args=())
+    threads.append((thworker, worker))
+    thworker.start()
+
+
 def filterIncludes(config, item):
     """Filter includes/excludes"""
     if "filter" in config:
@@ -1066,8 +1337,8 @@ def filterIncludes(config, item):
 
 def getPortsFromSense(config, mlogger):
     """Call SENSE and get all ports"""
-    workflowApi = WorkflowCombinedApi()
-    client = DiscoverApi()
+    workflowApi = getWorkflowCombinedApi(config)
+    client = getDiscoverApi(config)
     alldomains = client.discover_get()
     allEntries = []
     for domdict in alldomains.get("domains", []):
@@ -1142,6 +1413,19 @@ def getAllGroupedHosts(config, mlogger):
     return uniquePairs
 
 
+def reportUnstarted(config, workers, mlogger):
+    """Collect pairs not started by workers due to run deadline and save them for next run"""
+    unstarted = []
+    for worker in workers:
+        for pair in worker.unstarted:
+            if pair not in unstarted:
+                unstarted.append(pair)
+    if unstarted:
+        mlogger.warning(f"{len(unstarted)} pairs were not started before run deadline: {unstarted}")
+    saveUnstarted(config["workdir"], unstarted)
+    return unstarted
+
+
 def checkconfig(config):
     """Check config"""
     if config.get("entries", None) and config.get("entriesdynamic", None):
@@ -1179,8 +1463,9 @@ def checkconfig(config):
 def main(config, starttime, nextRunTime):
     """Main Run"""
     mlogger = getLogger(name="Tester", logFile="/var/log/EndToEndTester/Tester.log")
-    while pauseTesting(os.path.join(config["workdir"], "pause-endtoend-testing")):
-        mlogger.info("Seems Flag to Pause testing is set. Will postpone for 30s")
+    pausecontrol = getPauseControl(config["workdir"], mlogger)
+    while pausecontrol.isPaused():
+        mlogger.info("Seems Flag to Pause testing is set. Will postpone until resumed")
         statusout = {
             "alive": False,
             "totalworkers": config["totalThreads"],
@@ -1192,15 +1477,22 @@ def main(config, starttime, nextRunTime):
             "nextrun": nextRunTime,
         }
         dumpFileJson(os.path.join(config["workdir"], "testerinfo" + ".run"), statusout)
-        time.sleep(30)
+        pausecontrol.waitResumed(timeout=30)
     mlogger.info("=" * 80)
     checkconfig(config)
+    # Debug actions are cached per run
+    getDebugActionCache(config).clear()
     mlogger.info("Get all group host pairs")
     unique_pairs = getAllGroupedHosts(config, mlogger)
     threads = []
     workers = []
     # Shuffle randomly
     random.shuffle(unique_pairs)
+    # Pairs not started in previous run (deadline) go first
+    unstarted = {pairKey(pair) for pair in loadUnstarted(config["workdir"])}
+    if unstarted:
+        unique_pairs.sort(key=lambda pair: pairKey(pair) not in unstarted)
+        mlogger.info(f"{len(unstarted)} pairs were not started in previous run. Scheduling them first")
     # Limit the number of pairs to test based on configuration
     if len(unique_pairs) > config.get("maxpairs", 100):
         unique_pairs = unique_pairs[: config.get("maxpairs", 100)]
@@ -1214,17 +1506,18 @@ def main(config, starttime, nextRunTime):
     mlogger.info("=" * 80)
     if config["totalThreads"] == 1 and config.get("nothreading", False):
         mlogger.info("Starting one threads")
-        worker = SENSEWorker(task_queue, 0, config)
+        worker = SENSEWorker(task_queue, 0, config, nextRunTime)
         worker.startwork()
+        reportUnstarted(config, [worker], mlogger)
         return
 
     mlogger.info(f"Starting {config['totalThreads']} threads (Multithreading)")
-    for i in range(config["totalThreads"]):
-        worker = SENSEWorker(task_queue, i, config)
-        workers.append(worker)
-        thworker = threading.Thread(target=worker.startwork, args=())
-        threads.append((thworker, worker))
-        thworker.start()
+    reloadcache = getConfigCache(config, mlogger)
+    reloader = ConfigReloader(task_queue, workers, unique_pairs, config, mlogger)
+    reloadcache.subscribe(reloader.configChanged)
+    lastreload = getUTCnow()
+    for _ in range(config["totalThreads"]):
+        startWorker(task_queue, threads, workers, config, nextRunTime)
     mlogger.info("join all threads and wait for finish")
     statusout = {
         "alive": True,
@@ -1236,19 +1529,32 @@ def main(config, starttime, nextRunTime):
         "starttime": starttime,
         "nextrun": nextRunTime,
     }
-    while any(t[0].is_alive() for t in threads):
+    while any(t[0].is_alive() for t in threads) or not task_queue.empty():
+        # Workers exit on empty queue. Pairs added by config reload after that get new workers
+        idle = config["totalThreads"] - sum(t[0].is_alive() for t in threads)
+        for _ in range(min(idle, task_queue.qsize())):
+            startWorker(task_queue, threads, workers, reloader.config, nextRunTime)
         alive = [t[0].is_alive() for t in threads]
         statusout["alive"] = any(alive)
         statusout["remainingqueue"] = task_queue.qsize()
         mlogger.info(f"Remaining queue size: {task_queue.qsize()}")
         # Write status out file
         dumpFileJson(os.path.join(config["workdir"], "testerinfo" + ".run"), statusout)
-        time.sleep(30)
-        if pauseTesting(os.path.join(config["workdir"], "pause-endtoend-testing")):
+        time.sleep(config.get("statusinterval", 30))
+        if pausecontrol.isPaused():
             mlogger.info("Pause testing flag set. Queue might not be decreasing!")
+        if getUTCnow() >= lastreload + config.get("configreloadinterval", 300):
+            lastreload = getUTCnow()
+            try:
+                reloadcache.refresh()
+            except Exception as ex:
+                mlogger.error(f"Failed to refresh config for running workers: {ex}")
+        statusout["totalqueue"] = len(reloader.knownpairs)
 
     for thworker, _ in threads:
         thworker.join()
+    reloadcache.unsubscribe(reloader.configChanged)
+    reportUnstarted(config, workers, mlogger)
 
     # Write status file again - everything has finished;
     statusout = {
@@ -1265,25 +1571,30 @@ def main(config, starttime, nextRunTime):
     mlogger.info("all threads finished")
 
 
-if __name__ == "__main__":
-    logger = getLogger(
-        name="Tester", logFile="/var/log/EndToEndTester/Tester.log", logtoStdout=True
-    )
-    yamlconfig = getConfig()
+def runTester(config, mlogger):
+    """Run main every runInterval (config is refreshed before each run). Runs forever"""
+    runcache = getConfigCache(config, mlogger)
     startimer = getUTCnow()
     nextRun = 0
     while True:
         if nextRun <= getUTCnow():
-            logger.info("Timer passed. Running main")
-            if yamlconfig.get("configlocation", None):
-                yamlconfig = loadYaml(fetchRemoteConfig(yamlconfig["configlocation"]))
-            nextRun = getUTCnow() + yamlconfig["runInterval"]
-            main(yamlconfig, startimer, nextRun)
+            mlogger.info("Timer passed. Running main")
+            if config.get("configlocation", None):
+                config = runcache.refresh()
+            nextRun = getUTCnow() + config["runInterval"]
+            main(config, startimer, nextRun)
         else:
-            logger.info(
-                f"Sleeping for {yamlconfig['sleepbetweenruns']} seconds. Timer not passed"
+            mlogger.info(
+                f"Sleeping for {config['sleepbetweenruns']} seconds. Timer not passed"
             )
-            logger.info(
+            mlogger.info(
                 f"Next run: {nextRun}. Current time: {getUTCnow()}. Difference: {nextRun - getUTCnow()}"
             )
-            time.sleep(yamlconfig["sleepbetweenruns"])
+            time.sleep(config["sleepbetweenruns"])
+
+
+if __name__ == "__main__":
+    logger, yamlconfig = getToolConfig(
+        "Tester", "/var/log/EndToEndTester/Tester.log", logtoStdout=True
+    )
+    runTester(yamlconfig, logger)
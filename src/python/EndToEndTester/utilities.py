@@ -9,22 +9,22 @@ Date                    : 2025/03/14
 """
 import os
 import sys
-import time
 import json
+import gzip
 import shutil
+import threading
 import logging
 import logging.handlers
 from datetime import datetime, timezone
-import requests
 from yaml import safe_load as yload
 from yaml import safe_dump as ydump
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
-
-def pauseTesting(fname):
-    """Pause testing - in future action might come from SENSE-O"""
-    if os.path.isfile(fname):
-        return True
-    return False
+GZIPMAGIC = b"\x1f\x8b"
+ZSTDMAGIC = b"\x28\xb5\x2f\xfd"
 
 
 def getLogger(
@@ -101,26 +101,60 @@ def getUTCnow():
     return int(datetime.now(timezone.utc).timestamp())
 
 
+def compressData(data, compression=None):
+    """Compress bytes with gzip or zstd (falls back to gzip if zstandard is not installed)"""
+    if compression == "zstd":
+        if zstandard:
+            return zstandard.ZstdCompressor(level=3).compress(data)
+        print("zstandard module is not available. Will use gzip compression")
+        compression = "gzip"
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    return data
+
+
+def decompressData(data):
+    """Decompress bytes. Format (gzip, zstd or plain) is detected by magic bytes"""
+    if data.startswith(GZIPMAGIC):
+        return gzip.decompress(data)
+    if data.startswith(ZSTDMAGIC):
+        if not zstandard:
+            raise ValueError("File is zstd compressed, but zstandard module is not available")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
 def loadFileJson(filename):
-    """Load File"""
+    """Load File (plain, gzip or zstd compressed JSON)"""
     if not os.path.isfile(filename):
         print(f"Input {filename} is not a file. return empty dict")
         return {}
     with open(filename, "rb") as fd:
         try:
-            return json.loads(fd.read())
-        except json.JSONDecodeError as ex:
+            return json.loads(decompressData(fd.read()))
+        except (json.JSONDecodeError, OSError, EOFError, ValueError) as ex:
             print(f"Error in loading file: {ex}")
     return {}
 
 
-def dumpFileJson(filename, data):
-    """Dump File"""
-    with open(filename, "wb") as fd:
-        try:
-            fd.write(json.dumps(data).encode("utf-8"))
-        except json.JSONDecodeError as ex:
-            print(f"Error in dumping file: {ex}")
+def dumpFileJson(filename, data, compression=None):
+    """Dump File (optionally compressed). Written to temporary file and renamed,
+    so readers never see a partially written file"""
+    try:
+        content = compressData(json.dumps(data).encode("utf-8"), compression)
+    except (TypeError, ValueError) as ex:
+        print(f"Error in dumping file: {ex}")
+        return {}
+    tmpname = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmpname, "wb") as fd:
+            fd.write(content)
+        os.replace(tmpname, filename)
+    except OSError:
+        # Do not leave partial temporary file in workdir (e.g. ENOSPC)
+        if os.path.exists(tmpname):
+            os.unlink(tmpname)
+        raise
     return {}
 
 
@@ -176,6 +210,14 @@ def getConfig():
         return loadYaml(fd.read())
 
 
+def getToolConfig(name, logFile, logtoStdout=False):
+    """Get logger and config (with SENSE environment set) for command line tools"""
+    logger = getLogger(name=name, logFile=logFile, logtoStdout=logtoStdout)
+    config = getConfig()
+    setSenseEnv(config)
+    return logger, config
+
+
 def setSenseEnv(config=None):
     """Set SENSE Environment point to configuration file"""
     if not config:
@@ -185,36 +227,3 @@ def setSenseEnv(config=None):
         os.environ["SENSE_AUTH_OVERRIDE"] = config["sense-auth"]
         return True
     return False
-
-
-def fetchRemoteConfig(url, retries=3, sleep_time=30):
-    """Fetch remote configuration."""
-    errmsg = []
-    for attempt in range(1, retries + 1):
-        try:
-            response = requests.get(url, timeout=60)
-            if response.status_code == 200:
-                return response.text
-            msg = f"Attempt {attempt}: Failed with status code {response.status_code}"
-            print(msg)
-            errmsg.append(msg)
-        except requests.RequestException as ex:
-            msg = f"Attempt {attempt}: Exception occurred - {ex}"
-            print(msg)
-            errmsg.append(msg)
-        msg = f"Retrying in {sleep_time} seconds..."
-        print(msg)
-        errmsg.append(msg)
-        time.sleep(sleep_time)
-    print("Failed to fetch the URL after multiple attempts.")
-    if errmsg:
-        raise Exception("\n".join(errmsg))
-    return None
-
-
-def refreshConfig(config):
-    """Refresh config from remote location, if no remote - from local and return new config"""
-    if config.get("configlocaction", None):
-        config = loadYaml(fetchRemoteConfig(config["configlocation"]))
-        return config
-    return getConfig()
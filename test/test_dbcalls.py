@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Tests of row hash (natural key) compatibility with database migration.
+Title                   : end-to-end-tester
+Author                  : Justas Balcas
+Email                   : jbalcas (at) es.net
+@Copyright              : Copyright (C) 2025 ESnet
+Date                    : 2025/03/14
+"""
+import os
+import re
+import pytest
+from EndToEndTester import dbcalls
+from EndToEndTester.dbcalls import ROWHASHKEYS, rowHash
+
+ROOTDIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+MIGRATIONS = [os.path.join(ROOTDIR, "helpers", "db-update"), os.path.join(ROOTDIR, "packaging", "db-update")]
+CONCATRE = re.compile(r"UPDATE (\w+) SET rowhash = SHA1\(CONCAT_WS\('\|', ([^)]*)\)\);")
+
+
+def test_rowhash_value():
+    """Same as SHA1(CONCAT_WS('|', uuid, action, site, urn, netstatus, verified)) - integers as decimal"""
+    entry = {"uuid": "u1", "action": "create", "site": "T2_US_SDSC", "urn": "urn:x",
+             "netstatus": "activated", "verified": 1, "site1": "ignored", "insertdate": 1}
+    assert rowHash("verification", entry) == "705d1ed05d18f7d54b771c413ccd98a3b0c014a1"
+
+
+def test_rowhash_key_only():
+    """Only natural key columns are hashed"""
+    entry = {"uuid": "u1", "action": "create", "state": "CREATE - READY", "configstate": "STABLE", "insertdate": 1}
+    assert rowHash("requeststates", entry) == rowHash("requeststates", dict(entry, insertdate=2))
+    assert rowHash("requeststates", entry) != rowHash("requeststates", dict(entry, configstate="UNSTABLE"))
+
+
+@pytest.mark.parametrize("migration", MIGRATIONS)
+def test_migration_keys(migration):
+    """Migration computes rowhash of existing rows from same columns (and order) as rowHash"""
+    with open(migration, "r", encoding="utf-8") as fd:
+        updates = CONCATRE.findall(fd.read())
+    assert updates
+    for table, columns in updates:
+        assert [col.strip() for col in columns.split(",")] == ROWHASHKEYS[table]
+
+
+@pytest.mark.parametrize("table", sorted(ROWHASHKEYS))
+def test_create_keys_not_null(table):
+    """Table has unique rowhash and key columns are NOT NULL (CONCAT_WS skips NULL values)"""
+    create = getattr(dbcalls, f"create_{table}")
+    assert "UNIQUE(rowhash)" in create
+    for column in ROWHASHKEYS[table]:
+        assert re.search(rf"\b{column} \w+(\(\d+\))? NOT NULL", create), column
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Tests of DB Recorder ping output parser and RTT distribution.
+Title                   : end-to-end-tester
+Author                  : Justas Balcas
+Email                   : jbalcas (at) es.net
+@Copyright              : Copyright (C) 2025 ESnet
+Date                    : 2025/03/14
+"""
+import json
+from EndToEndTester.recordparser import parsePingOutput, rttDistribution, RTTBUCKETS
+
+
+def pingLines(replies, target="10.0.0.2", transmitted=None, rtt="0.100/0.200/0.300/0.050"):
+    """Ping stdout lines with replies (icmp_seq, time) and summary"""
+    lines = [f"PING {target} ({target}) 56(84) bytes of data."]
+    lines += [f"64 bytes from {target}: icmp_seq={seq} ttl=64 time={time} ms" for seq, time in replies]
+    transmitted = len(replies) if transmitted is None else transmitted
+    received = len({seq for seq, _ in replies})
+    loss = round(100.0 * (transmitted - received) / transmitted) if transmitted else 0
+    lines += ["", f"--- {target} ping statistics ---",
+              f"{transmitted} packets transmitted, {received} received, {loss}% packet loss, time 4005ms",
+              f"rtt min/avg/max/mdev = {rtt} ms"]
+    return lines
+
+
+def test_ping_summary():
+    """Summary and per packet rtts of clean run"""
+    out = parsePingOutput(pingLines([(1, "0.100"), (2, "0.200"), (3, "0.300")]))
+    assert out["transmitted"] == 3
+    assert out["received"] == 3
+    assert out["packetloss"] == 0.0
+    assert (out["rttmin"], out["rttavg"], out["rttmax"], out["rttmdev"]) == (0.1, 0.2, 0.3, 0.05)
+    assert out["rtts"] == [0.1, 0.2, 0.3]
+    assert (out["seqgaps"], out["reordered"], out["duplicates"]) == (0, 0, 0)
+
+
+def test_ping_gaps():
+    """Missing sequence numbers between first and last reply are gaps"""
+    out = parsePingOutput(pingLines([(1, "1.0"), (2, "1.0"), (5, "1.0"), (6, "1.0")], transmitted=6))
+    assert out["seqgaps"] == 2
+    assert out["transmitted"] == 6
+    assert out["received"] == 4
+    assert out["packetloss"] == 33.0
+
+
+def test_ping_reordered_and_duplicates():
+    """Late replies are reordered, repeated sequence numbers are duplicates (rtt not counted)"""
+    lines = pingLines([(1, "1.0"), (3, "3.0"), (2, "2.0"), (4, "4.0")])
+    lines.insert(3, "64 bytes from 10.0.0.2: icmp_seq=1 ttl=64 time=9.0 ms (DUP!)")
+    out = parsePingOutput(lines)
+    assert out["reordered"] == 1
+    assert out["duplicates"] == 1
+    assert out["seqgaps"] == 0
+    assert out["rtts"] == [1.0, 3.0, 2.0, 4.0]
+
+
+def test_ping_ipv6_zone():
+    """IPv6 link local target with zone id"""
+    target = "fe80::1%eth0.3600"
+    out = parsePingOutput(pingLines([(1, "0.045"), (2, "0.050")], target=target))
+    assert out["rtts"] == [0.045, 0.05]
+    assert out["received"] == 2
+
+
+def test_ping_errors_and_empty():
+    """Error replies (no time) are not counted. Empty output gives zeros"""
+    lines = pingLines([(1, "1.5")], transmitted=3)
+    lines.insert(2, "From 10.0.0.1 icmp_seq=2 Destination Host Unreachable")
+    out = parsePingOutput(lines)
+    assert out["rtts"] == [1.5]
+    assert out["seqgaps"] == 0
+    empty = parsePingOutput([])
+    assert not empty["rtts"]
+    assert (empty["transmitted"], empty["received"], empty["seqgaps"]) == (0, 0, 0)
+
+
+def test_rtt_percentiles():
+    """Nearest rank percentiles"""
+    out = rttDistribution([float(val) for val in range(100, 0, -1)])
+    assert out["samples"] == 100
+    assert (out["rttp50"], out["rttp95"], out["rttp99"]) == (50.0, 95.0, 99.0)
+    out = rttDistribution([0.5, 0.1, 0.3])
+    assert (out["rttp50"], out["rttp95"], out["rttp99"]) == (0.3, 0.5, 0.5)
+    out = rttDistribution([7.0])
+    assert (out["rttp50"], out["rttp95"], out["rttp99"]) == (7.0, 7.0, 7.0)
+
+
+def test_rtt_histogram():
+    """Bucket upper bounds are inclusive, values over last bound go to overflow bucket"""
+    out = rttDistribution([0.05, 0.1, 0.11, 1000, 1000.1])
+    hist = json.loads(out["rtthist"])
+    assert len(hist) == len(RTTBUCKETS) + 1
+    assert sum(hist) == 5
+    assert hist[0] == 2
+    assert hist[1] == 1
+    assert hist[len(RTTBUCKETS) - 1] == 1
+    assert hist[len(RTTBUCKETS)] == 1
+
+
+def test_rtt_empty():
+    """No samples"""
+    out = rttDistribution([])
+    assert out["samples"] == 0
+    assert (out["rttp50"], out["rttp95"], out["rttp99"]) == (0.0, 0.0, 0.0)
+    assert json.loads(out["rtthist"]) == [0] * (len(RTTBUCKETS) + 1)
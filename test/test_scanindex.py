@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Tests of DB Recorder scan state index.
+Title                   : end-to-end-tester
+Author                  : Justas Balcas
+Email                   : jbalcas (at) es.net
+@Copyright              : Copyright (C) 2025 ESnet
+Date                    : 2025/03/14
+"""
+import os
+from EndToEndTester.scanindex import ScanIndex, SCANINDEXFILE
+
+
+def writeFile(fullpath, content):
+    """Write text file"""
+    with open(fullpath, "w", encoding="utf-8") as fd:
+        fd.write(content)
+
+
+def test_unchanged(tmp_path):
+    """Entry is returned only while file inode, mtime and size are same"""
+    fullpath = str(tmp_path / "a-b-any.json")
+    writeFile(fullpath, "{}")
+    index = ScanIndex(str(tmp_path))
+    assert index.unchanged(fullpath) is None
+    index.update(fullpath, "locked", 100, requestentry={"uuid": "u1"})
+    entry = index.unchanged(fullpath)
+    assert entry["outcome"] == "locked"
+    assert entry["nextcheck"] == 100
+    assert entry["requestentry"] == {"uuid": "u1"}
+    writeFile(fullpath, '{"changed": 1}')
+    assert index.unchanged(fullpath) is None
+
+
+def test_update_missing_file(tmp_path):
+    """Outcome of file which is gone is not kept"""
+    fullpath = str(tmp_path / "a-b-any.json")
+    writeFile(fullpath, "{}")
+    index = ScanIndex(str(tmp_path))
+    index.update(fullpath, "error", 100)
+    os.remove(fullpath)
+    index.update(fullpath, "error", 200)
+    assert not index.data
+    assert index.unchanged(fullpath) is None
+
+
+def test_save_and_load(tmp_path):
+    """Index is saved only if changed and loaded by new instance"""
+    fullpath = str(tmp_path / "a-b-any.json")
+    writeFile(fullpath, "{}")
+    index = ScanIndex(str(tmp_path))
+    index.save()
+    assert not os.path.exists(tmp_path / SCANINDEXFILE)
+    index.update(fullpath, "error", 100)
+    index.save()
+    assert not index.changed
+    assert ScanIndex(str(tmp_path)).unchanged(fullpath)["outcome"] == "error"
+
+
+def test_remove_and_prune(tmp_path):
+    """Removed and no longer present files are dropped"""
+    index = ScanIndex(str(tmp_path))
+    for name in ["a.json", "b.json", "c.json.dbdone"]:
+        writeFile(str(tmp_path / name), "{}")
+        index.update(str(tmp_path / name), "locked")
+    index.remove(str(tmp_path / "a.json"))
+    index.prune(["c.json.dbdone", SCANINDEXFILE])
+    assert list(index.data) == ["c.json.dbdone"]
+    assert index.changed